@@ -1,7 +1,11 @@
 from pydantic import BaseModel
 from typing import List
 from enum import Enum
-from semantic_deduplication import text_deduplication, update_content
+from semantic_deduplication import text_deduplication, update_content, near_duplicates
+from gazetteer import match_location
+from gemini_cache import cached_generate, get_gemini_cache
+from fingerprint_index import FingerprintIndex, exact_fingerprint
+import json
 import logging
 from google import genai
 from google.genai import types
@@ -140,6 +144,23 @@ class BatchScoutData:
     data: List[ScoutData]
 
 
+def scout_data_from_dict(data: dict) -> ScoutData:
+    """ScoutData from a scouted-data doc, as the observer publishes it on stage 1"""
+    try:
+        source = Source(data.get("source"))
+    except ValueError:
+        source = data.get("source")
+    return ScoutData(
+        content=data.get("content", ""),
+        location=data.get("location", ""),
+        source=source,
+        createdAt=data.get("createdAt"),
+        engagementCount=data.get("engagementCount", 0),
+        # Scout-agent docs carry source_id, mock data sourceId
+        sourceId=data.get("sourceId") or data.get("source_id", "")
+    )
+
+
 class AnalyzeCategory(Enum):
     Traffic = "traffic"
     Weather = "weather"
@@ -188,18 +209,54 @@ severity: str [One of {AnalyzeSeverity.Low.value}, {AnalyzeSeverity.Medium.value
 text: str [The text of the data, should be a concise summary of the data and include every detail that is important]
 Response:
 """
-    response = gemini_client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[prompt],
-        config=types.GenerateContentConfig(
-            response_schema=GeminiAnalyzeData,
-            response_mime_type="application/json"
-    )
+    gemini_analyze_data: GeminiAnalyzeData = cached_generate(
+        "gemini-2.5-flash", "analyze-data", prompt,
+        lambda: gemini_client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[prompt],
+            config=types.GenerateContentConfig(
+                response_schema=GeminiAnalyzeData,
+                response_mime_type="application/json"
+            )
+        ).text,
+        parse=parse_analyze_data
     )
-    gemini_analyze_data: GeminiAnalyzeData = response.parsed
 
     return gemini_analyze_data
 
+def parse_analyze_data(text: str) -> GeminiAnalyzeData:
+    """Rebuild the structured response from its JSON text, so it can be served from the cache"""
+    data = json.loads(text)
+    return GeminiAnalyzeData(
+        category=AnalyzeCategory(data["category"]),
+        locationString=data["locationString"],
+        severity=AnalyzeSeverity(data["severity"]),
+        text=data["text"]
+    )
+
+def resolve_location(location_string: str, *hints: str) -> tuple:
+    """
+    Resolve a location to (locationString, GeoPoint). Known Bengaluru places
+    come from the offline gazetteer, anything else is geocoded with Maps.
+    The hints (scouted location, content) are only searched when the model
+    gave no location, since a place merely mentioned in the text may not be
+    where the event is.
+    """
+    if not (location_string or "").strip():
+        for text in hints:
+            place = match_location(text)
+            if place:
+                return place["address"], GeoPoint(place["lat"], place["lng"])
+        raise Exception("Address not found")
+    place = match_location(location_string)
+    if place:
+        return place["address"], GeoPoint(place["lat"], place["lng"])
+    geocode_result = gmaps.geocode(location_string, language='en', region='IN')
+    if geocode_result:
+        location = geocode_result[0]['geometry']['location']
+        return location_string, GeoPoint(location['lat'], location['lng'])
+    raise Exception("Address not found")
+
 def calculate_priority_score(engagement_count: int, severity: AnalyzeSeverity) -> float:
     severity_weights = {
         AnalyzeSeverity.Low.value: 1.0,
@@ -221,9 +278,18 @@ def dataclass_enum_to_value(obj: Any) -> dict:
             result[f.name] = value  # leave as-is
     return result
 
+fingerprint_index = FingerprintIndex(db=firestore_client)
+
 def analyze_scout_data(batch_data: BatchScoutData):
     collection = firestore_client.collection("analyzed-events")
     for item in batch_data.data:
+        # Exact repeats within the hour window are dropped before any Gemini, Maps or vector work
+        fingerprint = exact_fingerprint(item.content, item.createdAt)
+        if fingerprint_index.seen(fingerprint):
+            continue
+        gemini_calls_before = get_gemini_cache().stats()["misses"]
+        embedding_calls = 0
+
         # Perform analysis on each ScoutData item
         uris= {"mongo_1":{
                         "uri": "mongodb+srv://user:id@cluster0.awbhsa.mongodb.net/",
@@ -231,18 +297,14 @@ def analyze_scout_data(batch_data: BatchScoutData):
                     }}
         response = text_deduplication(item.content, uris)
         if response[0] == "same":
+            fingerprint_index.add(fingerprint, get_gemini_cache().stats()["misses"] - gemini_calls_before)
+            near_duplicates.add(item.content, key=item.sourceId)
             continue
         elif response[0] == "different":
             # Handle different content
             print(f"Different content found for {item.sourceId}: {item.content}")
             gemini_analyze_data = generate_analyze_data(item)
-            geocode_result = gmaps.geocode(gemini_analyze_data.locationString, language='en', region='IN')
-            if geocode_result:
-                location = geocode_result[0]['geometry']['location']
-                lat, lng = location['lat'], location['lng']
-                geopoint = GeoPoint(lat, lng)
-            else:
-                raise Exception("Address not found")
+            location_string, geopoint = resolve_location(gemini_analyze_data.locationString, item.location, item.content)
             # Get current time in Asia/Kolkata
             embeddings = gemini_client.models.embed_content(
                 model="gemini-embedding-001",
@@ -250,11 +312,12 @@ def analyze_scout_data(batch_data: BatchScoutData):
                 config=types.EmbedContentConfig(output_dimensionality=3072, task_type='RETRIEVAL_DOCUMENT')
             )
             embedding_values = embeddings.embeddings[0].values
+            embedding_calls += 1
             print(type(embedding_values))
             analyze_data = AnalyzeData(
                 uniqueId=item.sourceId,
                 category=gemini_analyze_data.category,
-                locationString=gemini_analyze_data.locationString,
+                locationString=location_string,
                 locationGeo=geopoint,
                 text=gemini_analyze_data.text,
                 severity=gemini_analyze_data.severity,
@@ -288,13 +351,8 @@ def analyze_scout_data(batch_data: BatchScoutData):
                 config=types.EmbedContentConfig(output_dimensionality=3072, task_type='RETRIEVAL_DOCUMENT')
             )
             updated_embedding_values = updated_embedding.embeddings[0].values
-            geocode_result = gmaps.geocode(existing_doc['locationString'], language='en', region='IN')
-            if geocode_result:
-                location = geocode_result[0]['geometry']['location']
-                lat, lng = location['lat'], location['lng']
-                geopoint = GeoPoint(lat, lng)
-            else:
-                raise Exception("Address not found")
+            embedding_calls += 1
+            _, geopoint = resolve_location(existing_doc['locationString'])
             print(type(updated_embedding_values))
             updated_analyze_data = AnalyzeData(
                 uniqueId=existing_doc['uniqueId'],
@@ -325,6 +383,12 @@ def analyze_scout_data(batch_data: BatchScoutData):
             for doc in docs:
                 firestore_client.collection('analyzed-events').document(doc.id).update(updated_analyze_data)
 
+        fingerprint_index.add(fingerprint, get_gemini_cache().stats()["misses"] - gemini_calls_before + embedding_calls)
+        near_duplicates.add(item.content, key=item.sourceId)
+
+    logger.info(f"Fingerprint filter: {fingerprint_index.stats()}")
+    logger.info(f"Near-duplicate prefilter: {near_duplicates.stats()}")
+
 
 def collection_exists(collection_name):
     """
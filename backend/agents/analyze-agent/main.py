@@ -5,8 +5,9 @@ import logging
 import time
 from flask import Response
 from uuid import uuid4
-from analyze_agent import analyze_scout_data  # Import your main function
+from analyze_agent import BatchScoutData, analyze_scout_data, scout_data_from_dict  # Import your main function
 import requests
+from gemini_cache import get_gemini_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,14 +45,15 @@ def handle_cloud_event(cloud_event):
         msg = json.loads(payload_text)
         job_id = msg.get("job_id")
         correlation_id = msg.get("correlation_id")
-        batch = msg.get("batch", [])
-
-        # Do your batch processing here...
+        # Stage 1 publishes one scouted-data doc per message
+        payload = msg.get("payload")
+        batch = BatchScoutData(data=[scout_data_from_dict(payload)] if payload else [])
 
+        # Acked on the stage the message was dispatched on
         callback_payload = {
             "job_id": job_id,
             "correlation_id": correlation_id,
-            "source": "stage2"
+            "source": "stage1"
         }
     except json.JSONDecodeError as e:
         logger.error(f"{uuid_for_instance} : : Error parsing JSON payload: {e}")
@@ -62,12 +64,13 @@ def handle_cloud_event(cloud_event):
     end_time = time.time()
     elapsed_time = end_time - start_time
     logger.info(f"Processing completed in {elapsed_time:.2f} seconds for messageId={message_id}")
+    logger.info(f"Gemini cache: {get_gemini_cache().stats()}")
     try:
         OBSERVER_CALLBACK_URL = "http://34.126.223.182:8000/callback"
         response = requests.post(OBSERVER_CALLBACK_URL, json=callback_payload)
         response.raise_for_status()
-        print(f"✅ Stage2 callback sent for job {job_id}")
+        print(f"✅ Stage1 callback sent for job {job_id}")
     except Exception as e:
-        print(f"❌ Failed to send stage2 callback: {e}")
+        print(f"❌ Failed to send stage1 callback: {e}")
 
 
@@ -16,6 +16,8 @@ from google.oauth2 import service_account
 from pymongo import MongoClient
 from pymongo.operations import SearchIndexModel
 from retriever import retrieve_chunks_from_all_kbs
+from gemini_cache import cached_generate
+from near_duplicates import NearDuplicateIndex
 import asyncio
 
 from dotenv import load_dotenv
@@ -53,13 +55,22 @@ Text1: {text1}
 Text2: {text2}
 Response:
 """
-    response = gemini_client.models.generate_content(
-    model="gemini-2.5-flash",
-    contents=[prompt]
+    return cached_generate(
+        "gemini-2.5-flash", "dedup-compare", prompt,
+        lambda: gemini_client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[prompt]
+        ).text
     )
-    return response.text
+
+# Recently analyzed texts, filled by the analyze path once an item is handled
+near_duplicates = NearDuplicateIndex()
 
 def text_deduplication(text, uri):
+    # Obvious near-duplicates (retweets, syndicated copies) are "same" without vector search or Gemini
+    if near_duplicates.match(text):
+        return "same", None
+
     docs = asyncio.run(retrieve_chunks_from_all_kbs(mongo_uris=uri, query=text, top_k=3))
 
     for doc in docs:
@@ -78,8 +89,10 @@ text1: {text1}
 text2:{text2}
 Response:
 """
-    response = gemini_client.models.generate_content(
-    model="gemini-2.5-flash",
-    contents=[prompt]
+    return cached_generate(
+        "gemini-2.5-flash", "dedup-merge", prompt,
+        lambda: gemini_client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[prompt]
+        ).text
     )
-    return response.text
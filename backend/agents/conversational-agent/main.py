@@ -8,6 +8,8 @@ from google.cloud import firestore
 import google.generativeai as genai
 import googlemaps
 from typing import Dict, Any, List
+from gemini_cache import cached_generate, get_gemini_cache
+from clients import WARM_UP_CLIENTS, get_firestore_client, shared_client
 
 app = Flask(__name__)
 
@@ -15,14 +17,15 @@ class ConversationalAgent:
     """Agent responsible for handling user queries using ReAct methodology"""
     
     def __init__(self):
-        self.db = firestore.Client()
+        # Clients are created once per process and shared by every request
+        self.db = get_firestore_client()
         
         # Initialize Gemini
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model_name = 'gemini-2.5-flash'
+        self.model = shared_client(('gemini-model', self.model_name), self.create_model)
         
         # Initialize Google Maps client
-        self.gmaps = googlemaps.Client(key=os.getenv('GOOGLE_MAPS_API_KEY'))
+        self.gmaps = shared_client('gmaps', lambda: googlemaps.Client(key=os.getenv('GOOGLE_MAPS_API_KEY')))
         
         # Available tools
         self.tools = {
@@ -33,6 +36,10 @@ class ConversationalAgent:
             'get_location_events': self.get_location_events
         }
     
+    def create_model(self):
+        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+        return genai.GenerativeModel(self.model_name)
+    
     def search_synthesized_events(self, keywords: str, limit: int = 10) -> List[Dict]:
         """
         Search synthesized events by keywords
@@ -315,8 +322,11 @@ class ConversationalAgent:
         """
         
         try:
-            response = self.model.generate_content(planning_prompt)
-            return json.loads(response.text)
+            return cached_generate(
+                self.model_name, 'chat-planning', planning_prompt,
+                lambda: self.model.generate_content(planning_prompt).text,
+                parse=json.loads
+            )
         except Exception as e:
             print(f"Error in planning: {e}")
             # Default fallback plan
@@ -455,6 +465,10 @@ class ConversationalAgent:
             }
 
 
+if WARM_UP_CLIENTS:
+    ConversationalAgent()
+
+
 # Flask routes
 @app.route('/chat', methods=['POST'])
 def chat_endpoint():
@@ -479,7 +493,7 @@ def chat_endpoint():
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "healthy"}), 200
+    return jsonify({"status": "healthy", "gemini_cache": get_gemini_cache().stats()}), 200
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
@@ -1,22 +1,123 @@
 # Scout Agent - main.py
 import os
 import json
+import hashlib
+import threading
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 import requests
+from requests.adapters import HTTPAdapter
 import tweepy
 import feedparser
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from flask import Flask, request, jsonify
 from google.cloud import firestore
-from utils import NagarPravahUtils
+from utils import get_utils
+from clients import WARM_UP_CLIENTS, get_firestore_client, shared_client
 
 app = Flask(__name__)
 
+# Shard keys read by the observer (OBSERVER_SHARD_BY=city|hash).
+# SCOUT_PARTITIONS must match the observer's OBSERVER_SHARD_PARTITIONS.
+SCOUT_CITY = os.getenv('SCOUT_CITY', 'bengaluru')
+SCOUT_PARTITIONS = int(os.getenv('SCOUT_PARTITIONS', '16'))
+
+# Every account and feed is fetched concurrently; a source that hasn't
+# answered within SCOUT_SOURCE_TIMEOUT seconds of starting is left out of
+# the cycle. Sources beyond SCOUT_FETCH_WORKERS wait for a free worker and
+# then get their full timeout. A paged Twitter read stops asking for pages
+# after half of it and picks up the rest of its range next cycle.
+SCOUT_FETCH_WORKERS = int(os.getenv('SCOUT_FETCH_WORKERS', '8'))
+SCOUT_SOURCE_TIMEOUT = float(os.getenv('SCOUT_SOURCE_TIMEOUT', '10'))
+
+# Sources are read forward from per-source high-water marks: at most this
+# many tweets per account per cycle, and feed entries dated up to
+# SCOUT_FEED_LATE_SECONDS before the newest one seen still count as new
+SCOUT_MAX_ITEMS_PER_SOURCE = int(os.getenv('SCOUT_MAX_ITEMS_PER_SOURCE', '200'))
+SCOUT_FEED_LATE_SECONDS = int(os.getenv('SCOUT_FEED_LATE_SECONDS', '3600'))
+
+# scouted-data writes: batches of at most SCOUT_WRITE_CHUNK_SIZE (Firestore's
+# limit is 500), SCOUT_WRITE_WORKERS committed at once, each retried
+SCOUT_WRITE_CHUNK_SIZE = min(500, int(os.getenv('SCOUT_WRITE_CHUNK_SIZE', '500')))
+SCOUT_WRITE_WORKERS = int(os.getenv('SCOUT_WRITE_WORKERS', '4'))
+SCOUT_WRITE_RETRIES = int(os.getenv('SCOUT_WRITE_RETRIES', '3'))
+
+# Per-source state kept across restarts (feed validators, high-water marks), one doc per
+# source, and its in-process copy
+SCOUT_SOURCE_STATE_COLLECTION = os.getenv('SCOUT_SOURCE_STATE_COLLECTION', 'scout-source-state')
+source_state = {}
+source_state_lock = threading.Lock()
+# Set in fetch_all_sources' workers: the fetch in progress stages its state here
+fetch_staging = threading.local()
+
+# source -> fetches, errors, timeouts, items and latency, for the life of the process
+source_stats = {}
+source_stats_lock = threading.Lock()
+
+
+def source_state_id(source: str) -> str:
+    # Feed URLs contain slashes, which document IDs can't
+    return hashlib.sha1(source.encode()).hexdigest()
+
+
+def create_http_session() -> requests.Session:
+    """Keep-alive connection pools to the feed hosts, reused by every cycle"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=SCOUT_FETCH_WORKERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def scouted_doc_id(item: dict) -> str:
+    """Stable ID for an item, so fetching it again finds its doc instead of adding one"""
+    key = f"{item.get('source')}:{item.get('source_id')}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _source_entry(source: str) -> dict:
+    return source_stats.setdefault(source, {
+        'fetches': 0, 'errors': 0, 'timeouts': 0, 'items': 0, 'not_modified': 0, 'bytes': 0,
+        'total_seconds': 0.0, 'max_seconds': 0.0, 'last_seconds': 0.0, 'last_error': None
+    })
+
+
+def record_source(source: str, seconds: float, items: int = 0, error: str = None, timed_out: bool = False):
+    with source_stats_lock:
+        stats = _source_entry(source)
+        stats['fetches'] += 1
+        stats['items'] += items
+        stats['total_seconds'] += seconds
+        stats['max_seconds'] = max(stats['max_seconds'], seconds)
+        stats['last_seconds'] = seconds
+        if timed_out:
+            stats['timeouts'] += 1
+        if error:
+            stats['errors'] += 1
+            stats['last_error'] = error
+
+
+def record_download(source: str, size: int, not_modified: bool = False):
+    with source_stats_lock:
+        stats = _source_entry(source)
+        stats['bytes'] += size
+        if not_modified:
+            stats['not_modified'] += 1
+
 class ScoutAgent:
     """Agent responsible for fetching data from external sources"""
     
     def __init__(self):
-        self.db = firestore.Client()
-        self.utils = NagarPravahUtils(os.getenv('GEMINI_API_KEY'))
+        # Clients are shared by every ScoutAgent in the process
+        self.db = get_firestore_client()
+        self.utils = get_utils(os.getenv('GEMINI_API_KEY'))
+        self.http = shared_client('http-session', create_http_session)
+        # source -> state to persist once this cycle's items are stored
+        self.pending_source_state = {}
+        # The cycle in progress, joined by triggers arriving while it runs
+        self.cycle_lock = threading.Lock()
+        self.current_cycle = None
         
         # Initialize API clients
         self.setup_twitter_client()
@@ -24,6 +125,10 @@ class ScoutAgent:
     
     def setup_twitter_client(self):
         """Initialize Twitter API client"""
+        self.twitter_api = shared_client('twitter', self.create_twitter_client)
+    
+    @staticmethod
+    def create_twitter_client():
         try:
             auth = tweepy.OAuthHandler(
                 os.getenv('TWITTER_CONSUMER_KEY'),
@@ -33,10 +138,11 @@ class ScoutAgent:
                 os.getenv('TWITTER_ACCESS_TOKEN'),
                 os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
             )
-            self.twitter_api = tweepy.API(auth)
+            return tweepy.API(auth, timeout=SCOUT_SOURCE_TIMEOUT)
         except Exception as e:
             print(f"Error setting up Twitter client: {e}")
-            self.twitter_api = None
+            # Not cached, so the next request tries again
+            return None
     
     def setup_data_sources(self):
         """Define all data sources to monitor"""
@@ -66,79 +172,344 @@ class ScoutAgent:
         
         for account in self.data_sources['twitter_accounts']:
             try:
-                # Get recent tweets (last 5 minutes worth)
-                tweets = tweepy.Cursor(
-                    self.twitter_api.user_timeline,
-                    screen_name=account,
-                    include_rts=False,
-                    exclude_replies=True,
-                    tweet_mode='extended'
-                ).items(10)  # Get last 10 tweets to filter by time
-                
-                for tweet in tweets:
-                    # Check if tweet is from last 10 minutes
-                    tweet_time = tweet.created_at.replace(tzinfo=timezone.utc)
-                    time_diff = datetime.now(timezone.utc) - tweet_time
-                    
-                    if time_diff.total_seconds() <= 600:  # 10 minutes
-                        tweet_data = {
-                            'source': 'twitter',
-                            'source_id': str(tweet.id),
-                            'content': tweet.full_text,
-                            'raw_metadata': {
-                                'user_handle': tweet.user.screen_name,
-                                'user_name': tweet.user.name,
-                                'retweet_count': tweet.retweet_count,
-                                'favorite_count': tweet.favorite_count,
-                                'created_at': tweet.created_at.isoformat(),
-                                'tweet_url': f"https://twitter.com/{tweet.user.screen_name}/status/{tweet.id}"
-                            },
-                            'fetched_at': firestore.SERVER_TIMESTAMP
-                        }
-                        tweets_data.append(tweet_data)
-                        
+                tweets_data.extend(self.fetch_twitter_account(account))
             except Exception as e:
                 print(f"Error fetching tweets from {account}: {e}")
                 continue
         
         return tweets_data
     
+    def fetch_twitter_account(self, account: str) -> list:
+        """
+        Tweets from one account newer than its since_id high-water mark
+
+        The timeline comes newest first. When more than
+        SCOUT_MAX_ITEMS_PER_SOURCE tweets are past since_id, the rest of the
+        range is read on later cycles below max_id (the oldest tweet taken
+        so far), and since_id only moves to range_newest_id once the range
+        has been read to the end, so no tweet in between is skipped.
+        A range that takes more than half of SCOUT_SOURCE_TIMEOUT to page
+        through is continued the same way.
+        """
+        tweets_data = []
+        source = f"twitter:{account}"
+        state = self.get_source_state(source)
+        since_id = state.get('since_id')
+        max_id = state.get('max_id')
+        
+        if since_id:
+            # Pages forward through everything after the last tweet we stored,
+            # continuing below the oldest one taken if the range isn't done
+            page_args = {'max_id': max_id - 1} if max_id else {}
+            tweets = tweepy.Cursor(
+                self.twitter_api.user_timeline,
+                screen_name=account,
+                since_id=since_id,
+                count=200,
+                include_rts=False,
+                exclude_replies=True,
+                tweet_mode='extended',
+                **page_args
+            ).items(SCOUT_MAX_ITEMS_PER_SOURCE)
+        else:
+            # First poll of this account: no mark yet, take what was posted in the last 10 minutes
+            tweets = tweepy.Cursor(
+                self.twitter_api.user_timeline,
+                screen_name=account,
+                include_rts=False,
+                exclude_replies=True,
+                tweet_mode='extended'
+            ).items(10)
+        
+        fetched = 0
+        newest_id = since_id or 0
+        oldest_id = None
+        # Each request is bounded by the API timeout, the read as a whole by this
+        page_deadline = time.monotonic() + SCOUT_SOURCE_TIMEOUT / 2
+        out_of_time = False
+        for tweet in tweets:
+            fetched += 1
+            newest_id = max(newest_id, tweet.id)
+            oldest_id = tweet.id if oldest_id is None else min(oldest_id, tweet.id)
+            if not since_id:
+                # Check if tweet is from last 10 minutes
+                tweet_time = tweet.created_at.replace(tzinfo=timezone.utc)
+                if (datetime.now(timezone.utc) - tweet_time).total_seconds() > 600:
+                    continue
+            
+            tweet_data = {
+                'source': 'twitter',
+                'source_id': str(tweet.id),
+                'content': tweet.full_text,
+                'raw_metadata': {
+                    'user_handle': tweet.user.screen_name,
+                    'user_name': tweet.user.name,
+                    'retweet_count': tweet.retweet_count,
+                    'favorite_count': tweet.favorite_count,
+                    'created_at': tweet.created_at.isoformat(),
+                    'tweet_url': f"https://twitter.com/{tweet.user.screen_name}/status/{tweet.id}"
+                },
+                'fetched_at': firestore.SERVER_TIMESTAMP
+            }
+            tweets_data.append(tweet_data)
+            if since_id and time.monotonic() >= page_deadline:
+                out_of_time = True
+                break
+        
+        if since_id:
+            range_newest_id = max(state.get('range_newest_id') or 0, newest_id)
+            if fetched >= SCOUT_MAX_ITEMS_PER_SOURCE or out_of_time:
+                # What didn't fit is older than what we got, read it next cycle
+                print(f"{account}: read {fetched} tweets after {since_id} this cycle; "
+                      f"continuing below {oldest_id} next cycle")
+                self.stage_source_state(source, max_id=oldest_id, range_newest_id=range_newest_id)
+            else:
+                self.stage_source_state(source, since_id=range_newest_id, max_id=None, range_newest_id=None)
+        elif newest_id:
+            self.stage_source_state(source, since_id=newest_id)
+        
+        return tweets_data
+    
     def fetch_rss_data(self) -> list:
         """Fetch recent articles from RSS feeds"""
         rss_data = []
         
         for feed_url in self.data_sources['rss_feeds']:
             try:
-                feed = feedparser.parse(feed_url)
-                
-                for entry in feed.entries[:5]:  # Get latest 5 entries
-                    # Check if entry is recent (last 2 hours)
-                    if hasattr(entry, 'published_parsed'):
-                        entry_time = datetime(*entry.published_parsed[:6], tzinfo=timezone.utc)
-                        time_diff = datetime.now(timezone.utc) - entry_time
-                        
-                        if time_diff.total_seconds() <= 7200:  # 2 hours
-                            article_data = {
-                                'source': 'news_rss',
-                                'source_id': entry.link,
-                                'content': f"{entry.title}. {entry.summary}",
-                                'raw_metadata': {
-                                    'title': entry.title,
-                                    'link': entry.link,
-                                    'published': entry.published if hasattr(entry, 'published') else '',
-                                    'author': entry.author if hasattr(entry, 'author') else '',
-                                    'feed_source': feed_url
-                                },
-                                'fetched_at': firestore.SERVER_TIMESTAMP
-                            }
-                            rss_data.append(article_data)
-                            
+                rss_data.extend(self.fetch_rss_feed(feed_url))
             except Exception as e:
                 print(f"Error fetching RSS from {feed_url}: {e}")
                 continue
         
         return rss_data
     
+    def fetch_rss_feed(self, feed_url: str) -> list:
+        """Recent articles from one feed, none if it hasn't changed since the last poll"""
+        rss_data = []
+        source = f"rss:{feed_url}"
+        
+        # Conditional GET: an unchanged feed answers 304 with no body and isn't parsed
+        state = self.get_source_state(source)
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('modified'):
+            headers['If-Modified-Since'] = state['modified']
+        
+        # feedparser.parse(url) has no timeout, so download with one and parse the bytes
+        response = self.http.get(feed_url, headers=headers, timeout=SCOUT_SOURCE_TIMEOUT)
+        if response.status_code == 304:
+            record_download(source, 0, not_modified=True)
+            return rss_data
+        response.raise_for_status()
+        record_download(source, len(response.content))
+        feed = feedparser.parse(response.content)
+        self.stage_source_state(source, etag=response.headers.get('ETag'),
+                                modified=response.headers.get('Last-Modified'))
+        
+        
+        for entry in self.new_feed_entries(source, state, feed.entries):
+            article_data = {
+                'source': 'news_rss',
+                'source_id': entry.link,
+                'content': f"{entry.title}. {entry.summary}",
+                'raw_metadata': {
+                    'title': entry.title,
+                    'link': entry.link,
+                    'published': entry.published if hasattr(entry, 'published') else '',
+                    'author': entry.author if hasattr(entry, 'author') else '',
+                    'feed_source': feed_url
+                },
+                'fetched_at': firestore.SERVER_TIMESTAMP
+            }
+            rss_data.append(article_data)
+        
+        return rss_data
+    
+    def new_feed_entries(self, source: str, state: dict, entries: list) -> list:
+        """Entries past the feed's high-water mark, staging the moved mark
+        
+        The mark is the newest published time seen (last_published), the GUIDs
+        of entries published within SCOUT_FEED_LATE_SECONDS before it
+        (recent_guids, so entries that show up late aren't missed or repeated),
+        and the feed's top GUID (last_guid) for entries without a date.
+        """
+        now = datetime.now(timezone.utc)
+        last_published = state.get('last_published')
+        last_published = datetime.fromisoformat(last_published) if last_published else None
+        recent_guids = set(state.get('recent_guids') or ())
+        last_guid = state.get('last_guid')
+        first_poll = last_published is None and last_guid is None
+        cutoff = last_published - timedelta(seconds=SCOUT_FEED_LATE_SECONDS) if last_published else None
+        
+        new_entries = []
+        dated = []
+        undated = []
+        before_last_guid = True
+        for entry in entries:
+            guid = entry.get('id') or entry.get('link')
+            if guid == last_guid:
+                before_last_guid = False
+            published = entry.get('published_parsed')
+            published = datetime(*published[:6], tzinfo=timezone.utc) if published else None
+            if published:
+                dated.append((published, guid))
+            else:
+                undated.append(guid)
+            
+            if guid in recent_guids:
+                continue
+            if first_poll:
+                # No mark yet: only what was published in the last 2 hours
+                is_new = published is not None and (now - published).total_seconds() <= 7200
+            elif published:
+                is_new = cutoff is None or published > cutoff
+            else:
+                # Feeds list newest first; without a date, new means above the last top entry
+                is_new = before_last_guid
+            if is_new:
+                new_entries.append(entry)
+        
+        newest = max([published for published, _ in dated] + ([last_published] if last_published else []), default=None)
+        if newest or entries:
+            new_cutoff = newest - timedelta(seconds=SCOUT_FEED_LATE_SECONDS) if newest else None
+            recent = {guid for published, guid in dated if new_cutoff and published > new_cutoff}
+            recent |= set(undated)
+            self.stage_source_state(
+                source,
+                last_published=newest.isoformat() if newest else None,
+                recent_guids=sorted(recent),
+                last_guid=(entries[0].get('id') or entries[0].get('link')) if entries else last_guid
+            )
+        return new_entries
+    
+    def get_source_state(self, source: str) -> dict:
+        """Persisted state of a source, read from Firestore once per process"""
+        with source_state_lock:
+            if source in source_state:
+                return dict(source_state[source])
+        try:
+            snapshot = self.db.collection(SCOUT_SOURCE_STATE_COLLECTION).document(source_state_id(source)).get()
+            state = (snapshot.to_dict() or {}) if snapshot.exists else {}
+        except Exception as e:
+            # Not cached, so the next cycle reads it again
+            print(f"Error reading state for {source}: {e}")
+            return {}
+        with source_state_lock:
+            return dict(source_state.setdefault(source, state))
+    
+    def stage_source_state(self, source: str, **fields):
+        """Remember state to save for a source once its items are stored"""
+        pending = getattr(fetch_staging, 'state', None)
+        if pending is None:
+            pending = self.pending_source_state
+        pending.setdefault(source, {}).update(fields)
+    
+    def commit_source_state(self, sources) -> None:
+        """Save the staged state of the given sources; only changed fields are written"""
+        pending, self.pending_source_state = self.pending_source_state, {}
+        for source in sources:
+            if source not in pending:
+                continue
+            with source_state_lock:
+                state = source_state.setdefault(source, {})
+                changes = {key: value for key, value in pending[source].items() if state.get(key) != value}
+                state.update(changes)
+            if not changes:
+                continue
+            try:
+                self.db.collection(SCOUT_SOURCE_STATE_COLLECTION).document(source_state_id(source)).set(
+                    dict(changes, source=source), merge=True
+                )
+            except Exception as e:
+                print(f"Error saving state for {source}: {e}")
+                # Re-read on the next cycle rather than trust what wasn't saved
+                with source_state_lock:
+                    source_state.pop(source, None)
+    
+    def source_fetchers(self) -> dict:
+        """source name -> zero-argument fetcher, one per account and feed"""
+        fetchers = {}
+        if self.twitter_api:
+            for account in self.data_sources['twitter_accounts']:
+                fetchers[f"twitter:{account}"] = lambda account=account: self.fetch_twitter_account(account)
+        for feed_url in self.data_sources['rss_feeds']:
+            fetchers[f"rss:{feed_url}"] = lambda feed_url=feed_url: self.fetch_rss_feed(feed_url)
+        fetchers['user_reports'] = self.fetch_user_reports
+        return fetchers
+    
+    def fetch_all_sources(self, timeout: float = SCOUT_SOURCE_TIMEOUT,
+                          max_workers: int = SCOUT_FETCH_WORKERS) -> tuple:
+        """Fetch every source concurrently; (items, source -> {items, seconds, error}) for this cycle"""
+        fetchers = self.source_fetchers()
+        all_data = []
+        cycle_stats = {}
+        
+        # source -> when its fetch started; a source queued behind busy
+        # workers gets its full timeout once it starts
+        started = {}
+        
+        def timed(source, fetch):
+            # Staged state comes back with the items, so a fetch that outlives
+            # the timeout can't stage into this cycle's commit or the next one's
+            started[source] = time.monotonic()
+            fetch_staging.state = staged = {}
+            try:
+                return fetch(), staged, None, time.monotonic() - started[source]
+            except Exception as e:
+                return [], {}, f"{type(e).__name__}: {e}", time.monotonic() - started[source]
+            finally:
+                fetch_staging.state = None
+        
+        workers = max(1, min(max_workers, len(fetchers)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = {executor.submit(timed, source, fetch): source for source, fetch in fetchers.items()}
+        # Bounds the cycle even if timed-out fetches keep their workers busy:
+        # long enough for every round of workers to use its full timeout
+        cycle_deadline = time.monotonic() + timeout * -(-len(fetchers) // workers)
+        pending = set(futures)
+        # Timed out but still running; waited on only to notice a freed worker
+        abandoned = set()
+        try:
+            # Merged as they arrive; with a worker per source the cycle takes
+            # about as long as the slowest one, and never more than timeout
+            while pending:
+                deadlines = [started[futures[future]] + timeout for future in pending if futures[future] in started]
+                wait_for = min(deadlines + [cycle_deadline]) - time.monotonic()
+                if len(deadlines) < len(pending):
+                    # Queued sources start without notice, look again shortly
+                    wait_for = min(wait_for, 0.1)
+                done, _ = wait(pending | abandoned, timeout=max(0, wait_for), return_when=FIRST_COMPLETED)
+                abandoned -= done
+                for future in done & pending:
+                    pending.discard(future)
+                    source = futures[future]
+                    items, staged, error, seconds = future.result()
+                    all_data.extend(items)
+                    for staged_source, fields in staged.items():
+                        self.pending_source_state.setdefault(staged_source, {}).update(fields)
+                    record_source(source, seconds, len(items), error)
+                    cycle_stats[source] = {'items': len(items), 'seconds': round(seconds, 3), 'error': error}
+                    if error:
+                        print(f"Error fetching {source}: {error}")
+                
+                now = time.monotonic()
+                for future in list(pending):
+                    source = futures[future]
+                    if now >= cycle_deadline or (source in started and now - started[source] >= timeout):
+                        pending.discard(future)
+                        if not future.cancel():
+                            abandoned.add(future)
+                        seconds = now - started.get(source, now)
+                        record_source(source, seconds, error='timed out', timed_out=True)
+                        cycle_stats[source] = {'items': 0, 'seconds': round(seconds, 3), 'error': 'timed out'}
+                        print(f"Timed out fetching {source} after {seconds:.1f}s")
+        finally:
+            # Don't wait for stragglers; their own request timeouts end them
+            executor.shutdown(wait=False)
+        
+        return all_data, cycle_stats
+    
     def fetch_user_reports(self) -> list:
         """Simulate fetching user reports - integrate with actual user report system"""
         # This would integrate with your user report collection system
@@ -146,46 +517,132 @@ class ScoutAgent:
         return []
     
     def store_scouted_data(self, data_items: list) -> bool:
-        """Store fetched data in Firestore scouted-data collection"""
-        try:
-            batch = self.db.batch()
-            collection_ref = self.db.collection('scouted-data')
-            
-            for item in data_items:
-                doc_ref = collection_ref.document()  # Auto-generate ID
-                batch.set(doc_ref, item)
-            
-            batch.commit()
-            print(f"Successfully stored {len(data_items)} items")
+        """Store fetched data in Firestore scouted-data collection, True if every chunk was written"""
+        collection_ref = self.db.collection('scouted-data')
+        
+        # Keyed by source + source_id; the last copy of an item fetched twice in a cycle wins
+        docs = {}
+        for item in data_items:
+            if item.get('source_id'):
+                doc_ref = collection_ref.document(scouted_doc_id(item))
+            else:
+                doc_ref = collection_ref.document()  # Nothing to key it on, auto-generate ID
+            item.setdefault('city', SCOUT_CITY)
+            item['partition'] = zlib.crc32(doc_ref.id.encode()) % SCOUT_PARTITIONS
+            docs[doc_ref.id] = (doc_ref, item)
+        
+        writes = list(docs.values())
+        chunks = [writes[i:i + SCOUT_WRITE_CHUNK_SIZE] for i in range(0, len(writes), SCOUT_WRITE_CHUNK_SIZE)]
+        if not chunks:
             return True
-            
-        except Exception as e:
-            print(f"Error storing data: {e}")
-            return False
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(SCOUT_WRITE_WORKERS, len(chunks)))) as executor:
+            written = list(executor.map(self.commit_chunk, chunks))
+        
+        stored = sum(len(chunk) for chunk, ok in zip(chunks, written) if ok)
+        print(f"Stored {stored}/{len(writes)} items in {len(chunks)} batches "
+              f"({len(data_items) - len(writes)} repeats in this cycle)")
+        return all(written)
+    
+    def commit_chunk(self, chunk: list) -> bool:
+        """
+        Create the docs of one batch of (doc_ref, item) that don't exist yet,
+        retrying with backoff
+
+        Items stored by an earlier cycle are left alone, so a re-fetch never
+        resets their fetched_at. A retry re-reads which docs exist, so it is
+        idempotent, and a doc created concurrently elsewhere only fails the
+        attempt.
+        """
+        for attempt in range(SCOUT_WRITE_RETRIES + 1):
+            try:
+                existing = {snapshot.id for snapshot in self.db.get_all([doc_ref for doc_ref, _ in chunk])
+                            if snapshot.exists}
+                batch = self.db.batch()
+                created = 0
+                for doc_ref, item in chunk:
+                    if doc_ref.id not in existing:
+                        batch.create(doc_ref, item)
+                        created += 1
+                if created:
+                    batch.commit()
+                return True
+            except Exception as e:
+                print(f"Error storing {len(chunk)} items (attempt {attempt + 1}): {e}")
+                if attempt < SCOUT_WRITE_RETRIES:
+                    time.sleep(0.5 * 2 ** attempt)
+        return False
     
     def run_scout_cycle(self):
-        """Execute one complete scout cycle"""
+        """Execute one complete scout cycle; a trigger arriving while one runs gets that cycle's result"""
+        with self.cycle_lock:
+            cycle = self.current_cycle
+            owner = cycle is None
+            if owner:
+                cycle = self.current_cycle = Future()
+        
+        if not owner:
+            # Same sources, same marks: a second cycle now would only fetch the same items again
+            print("Scout cycle already running, joining it")
+            return dict(cycle.result(), joined=True)
+        
+        try:
+            result = self.scout_cycle()
+            cycle.set_result(result)
+            return result
+        except Exception as e:
+            cycle.set_exception(e)
+            raise
+        finally:
+            with self.cycle_lock:
+                self.current_cycle = None
+    
+    def scout_cycle(self) -> dict:
+        """Fetch every source, store what's new and move the sources' marks"""
         print("Starting scout cycle...")
         
-        all_data = []
+        if not self.twitter_api:
+            # Setup failed on an earlier cycle; the agent lives on, so try again
+            self.setup_twitter_client()
         
-        # Fetch from all sources
-        twitter_data = self.fetch_twitter_data()
-        rss_data = self.fetch_rss_data()
-        user_reports = self.fetch_user_reports()
+        started = time.perf_counter()
+        all_data, cycle_stats = self.fetch_all_sources()
+        elapsed = time.perf_counter() - started
         
-        all_data.extend(twitter_data)
-        all_data.extend(rss_data)
-        all_data.extend(user_reports)
+        slowest = max(cycle_stats.items(), key=lambda item: item[1]['seconds'], default=(None, None))[0]
+        failed = sum(1 for stats in cycle_stats.values() if stats['error'])
+        print(f"Fetched {len(all_data)} items from {len(cycle_stats)} sources in {elapsed:.2f}s "
+              f"({failed} failed, slowest {slowest})")
         
-        print(f"Fetched {len(all_data)} items from all sources")
+        # Feed validators only move on once what was fetched with them is stored,
+        # so a failed write is fetched again on the next cycle
+        fetched = [source for source, stats in cycle_stats.items() if not stats['error']]
         
         # Store in Firestore
         if all_data:
             success = self.store_scouted_data(all_data)
-            return {"status": "success", "items_processed": len(all_data)}
+            if success:
+                self.commit_source_state(fetched)
+            return {"status": "success", "items_processed": len(all_data), "sources": cycle_stats,
+                    "cycle_seconds": round(time.perf_counter() - started, 3)}
         else:
-            return {"status": "success", "items_processed": 0, "message": "No new data found"}
+            self.commit_source_state(fetched)
+            return {"status": "success", "items_processed": 0, "message": "No new data found", "sources": cycle_stats,
+                    "cycle_seconds": round(time.perf_counter() - started, 3)}
+
+
+def get_scout() -> ScoutAgent:
+    """The process's long-lived ScoutAgent, created on first use"""
+    return shared_client('scout-agent', ScoutAgent)
+
+
+def warm_up():
+    """Create the agent and its clients before the first request (WARM_UP_CLIENTS=true)"""
+    get_scout().utils.warm_up()
+
+
+if WARM_UP_CLIENTS:
+    warm_up()
 
 
 # Flask routes for Cloud Run
@@ -193,7 +650,7 @@ class ScoutAgent:
 def main():
     """Main entry point for Cloud Scheduler trigger"""
     try:
-        scout = ScoutAgent()
+        scout = get_scout()
         result = scout.run_scout_cycle()
         return jsonify(result), 200
     except Exception as e:
@@ -203,7 +660,9 @@ def main():
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({"status": "healthy"}), 200
+    with source_stats_lock:
+        sources = {source: dict(stats) for source, stats in source_stats.items()}
+    return jsonify({"status": "healthy", "sources": sources}), 200
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
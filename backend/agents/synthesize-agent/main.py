@@ -7,6 +7,7 @@ from flask import Response
 from uuid import uuid4
 from synthesize_agent import synthesize_events_from_batch  # Import your main function
 import requests
+from gemini_cache import get_gemini_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -55,18 +56,19 @@ def handle_cloud_event(cloud_event):
     end_time = time.time()
     elapsed_time = end_time - start_time
     logger.info(f"Processing completed in {elapsed_time:.2f} seconds for messageId={message_id}")
+    logger.info(f"Gemini cache: {get_gemini_cache().stats()}")
     callback_payload = {
         "job_id": job_id,
         "correlation_id": correlation_id,
-        "source": "stage1"
+        "source": "stage2"
     }
     OBSERVER_CALLBACK_URL = "http://34.126.223.182:8000/callback"
     try:
         response = requests.post(OBSERVER_CALLBACK_URL, json=callback_payload)
         response.raise_for_status()
-        print(f"✅ Stage1 callback sent: {correlation_id}")
+        print(f"✅ Stage2 callback sent: {correlation_id}")
     except Exception as e:
-        print(f"❌ Failed to send stage1 callback: {e}")
+        print(f"❌ Failed to send stage2 callback: {e}")
 
 
 
@@ -32,6 +32,7 @@ from pymongo.operations import SearchIndexModel
 import logging
 from retriever import retrieve_chunks_from_all_kbs
 from semantic_deduplication import check_text_with_gemini_and_update
+from gemini_cache import cached_generate
 import uuid
 
 logging.basicConfig(level=logging.INFO)
@@ -357,13 +358,14 @@ Provide a list of json like this [STRICT] in your response nothing else
 ```
 Response:
 """
-    response = gemini_client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[prompt],
+    data: AllEventData = cached_generate(
+        "gemini-2.5-flash", "synthesize-events", prompt,
+        lambda: gemini_client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[prompt],
+        ).text,
+        parse=lambda response_text: eval(response_text.strip("```json"))
     )
-    response_text = response.text
-    response_text =response_text.strip("```json")
-    data: AllEventData = eval(response_text)
 
     return data
 
@@ -500,11 +502,13 @@ text1: {text1}
 text2:{text2}
 Response:
 """
-    response = gemini_client.models.generate_content(
-    model="gemini-2.5-flash",
-    contents=[prompt]
+    return cached_generate(
+        "gemini-2.5-flash", "dedup-merge", prompt,
+        lambda: gemini_client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=[prompt]
+        ).text
     )
-    return response.text
 
 
 if __name__ == "__main__":
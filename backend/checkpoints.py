@@ -0,0 +1,157 @@
+"""
+Write-coalescing agent checkpoints in Firestore.
+
+Checkpoints live in agent-state/{agent}-checkpoint as before
+(`last_processed_timestamp`). CheckpointManager keeps the value in
+process and buffers updates; the newest pending timestamp is written once
+CHECKPOINT_FLUSH_SECONDS have passed since it was recorded, or on flush()
+and at exit, so an agent checkpointing after every item pays one write
+per interval instead of one per item.
+
+Agents go through NagarPravahUtils: update_checkpoint_timestamp() after
+each processed item, and flush_checkpoints() before an invocation
+returns. The timer flush needs CPU between requests, which Cloud
+Functions and request-throttled Cloud Run don't give, so that last
+flush is what makes the checkpoint durable there.
+
+Writes are transactional and monotonic: a checkpoint never moves
+backwards, so an instance that lags behind another cannot overwrite its
+progress, and whichever instance is furthest ahead wins.
+"""
+
+import atexit
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from google.cloud import firestore
+
+CHECKPOINT_FLUSH_SECONDS = float(os.getenv("CHECKPOINT_FLUSH_SECONDS", "10"))
+# How long a read value is trusted before picking up other instances' progress
+CHECKPOINT_REFRESH_SECONDS = float(os.getenv("CHECKPOINT_REFRESH_SECONDS", "60"))
+
+
+def _utc(timestamp: datetime) -> datetime:
+    """Naive timestamps are taken as UTC so they compare with Firestore's"""
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+
+class CheckpointManager:
+    """In-process checkpoint cache with coalesced, monotonic writes"""
+
+    def __init__(self, db, collection: str = "agent-state", flush_seconds: float = CHECKPOINT_FLUSH_SECONDS,
+                 refresh_seconds: float = CHECKPOINT_REFRESH_SECONDS):
+        self.db = db
+        self.collection = collection
+        self.flush_seconds = flush_seconds
+        self.refresh_seconds = refresh_seconds
+        self.lock = threading.Lock()
+        # agent -> (timestamp, read_at) last seen in Firestore or written by us
+        self.stored: Dict[str, tuple] = {}
+        # agent -> newest timestamp not yet written
+        self.pending: Dict[str, datetime] = {}
+        # Flushes pending updates once the interval is up, if no update does first
+        self.timer: Optional[threading.Timer] = None
+        self.last_flush = time.monotonic()
+        self.writes = 0
+        self.coalesced = 0
+        atexit.register(self.flush)
+
+    def _doc(self, agent_name: str):
+        return self.db.collection(self.collection).document(f"{agent_name}-checkpoint")
+
+    def get(self, agent_name: str) -> Optional[datetime]:
+        """Newest known checkpoint, pending updates included"""
+        with self.lock:
+            pending = self.pending.get(agent_name)
+            stored = self.stored.get(agent_name)
+        if stored is None or time.monotonic() - stored[1] > self.refresh_seconds:
+            try:
+                doc = self._doc(agent_name).get()
+                timestamp = doc.to_dict().get("last_processed_timestamp") if doc.exists else None
+            except Exception as e:
+                print(f"Error getting checkpoint: {e}")
+                timestamp = stored[0] if stored else None
+            with self.lock:
+                self._remember(agent_name, timestamp)
+                stored = self.stored[agent_name]
+        candidates = [timestamp for timestamp in (pending, stored[0]) if timestamp is not None]
+        return max(candidates, key=_utc) if candidates else None
+
+    def update(self, agent_name: str, timestamp: datetime) -> bool:
+        """
+        Record progress; written on the next flush
+
+        Returns:
+            False if the timestamp is not newer than the known checkpoint.
+            True does not mean it will be stored: another instance may be
+            further ahead by the time it is written.
+        """
+        with self.lock:
+            stored = self.stored.get(agent_name)
+            known = [value for value in (self.pending.get(agent_name), stored and stored[0]) if value is not None]
+            if known and _utc(timestamp) <= max(_utc(value) for value in known):
+                return False
+            if agent_name in self.pending:
+                self.coalesced += 1
+            self.pending[agent_name] = timestamp
+            due = time.monotonic() - self.last_flush >= self.flush_seconds
+            if not due and self.timer is None:
+                self.timer = threading.Timer(self.flush_seconds, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if due:
+            self.flush()
+        return True
+
+    def flush(self) -> Dict[str, bool]:
+        """Write every pending checkpoint, returns agent -> written"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+        results = {}
+        for agent_name, timestamp in pending.items():
+            try:
+                results[agent_name] = self._write(agent_name, timestamp)
+            except Exception as e:
+                print(f"Error updating checkpoint: {e}")
+                # Keep it for the next flush unless something newer arrived meanwhile
+                with self.lock:
+                    current = self.pending.get(agent_name)
+                    if current is None or _utc(current) < _utc(timestamp):
+                        self.pending[agent_name] = timestamp
+                results[agent_name] = False
+        return results
+
+    def _remember(self, agent_name: str, timestamp: Optional[datetime]) -> None:
+        self.stored[agent_name] = (timestamp, time.monotonic())
+
+    def _write(self, agent_name: str, timestamp: datetime) -> bool:
+        doc_ref = self._doc(agent_name)
+
+        @firestore.transactional
+        def advance(transaction):
+            doc = doc_ref.get(transaction=transaction)
+            data = doc.to_dict() if doc.exists else {}
+            current = data.get("last_processed_timestamp")
+            if current is not None and _utc(current) >= _utc(timestamp):
+                return "behind", current
+            transaction.set(doc_ref, {"last_processed_timestamp": timestamp}, merge=True)
+            return "written", timestamp
+
+        outcome, current = advance(self.db.transaction())
+        with self.lock:
+            self._remember(agent_name, current)
+            if outcome == "written":
+                self.writes += 1
+        return outcome == "written"
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"writes": self.writes, "coalesced": self.coalesced, "pending": len(self.pending)}
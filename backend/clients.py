@@ -0,0 +1,57 @@
+"""
+Process-wide clients shared by everything running in one agent process.
+
+Creating a Firestore client, configuring Gemini or building a Maps/Twitter
+client costs tens of milliseconds to seconds (credential discovery, channel
+setup, discovery docs). Agents used to do it per request; shared_client()
+creates each client on first use, exactly once even when requests race on
+a cold instance, and hands the same object to every later caller.
+
+Set WARM_UP_CLIENTS=true to create an agent's clients at startup instead
+of on its first request (see the agents' warm_up functions).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable
+
+from google.cloud import firestore
+
+WARM_UP_CLIENTS = os.getenv("WARM_UP_CLIENTS", "false").lower() == "true"
+
+_clients: Dict[Hashable, Any] = {}
+_locks: Dict[Hashable, threading.Lock] = {}
+_locks_lock = threading.Lock()
+# name -> seconds the factory took, for startup logs and benchmarks
+init_seconds: Dict[Hashable, float] = {}
+
+
+def shared_client(name: Hashable, factory: Callable[[], Any]) -> Any:
+    """The process-wide client called name, created by factory on first use"""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _locks_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    # One lock per client, so a slow Gemini setup doesn't hold up Firestore
+    with lock:
+        client = _clients.get(name)
+        if client is None:
+            started = time.perf_counter()
+            client = factory()
+            init_seconds[name] = time.perf_counter() - started
+            _clients[name] = client
+    return client
+
+
+def get_firestore_client() -> firestore.Client:
+    return shared_client("firestore", firestore.Client)
+
+
+def reset_clients() -> None:
+    """Forget every shared client (benchmarks measuring a cold start)"""
+    with _locks_lock:
+        _clients.clear()
+        _locks.clear()
+        init_seconds.clear()
@@ -0,0 +1,159 @@
+"""
+Hour-bucketed exact-duplicate filter for scouted items.
+
+An item's key is its EVENT_TYPE-LOCATION_NOUN-YYYYMMDD_HH00 fingerprint,
+with the event type and location resolved locally by the gazetteer
+(UNKNOWN when it can't), plus a short digest of the normalized content.
+The digest keeps two different reports that share an event, place and
+hour (say "light" then "heavy" traffic at Koramangala) from being taken
+as repeats; those still go through semantic dedup.
+
+FingerprintIndex keeps one in-memory set per hour bucket and forgets
+buckets older than FINGERPRINT_WINDOW_HOURS, so a repeat is caught in a
+set lookup, before any Gemini, geocoding or embedding call. With
+FINGERPRINT_INDEX_COLLECTION set, keys are also shared through Firestore
+so repeats handled by another instance are caught too (one read on a
+local miss, one write per new item; `expires_at` is there for a
+Firestore TTL policy).
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+try:
+    from gazetteer import extract_entities
+except ImportError:
+    from backend.gazetteer import extract_entities
+
+FINGERPRINT_WINDOW_HOURS = int(os.getenv("FINGERPRINT_WINDOW_HOURS", "2"))
+FINGERPRINT_INDEX_COLLECTION = os.getenv("FINGERPRINT_INDEX_COLLECTION", "")
+
+def build_fingerprint(event_type: Optional[str], location_noun: Optional[str], timestamp: Any) -> str:
+    """EVENT_TYPE-LOCATION_NOUN-YYYYMMDD_HH00, timestamps other than datetimes bucket to now (UTC)"""
+    normalized_event_type = (event_type or 'UNKNOWN').upper().replace(' ', '_')
+    normalized_location_noun = (location_noun or 'UNKNOWN').upper().replace(' ', '_')
+
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.now(timezone.utc)
+    formatted_timestamp = timestamp.replace(minute=0, second=0, microsecond=0).strftime('%Y%m%d_%H00')
+
+    return f"{normalized_event_type}-{normalized_location_noun}-{formatted_timestamp}"
+
+
+def content_digest(content: str) -> str:
+    normalized = " ".join((content or "").lower().split())
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """datetimes as they are, ISO-8601 strings parsed, anything else None"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _entities(content: str) -> tuple:
+    # A repeat skips the gazetteer scan, so it is caught in microseconds
+    return extract_entities(content)
+
+
+def exact_fingerprint(content: str, created_at: Any = None) -> str:
+    """Hour-bucketed fingerprint plus content digest, no LLM call"""
+    event_type, location_noun = _entities(content or "")
+    fingerprint = build_fingerprint(event_type, location_noun, parse_timestamp(created_at))
+    return f"{fingerprint}-{content_digest(content)}"
+
+
+def _hour_bucket(fingerprint: str) -> str:
+    # ...-YYYYMMDD_HH00-digest
+    return fingerprint.rsplit("-", 2)[-2]
+
+
+class FingerprintIndex:
+    """Per-hour sets of seen fingerprints over a sliding window, optionally shared through Firestore"""
+
+    def __init__(self, window_hours: int = FINGERPRINT_WINDOW_HOURS, db=None,
+                 collection: str = FINGERPRINT_INDEX_COLLECTION):
+        self.window_hours = window_hours
+        # hour bucket -> fingerprints, oldest bucket first
+        self.buckets: "OrderedDict[str, set]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.shared = db.collection(collection) if db is not None and collection else None
+        self.checked = 0
+        self.dropped = 0
+        self.processed = 0
+        self.llm_calls = 0
+
+    def _local(self, fingerprint: str) -> bool:
+        return fingerprint in self.buckets.get(_hour_bucket(fingerprint), ())
+
+    def _remember(self, fingerprint: str) -> None:
+        bucket = _hour_bucket(fingerprint)
+        if bucket not in self.buckets:
+            self.buckets[bucket] = set()
+            # YYYYMMDD_HH00 sorts chronologically
+            self.buckets = OrderedDict(sorted(self.buckets.items()))
+            while len(self.buckets) > self.window_hours:
+                self.buckets.popitem(last=False)
+        if bucket in self.buckets:
+            self.buckets[bucket].add(fingerprint)
+
+    def seen(self, fingerprint: str) -> bool:
+        """True if the fingerprint was already processed within the window"""
+        with self.lock:
+            self.checked += 1
+            if self._local(fingerprint):
+                self.dropped += 1
+                return True
+        if self.shared is None:
+            return False
+        try:
+            if not self.shared.document(fingerprint.replace("/", "_")).get().exists:
+                return False
+        except Exception as e:
+            print(f"Error reading fingerprint index: {e}")
+            return False
+        with self.lock:
+            self._remember(fingerprint)
+            self.dropped += 1
+        return True
+
+    def add(self, fingerprint: str, llm_calls: int = 0) -> None:
+        """Mark a fingerprint processed, with the LLM calls processing it took"""
+        with self.lock:
+            self._remember(fingerprint)
+            self.processed += 1
+            self.llm_calls += llm_calls
+        if self.shared is None:
+            return
+        try:
+            self.shared.document(fingerprint.replace("/", "_")).set({
+                "expires_at": datetime.fromtimestamp(time.time() + self.window_hours * 3600, timezone.utc)
+            })
+        except Exception as e:
+            print(f"Error writing fingerprint index: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Drop rate and the LLM calls the drops avoided, at the observed calls per processed item"""
+        with self.lock:
+            calls_per_item = self.llm_calls / self.processed if self.processed else 0.0
+            return {
+                "checked": self.checked,
+                "dropped": self.dropped,
+                "drop_rate": self.dropped / self.checked if self.checked else 0.0,
+                "llm_calls_per_item": calls_per_item,
+                "llm_calls_avoided": round(self.dropped * calls_per_item),
+                "buckets": len(self.buckets),
+            }
@@ -0,0 +1,297 @@
+"""
+Offline gazetteer and event-type lexicon for Bengaluru content.
+
+Resolves the common place names and event types locally, so fingerprinting
+and geocoding only go to Gemini / Maps for text that doesn't match. Each
+table compiles into a single case-insensitive regex; aliases cover
+abbreviations and common misspellings, and multi-word names also match
+with the spaces dropped or with punctuation in between (Silkboard,
+M.G. Road, water-logging).
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+CITY_SUFFIX = "Bengaluru, Karnataka"
+
+# Canonical place -> kind, approximate coordinates and aliases. When a text
+# names several places the most specific kind wins, then the first mention.
+# No alias may be an everyday word or a short code used for other things
+# ("kia", "hsr"): a false match skips Maps and pins the item to the wrong place.
+PLACES = {
+    # Landmarks
+    "BIEC": {"kind": "landmark", "lat": 13.0626, "lng": 77.4747,
+             "aliases": ["bangalore international exhibition centre", "bangalore international exhibition center"]},
+    "Bangalore International Centre": {"kind": "landmark", "lat": 12.9580, "lng": 77.6410,
+                                       "aliases": ["bangalore international center"]},
+    "Cubbon Park": {"kind": "landmark", "lat": 12.9763, "lng": 77.5929, "aliases": []},
+    "Lalbagh Botanical Garden": {"kind": "landmark", "lat": 12.9507, "lng": 77.5848,
+                                 "aliases": ["lalbagh", "lal bagh", "lalbagh botanical gardens"]},
+    "Phoenix Marketcity": {"kind": "landmark", "lat": 12.9975, "lng": 77.6966,
+                           "aliases": ["phoenix market city", "phoenix mall"]},
+    "Palace Grounds": {"kind": "landmark", "lat": 12.9980, "lng": 77.5920, "aliases": []},
+    "Vidhana Soudha": {"kind": "landmark", "lat": 12.9796, "lng": 77.5906, "aliases": ["vidhan soudha", "vidhana sowdha"]},
+    "Kanteerava Stadium": {"kind": "landmark", "lat": 12.9698, "lng": 77.5932,
+                           "aliases": ["sree kanteerava stadium", "kanteerava indoor stadium"]},
+    "Chinnaswamy Stadium": {"kind": "landmark", "lat": 12.9788, "lng": 77.5996,
+                            "aliases": ["m chinnaswamy stadium", "chinnaswamy"]},
+    "UB City": {"kind": "landmark", "lat": 12.9716, "lng": 77.5960, "aliases": []},
+    "Orion Mall": {"kind": "landmark", "lat": 13.0111, "lng": 77.5550, "aliases": ["pvr orion mall"]},
+    "Forum Mall": {"kind": "landmark", "lat": 12.9345, "lng": 77.6112, "aliases": ["nexus koramangala"]},
+    "KTPO Convention Centre": {"kind": "landmark", "lat": 12.9860, "lng": 77.7300,
+                               "aliases": ["ktpo", "ktpo convention center"]},
+    "IISc": {"kind": "landmark", "lat": 13.0219, "lng": 77.5671, "aliases": ["indian institute of science"]},
+    "KR Market": {"kind": "landmark", "lat": 12.9650, "lng": 77.5770, "aliases": ["k r market", "krishna rajendra market", "city market"]},
+    "Kempegowda International Airport": {"kind": "landmark", "lat": 13.1986, "lng": 77.7066,
+                                         "aliases": ["kempegowda airport", "bengaluru airport", "bangalore airport", "bangalore international airport",
+                                                     "bial"]},
+    "Manyata Tech Park": {"kind": "landmark", "lat": 13.0475, "lng": 77.6210,
+                          "aliases": ["manyata tech park", "manyata embassy business park", "manyata"]},
+    "Ranga Shankara": {"kind": "landmark", "lat": 12.9100, "lng": 77.5880, "aliases": []},
+    "Chowdiah Memorial Hall": {"kind": "landmark", "lat": 13.0050, "lng": 77.5700, "aliases": ["chowdaiah memorial hall"]},
+    "Jayamahal Palace": {"kind": "landmark", "lat": 13.0000, "lng": 77.6000, "aliases": ["jayamahal palace hotel"]},
+    "Taj West End": {"kind": "landmark", "lat": 12.9850, "lng": 77.5850, "aliases": []},
+    "The Leela Palace": {"kind": "landmark", "lat": 12.9605, "lng": 77.6480, "aliases": ["leela palace"]},
+    "Brigade Gateway": {"kind": "landmark", "lat": 13.0120, "lng": 77.5550, "aliases": []},
+    "World Trade Center": {"kind": "landmark", "lat": 13.0122, "lng": 77.5551, "aliases": ["wtc bangalore"]},
+    "Bangalore Palace": {"kind": "landmark", "lat": 12.9987, "lng": 77.5921, "aliases": ["bengaluru palace"]},
+    "The Lalit Ashok": {"kind": "landmark", "lat": 12.9925, "lng": 77.5850, "aliases": ["lalit ashok"]},
+    "Visvesvaraya Museum": {"kind": "landmark", "lat": 12.9752, "lng": 77.5963,
+                            "aliases": ["visvesvaraya industrial and technological museum", "vitm"]},
+    "Karnataka Chitrakala Parishath": {"kind": "landmark", "lat": 12.9910, "lng": 77.5800, "aliases": ["chitrakala parishath"]},
+    "Sankey Tank": {"kind": "landmark", "lat": 13.0093, "lng": 77.5747, "aliases": []},
+    "Turahalli Forest": {"kind": "landmark", "lat": 12.8820, "lng": 77.5200, "aliases": []},
+    "Nandi Hills": {"kind": "landmark", "lat": 13.3702, "lng": 77.6835, "aliases": []},
+    # Junctions and flyovers
+    "Silk Board Junction": {"kind": "junction", "lat": 12.9172, "lng": 77.6228,
+                            "aliases": ["silk board", "central silk board", "silk board flyover", "silkboard junction"]},
+    "Hebbal Flyover": {"kind": "junction", "lat": 13.0430, "lng": 77.5920, "aliases": ["hebbal junction"]},
+    "Tin Factory": {"kind": "junction", "lat": 12.9966, "lng": 77.6684, "aliases": ["tin factory junction"]},
+    "Sony World Signal": {"kind": "junction", "lat": 12.9366, "lng": 77.6264, "aliases": ["sony world junction", "sony signal"]},
+    "Marathahalli Bridge": {"kind": "junction", "lat": 12.9560, "lng": 77.7010, "aliases": ["marathahalli flyover"]},
+    "KR Puram Bridge": {"kind": "junction", "lat": 13.0035, "lng": 77.6800, "aliases": ["kr puram hanging bridge", "kr puram cable bridge"]},
+    # Areas
+    "Koramangala": {"kind": "area", "lat": 12.9352, "lng": 77.6245, "aliases": ["kormangala", "koramangla", "koramongala"]},
+    "Whitefield": {"kind": "area", "lat": 12.9698, "lng": 77.7500, "aliases": ["whitefeild"]},
+    "HSR Layout": {"kind": "area", "lat": 12.9116, "lng": 77.6389, "aliases": []},
+    "Electronic City": {"kind": "area", "lat": 12.8452, "lng": 77.6602,
+                        "aliases": ["electronics city", "e city", "ecity", "electronic city phase 1", "electronic city phase 2"]},
+    "Bellandur": {"kind": "area", "lat": 12.9304, "lng": 77.6784, "aliases": ["bellanduru", "belandur"]},
+    "Hebbal": {"kind": "area", "lat": 13.0358, "lng": 77.5970, "aliases": []},
+    "Marathahalli": {"kind": "area", "lat": 12.9569, "lng": 77.7011, "aliases": ["marathalli", "maratahalli", "marthahalli"]},
+    "Indiranagar": {"kind": "area", "lat": 12.9784, "lng": 77.6408, "aliases": ["indranagar", "indiranagara"]},
+    "Mahadevapura": {"kind": "area", "lat": 12.9916, "lng": 77.6954, "aliases": ["mahadevpura", "mahadevapur"]},
+    "Jayanagar": {"kind": "area", "lat": 12.9308, "lng": 77.5838, "aliases": ["jaya nagar"]},
+    "Majestic": {"kind": "area", "lat": 12.9767, "lng": 77.5713,
+                 "aliases": ["kempegowda bus station", "kbs", "gandhinagar"]},
+    "Yelahanka": {"kind": "area", "lat": 13.1005, "lng": 77.5963, "aliases": ["yelahanka new town"]},
+    "Rajajinagar": {"kind": "area", "lat": 12.9911, "lng": 77.5540, "aliases": ["rajaji nagar"]},
+    "Sadashivanagar": {"kind": "area", "lat": 13.0068, "lng": 77.5813, "aliases": ["sadashiva nagar"]},
+    "Malleswaram": {"kind": "area", "lat": 13.0035, "lng": 77.5709, "aliases": ["malleshwaram", "malleshwara", "malleswara"]},
+    "JP Nagar": {"kind": "area", "lat": 12.9063, "lng": 77.5857, "aliases": ["j p nagar", "jayaprakash nagar", "jp nagara"]},
+    "BTM Layout": {"kind": "area", "lat": 12.9166, "lng": 77.6101, "aliases": ["btm"]},
+    "Basavanagudi": {"kind": "area", "lat": 12.9421, "lng": 77.5754, "aliases": ["basavangudi"]},
+    "Richmond Town": {"kind": "area", "lat": 12.9629, "lng": 77.6000, "aliases": []},
+    "Cooke Town": {"kind": "area", "lat": 12.9970, "lng": 77.6272, "aliases": ["cox town"]},
+    "Frazer Town": {"kind": "area", "lat": 12.9982, "lng": 77.6150, "aliases": ["fraser town", "pulikeshi nagar"]},
+    "Domlur": {"kind": "area", "lat": 12.9609, "lng": 77.6387, "aliases": []},
+    "RT Nagar": {"kind": "area", "lat": 13.0213, "lng": 77.5946, "aliases": ["r t nagar", "rt nagara"]},
+    "Vasanth Nagar": {"kind": "area", "lat": 12.9897, "lng": 77.5925, "aliases": ["vasanthnagar", "vasant nagar"]},
+    "Shanti Nagar": {"kind": "area", "lat": 12.9569, "lng": 77.5990, "aliases": ["shanthi nagar"]},
+    "Ashok Nagar": {"kind": "area", "lat": 12.9700, "lng": 77.6060, "aliases": []},
+    "KR Puram": {"kind": "area", "lat": 13.0076, "lng": 77.6950, "aliases": ["k r puram", "krishnarajapuram", "krishnarajapura"]},
+    "Yeshwanthpur": {"kind": "area", "lat": 13.0280, "lng": 77.5400, "aliases": ["yeshwantpur", "yeshvantpur", "yesvantpur"]},
+    "Banashankari": {"kind": "area", "lat": 12.9255, "lng": 77.5468, "aliases": []},
+    "Ulsoor": {"kind": "area", "lat": 12.9817, "lng": 77.6200, "aliases": ["halasuru", "halsoor"]},
+    "Hennur": {"kind": "area", "lat": 13.0359, "lng": 77.6433, "aliases": []},
+    "Nagavara": {"kind": "area", "lat": 13.0450, "lng": 77.6200, "aliases": ["nagawara"]},
+    "Jakkur": {"kind": "area", "lat": 13.0784, "lng": 77.6068, "aliases": []},
+    "Nelamangala": {"kind": "area", "lat": 13.0977, "lng": 77.3935, "aliases": []},
+    "Madavara": {"kind": "area", "lat": 13.0626, "lng": 77.4747, "aliases": []},
+    # Roads
+    "Outer Ring Road": {"kind": "road", "lat": 12.9340, "lng": 77.6870, "aliases": ["orr"]},
+    "MG Road": {"kind": "road", "lat": 12.9756, "lng": 77.6050, "aliases": ["m g road", "mahatma gandhi road"]},
+    "Sarjapur Road": {"kind": "road", "lat": 12.9100, "lng": 77.6850, "aliases": ["sarjapura road", "sarjapur"]},
+    "Bannerghatta Road": {"kind": "road", "lat": 12.8880, "lng": 77.5970, "aliases": ["bannerghatta", "bannerghata road"]},
+    "Old Airport Road": {"kind": "road", "lat": 12.9600, "lng": 77.6480, "aliases": ["huda road"]},
+    "Tumkur Road": {"kind": "road", "lat": 13.0400, "lng": 77.5100, "aliases": ["tumakuru road"]},
+    "Hosur Road": {"kind": "road", "lat": 12.9000, "lng": 77.6300, "aliases": []},
+    "Mysore Road": {"kind": "road", "lat": 12.9500, "lng": 77.5300, "aliases": ["mysuru road"]},
+    "Kanakapura Road": {"kind": "road", "lat": 12.8800, "lng": 77.5600, "aliases": []},
+    "Residency Road": {"kind": "road", "lat": 12.9680, "lng": 77.6050, "aliases": []},
+    "Kumara Krupa Road": {"kind": "road", "lat": 12.9870, "lng": 77.5850, "aliases": ["kumarakrupa road"]},
+    "Church Street": {"kind": "road", "lat": 12.9750, "lng": 77.6040, "aliases": []},
+    "Brigade Road": {"kind": "road", "lat": 12.9717, "lng": 77.6070, "aliases": []},
+    "Palace Road": {"kind": "road", "lat": 12.9880, "lng": 77.5850, "aliases": []},
+    "Vittal Mallya Road": {"kind": "road", "lat": 12.9716, "lng": 77.5960, "aliases": ["vittal mallya"]},
+    "St. Mark's Road": {"kind": "road", "lat": 12.9740, "lng": 77.6010, "aliases": ["st marks road", "saint marks road"]},
+}
+
+PLACE_KIND_RANK = {"landmark": 0, "junction": 1, "area": 2, "road": 3}
+
+# Canonical event type -> (tier, terms). Incidents (tier 0) win in the
+# order listed here; otherwise the first mention of a tier 1 type wins, and
+# generic weather talk (tier 2) is the last resort. Terms that are common
+# words in other senses ("jam", "strike", "play", "fair") only appear in
+# phrases that fix their meaning.
+EVENT_TYPES = {
+    "Fire": (0, ["fire", "fires", "blaze", "caught fire", "fire broke out"]),
+    "Explosion": (0, ["explosion", "blast", "cylinder blast"]),
+    "Accident": (0, ["accident", "accidents", "collision", "collided", "crash", "crashed", "pile up", "overturned",
+                     "hit and run"]),
+    "Flood": (0, ["flood", "floods", "flooded", "flooding", "inundated", "inundation"]),
+    "Waterlogging": (0, ["waterlogging", "waterlogged", "water logging", "water logged"]),
+    "Tree Fall": (0, ["tree fall", "tree fell", "fallen tree", "uprooted", "uprooted tree"]),
+    "Protest": (0, ["protest", "protests", "protesters", "protestors", "dharna", "bandh", "agitation", "on strike",
+                         "transport strike", "bus strike", "auto strike"]),
+    "Road Closure": (0, ["road closure", "road closed", "roads closed", "closed for traffic", "diversion",
+                         "diversions", "diverted"]),
+    "Power Outage": (0, ["power outage", "power cut", "power cuts", "outage", "blackout", "load shedding"]),
+    "Water Shortage": (0, ["water shortage", "water supply disruption", "no water supply", "water cut"]),
+    "Breakdown": (0, ["breakdown", "broke down", "broken down", "vehicle breakdown"]),
+    "Traffic": (1, ["traffic", "traffic jam", "gridlock", "gridlocked", "congestion", "congested", "slow moving",
+                    "bumper to bumper", "snarl", "snarls"]),
+    "Construction": (1, ["construction", "road work", "metro work", "pothole", "potholes", "repair work"]),
+    "Thunderstorm": (1, ["thunderstorm", "thunderstorms", "thunder", "lightning"]),
+    "Rain": (1, ["rain", "rains", "raining", "rainfall", "downpour", "shower", "showers", "drizzle", "drizzling"]),
+    "Fog": (1, ["fog", "foggy", "mist", "misty", "haze", "hazy", "low visibility"]),
+    "Heatwave": (1, ["heatwave", "heat wave", "scorching"]),
+    "Concert": (1, ["concert", "concerts", "gig", "live music", "recital"]),
+    "Festival": (1, ["festival", "fest", "utsav", "mela", "carnival"]),
+    "Exhibition": (1, ["exhibition", "expo", "exhibit", "art show", "gallery"]),
+    "Workshop": (1, ["workshop", "workshops", "masterclass", "bootcamp"]),
+    "Conference": (1, ["conference", "summit", "conclave", "symposium"]),
+    "Meetup": (1, ["meetup", "meetups", "networking", "jam session", "jamming session"]),
+    "Hackathon": (1, ["hackathon"]),
+    "Marathon": (1, ["marathon", "walkathon", "cyclothon", "cycling", "run for"]),
+    "Theatre": (1, ["theatre", "theater", "drama", "stage play", "performances"]),
+    "Comedy Show": (1, ["comedy", "stand up", "standup", "open mic"]),
+    "Screening": (1, ["screening", "film festival", "movie"]),
+    "Sports": (1, ["tournament", "cricket", "football", "league", "championship", "championships", "road race",
+                    "horse race", "horse racing"]),
+    "Wellness": (1, ["yoga", "meditation", "zumba", "tai chi", "fitness", "sound bath"]),
+    "Outdoor Activity": (1, ["trek", "trekking", "hike", "hiking", "photo walk", "heritage walk", "nature walk",
+                             "guided walk", "walking tour", "stargazing"]),
+    "Market": (1, ["flea market", "farmer's market", "bazaar", "food market"]),
+    "Talk": (1, ["talk", "seminar", "lecture", "debate", "book club", "job fair", "book fair", "craft fair",
+                  "trade fair", "tasting"]),
+    "Weather": (2, ["weather", "temperature", "forecast", "humid", "humidity", "sunny", "cloudy", "breezy",
+                    "pleasant", "clear skies"]),
+}
+
+
+def _squash(text: str) -> str:
+    """Lookup key: lowercase alphanumerics only"""
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+_SEPARATOR = None
+
+
+def _trie_regex(node: Dict) -> str:
+    """Regex for a trie node, alternatives share their common prefix"""
+    ends = "" in node
+    branches = []
+    for atom, child in node.items():
+        if atom == "":
+            continue
+        head = r"[\s.\-']*" if atom is _SEPARATOR else re.escape(atom)
+        branches.append(head + _trie_regex(child))
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # Greedy optional tail, so the longest term wins at a position
+    return f"(?:{body})?" if ends else body
+
+
+def _compile(terms: List[str]) -> re.Pattern:
+    """
+    One pattern for every term, built from a prefix trie so the regex engine
+    doesn't retry each alternative from scratch at every position
+    """
+    trie = {}
+    for term in set(terms):
+        tokens = re.findall(r"[a-z0-9]+", term.lower())
+        node = trie
+        for i, token in enumerate(tokens):
+            # Separators between words may be dropped or be spaces/dots/hyphens/apostrophes
+            atoms = ([_SEPARATOR] if i else []) + list(token)
+            for atom in atoms:
+                node = node.setdefault(atom, {})
+        node[""] = {}
+    return re.compile(r"\b" + _trie_regex(trie) + r"\b", re.IGNORECASE)
+
+
+_PLACE_LOOKUP = {}
+for _name, _place in PLACES.items():
+    for _alias in [_name] + _place["aliases"]:
+        _PLACE_LOOKUP[_squash(_alias)] = _name
+_PLACE_PATTERN = _compile([_name for _name in PLACES] + [a for _place in PLACES.values() for a in _place["aliases"]])
+
+_EVENT_LOOKUP = {}
+_EVENT_ORDER = {}
+for _order, (_name, (_tier, _terms)) in enumerate(EVENT_TYPES.items()):
+    _EVENT_ORDER[_name] = _order
+    for _term in _terms:
+        _EVENT_LOOKUP[_squash(_term)] = _name
+_EVENT_PATTERN = _compile([_term for _tier, _terms in EVENT_TYPES.values() for _term in _terms])
+
+
+def find_places(text: str) -> List[Dict[str, Any]]:
+    """
+    Every known place named in the text, in order of mention
+
+    Args:
+        text: Free text
+
+    Returns:
+        List of dicts with name, kind, lat, lng, address and position
+    """
+    places = []
+    for match in _PLACE_PATTERN.finditer(text or ""):
+        name = _PLACE_LOOKUP.get(_squash(match.group(0)))
+        if not name:
+            continue
+        place = PLACES[name]
+        places.append({
+            "name": name,
+            "kind": place["kind"],
+            "lat": place["lat"],
+            "lng": place["lng"],
+            "address": f"{name}, {CITY_SUFFIX}",
+            "position": match.start()
+        })
+    return places
+
+
+def match_location(text: str) -> Optional[Dict[str, Any]]:
+    """The most specific known place in the text, None if there is none"""
+    places = find_places(text)
+    if not places:
+        return None
+    return min(places, key=lambda place: (PLACE_KIND_RANK[place["kind"]], place["position"]))
+
+
+def match_event_type(text: str) -> Optional[str]:
+    """The canonical event type of the text, None if no lexicon term matches"""
+    best = None
+    for match in _EVENT_PATTERN.finditer(text or ""):
+        name = _EVENT_LOOKUP.get(_squash(match.group(0)))
+        if not name:
+            continue
+        tier = EVENT_TYPES[name][0]
+        key = (tier, _EVENT_ORDER[name] if tier == 0 else match.start())
+        if best is None or key < best[0]:
+            best = (key, name)
+    return best[1] if best else None
+
+
+def extract_entities(text: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Local (event_type, location_noun) for fingerprinting
+
+    Either side is None when the text doesn't match, so the caller can
+    escalate just that text to the LLM.
+    """
+    place = match_location(text)
+    return match_event_type(text), place["name"] if place else None
@@ -0,0 +1,245 @@
+"""
+Content-addressed cache for Gemini responses, shared by all agents.
+
+Responses are keyed by model, prompt template name and a hash of the
+normalized prompt (Unicode NFKC, whitespace collapsed), so a Pub/Sub
+redelivery or a re-processed item costs no Gemini call. There are two
+tiers:
+
+  - an in-memory LRU per process, GEMINI_CACHE_MEMORY_ENTRIES entries
+  - a SQLite file at GEMINI_CACHE_PATH, shared by processes on the same
+    disk and kept under GEMINI_CACHE_MAX_BYTES by least-recently-used
+    eviction; an empty path disables it
+
+Both expire entries after GEMINI_CACHE_TTL_SECONDS. Only responses the
+caller managed to parse are stored, so a malformed answer is retried on
+the next call rather than served until it expires; parse should raise
+for anything the caller would not accept, not just for invalid JSON. A
+caller re-querying items a stored response left out passes refresh=True,
+which skips the lookup and replaces the stored response.
+
+Agents go through cached_generate():
+
+    analysis = cached_generate(
+        "gemini-2.5-flash", "content-analysis", prompt,
+        lambda: model.generate_content(prompt).text,
+        parse=json.loads,
+    )
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Optional
+
+GEMINI_CACHE_PATH = os.getenv(
+    "GEMINI_CACHE_PATH", os.path.join(tempfile.gettempdir(), "nagar-pravah-gemini-cache.sqlite")
+)
+GEMINI_CACHE_MEMORY_ENTRIES = int(os.getenv("GEMINI_CACHE_MEMORY_ENTRIES", "2048"))
+GEMINI_CACHE_TTL_SECONDS = float(os.getenv("GEMINI_CACHE_TTL_SECONDS", str(24 * 3600)))
+GEMINI_CACHE_MAX_BYTES = int(os.getenv("GEMINI_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """NFKC-normalize and collapse whitespace, so reformatted text hashes the same"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", prompt)).strip()
+
+
+def cache_key(model: str, template: str, prompt: str) -> str:
+    return hashlib.sha256("\x1f".join((model, template, normalize_prompt(prompt))).encode()).hexdigest()
+
+
+class GeminiCache:
+    """Memory LRU in front of a SQLite file, both with a TTL"""
+
+    def __init__(self, path: Optional[str] = GEMINI_CACHE_PATH, memory_entries: int = GEMINI_CACHE_MEMORY_ENTRIES,
+                 ttl_seconds: float = GEMINI_CACHE_TTL_SECONDS, max_bytes: int = GEMINI_CACHE_MAX_BYTES):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        # key -> (expires_at, text), most recently used last
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self.template_counts = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._conn = None
+        self._disk_size = 0
+
+    def _disk(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite tier on first use; None when disabled or unusable"""
+        if self._conn is not None or not self.path:
+            return self._conn
+        try:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gemini_cache ("
+                "key TEXT PRIMARY KEY, template TEXT, text TEXT, size INTEGER, expires_at REAL, used_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS gemini_cache_used_at ON gemini_cache (used_at)")
+            conn.commit()
+            self._disk_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM gemini_cache").fetchone()[0]
+            self._conn = conn
+        except sqlite3.Error as e:
+            print(f"Gemini cache disk tier disabled ({self.path}): {e}")
+            self.path = None
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.memory.move_to_end(key)
+                    self.counts["memory_hits"] += 1
+                    return entry[1]
+                del self.memory[key]
+
+            conn = self._disk()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT text, expires_at FROM gemini_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                text, expires_at = row
+                if expires_at <= now:
+                    return None
+                conn.execute("UPDATE gemini_cache SET used_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error reading Gemini cache: {e}")
+                return None
+            self.counts["disk_hits"] += 1
+            self._remember(key, expires_at, text)
+            return text
+
+    def put(self, key: str, text: str, template: str = "") -> None:
+        now = time.time()
+        expires_at = now + self.ttl
+        with self.lock:
+            self._remember(key, expires_at, text)
+            self.counts["stores"] += 1
+
+            conn = self._disk()
+            if conn is None:
+                return
+            size = len(text.encode())
+            try:
+                previous = conn.execute("SELECT size FROM gemini_cache WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO gemini_cache (key, template, text, size, expires_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, template, text, size, expires_at, now)
+                )
+                self._disk_size += size - (previous[0] if previous else 0)
+                if self._disk_size > self.max_bytes:
+                    self._evict(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing Gemini cache: {e}")
+
+    def _remember(self, key: str, expires_at: float, text: str) -> None:
+        self.memory[key] = (expires_at, text)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop expired rows, then least recently used ones down to 90% of max_bytes"""
+        evicted = conn.execute("DELETE FROM gemini_cache WHERE expires_at <= ?", (now,)).rowcount
+        self._disk_size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM gemini_cache").fetchone()[0]
+        target = self.max_bytes * 0.9
+        while self._disk_size > target:
+            rows = conn.execute("SELECT key, size FROM gemini_cache ORDER BY used_at LIMIT 100").fetchall()
+            if not rows:
+                break
+            drop = []
+            for key, size in rows:
+                drop.append((key,))
+                self._disk_size -= size
+                if self._disk_size <= target:
+                    break
+            conn.executemany("DELETE FROM gemini_cache WHERE key = ?", drop)
+            evicted += len(drop)
+        self.counts["evictions"] += evicted
+
+    def generate(self, model: str, template: str, prompt: str, call: Callable[[], str],
+                 parse: Optional[Callable[[str], Any]] = None, refresh: bool = False) -> Any:
+        """
+        Cached Gemini call
+
+        Args:
+            model: Model name, part of the key
+            template: Prompt template name, part of the key and of the stats
+            prompt: The rendered prompt
+            call: Makes the Gemini call and returns the response text
+            parse: Optional parser for the text; a text it rejects is not cached
+            refresh: Call Gemini even on a hit and replace the stored text
+
+        Returns:
+            The response text, or parse(text)
+        """
+        key = cache_key(model, template, prompt)
+        text = None if refresh else self.get(key)
+        if text is not None:
+            try:
+                result = parse(text) if parse else text
+                with self.lock:
+                    self.template_counts[template]["hits"] += 1
+                return result
+            except Exception:
+                pass
+
+        with self.lock:
+            self.counts["misses"] += 1
+            self.template_counts[template]["misses"] += 1
+        text = call()
+        result = parse(text) if parse else text
+        self.put(key, text, template)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counts overall and per template"""
+        with self.lock:
+            hits = self.counts["memory_hits"] + self.counts["disk_hits"]
+            lookups = hits + self.counts["misses"]
+            return {
+                **self.counts,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_bytes": self._disk_size,
+                "templates": {template: dict(counts) for template, counts in self.template_counts.items()},
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_gemini_cache() -> GeminiCache:
+    """The process-wide cache"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeminiCache()
+    return _cache
+
+
+def cached_generate(model: str, template: str, prompt: str, call: Callable[[], str],
+                    parse: Optional[Callable[[str], Any]] = None, refresh: bool = False) -> Any:
+    """GeminiCache.generate on the process-wide cache"""
+    return get_gemini_cache().generate(model, template, prompt, call, parse, refresh)
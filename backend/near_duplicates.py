@@ -0,0 +1,182 @@
+"""
+MinHash near-duplicate index over recently processed content.
+
+Retweets and syndicated news repeat a text with small edits ("RT @user:",
+a "via" credit, a link, hashtags, a trimmed sentence). Each text is
+normalized (those decorations dropped, lowercased, alphanumeric tokens),
+cut into word 3-shingles and sketched with NEAR_DUPLICATE_PERMUTATIONS
+MinHash values. LSH over the sketch (bands of NEAR_DUPLICATE_ROWS)
+yields candidates among the texts added in the last
+NEAR_DUPLICATE_WINDOW_HOURS, and each candidate is verified on the exact
+shingle Jaccard.
+
+A match is a near-duplicate only at Jaccard >= NEAR_DUPLICATE_THRESHOLD,
+only if the words the two texts don't share carry no numbers or
+qualifiers, and only if the gazetteer doesn't place them differently:
+"traffic is light" and "traffic is heavy", 22 and 24 degrees, or the same
+sentence about Koramangala and Indiranagar are never the same. Anything
+else is left to the semantic path.
+"""
+
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+try:
+    from gazetteer import match_location
+except ImportError:
+    from backend.gazetteer import match_location
+
+NEAR_DUPLICATE_WINDOW_HOURS = float(os.getenv("NEAR_DUPLICATE_WINDOW_HOURS", "6"))
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.7"))
+NEAR_DUPLICATE_PERMUTATIONS = 64
+NEAR_DUPLICATE_ROWS = 4
+SHINGLE_SIZE = 3
+
+# Retweet prefix, credits, links, mentions and trailing hashtags don't change what a text says
+_DECORATIONS = re.compile(r"^rt\s+@\w+:?|\bvia\s+@\w+|https?://\S+|www\.\S+|@\w+|(?:\s*#\w+)+\s*$")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words whose presence on one side only changes the meaning
+QUALIFIERS = frozenset("""
+    no not never none without cleared clear closed closure open opened reopened resumed suspended cancelled
+    canceled postponed delayed light moderate heavy severe slow fast smooth low high minor major partial full
+    extreme mild normal restored outage shortage waterlogging accident fire flood
+""".split())
+
+# Shingle hashes are already uniform (blake2b), so XOR with a random mask
+# works as a permutation and keeps the min() loop in C
+_rng = random.Random(1729)
+_MASKS = [_rng.getrandbits(64) for _ in range(NEAR_DUPLICATE_PERMUTATIONS)]
+
+
+def tokens(text: str) -> List[str]:
+    return _TOKEN.findall(_DECORATIONS.sub(" ", (text or "").lower()))
+
+
+def shingles(words: List[str]) -> FrozenSet[int]:
+    """64-bit hashes of the word SHINGLE_SIZE-grams (the words themselves for very short texts)"""
+    if len(words) < SHINGLE_SIZE:
+        grams = words
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    return frozenset(int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "big") for gram in grams)
+
+
+def minhash(shingle_hashes: FrozenSet[int]) -> Tuple[int, ...]:
+    return tuple(min(map(mask.__xor__, shingle_hashes)) for mask in _MASKS)
+
+
+def jaccard(a: FrozenSet[int], b: FrozenSet[int]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _place(text: str) -> Optional[str]:
+    place = match_location(text)
+    return place["name"] if place else None
+
+
+def _meaning_changes(words_a: FrozenSet[str], words_b: FrozenSet[str]) -> bool:
+    differing = words_a ^ words_b
+    return any(word in QUALIFIERS or any(char.isdigit() for char in word) for word in differing)
+
+
+class NearDuplicateIndex:
+    """LSH over MinHash sketches of the texts added within a sliding time window"""
+
+    def __init__(self, window_hours: float = NEAR_DUPLICATE_WINDOW_HOURS, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 rows: int = NEAR_DUPLICATE_ROWS):
+        self.window_seconds = window_hours * 3600
+        self.threshold = threshold
+        self.rows = rows
+        self.lock = threading.Lock()
+        # id -> (shingles, words, place, key, band keys)
+        self.entries: Dict[int, tuple] = {}
+        # (band, band values) -> ids
+        self.bands: Dict[tuple, set] = defaultdict(set)
+        # (added_at, id), oldest first
+        self.added: deque = deque()
+        self.next_id = 0
+        self.checked = 0
+        self.matched = 0
+
+    def _band_keys(self, sketch: Tuple[int, ...]) -> List[tuple]:
+        return [(start, sketch[start:start + self.rows]) for start in range(0, len(sketch), self.rows)]
+
+    def _expire(self, now: float) -> None:
+        while self.added and self.added[0][0] < now - self.window_seconds:
+            _, entry_id = self.added.popleft()
+            entry = self.entries.pop(entry_id)
+            for band_key in entry[4]:
+                ids = self.bands[band_key]
+                ids.discard(entry_id)
+                if not ids:
+                    del self.bands[band_key]
+
+    def match(self, text: str, now: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """(key, jaccard) of the closest recent near-duplicate of text, None if there is none"""
+        now = time.time() if now is None else now
+        words = tokens(text)
+        text_shingles = shingles(words)
+        if not text_shingles:
+            return None
+        band_keys = self._band_keys(minhash(text_shingles))
+        word_set = frozenset(words)
+        place = None
+
+        with self.lock:
+            self._expire(now)
+            self.checked += 1
+            candidates = set()
+            for band_key in band_keys:
+                candidates |= self.bands.get(band_key, set())
+
+            best = None
+            for entry_id in candidates:
+                entry_shingles, entry_words, entry_place, key, _ = self.entries[entry_id]
+                similarity = jaccard(text_shingles, entry_shingles)
+                if similarity < self.threshold or _meaning_changes(word_set, entry_words):
+                    continue
+                if entry_place and word_set != entry_words:
+                    # Same wording about another place ("Traffic is Light on the road towards X")
+                    place = place or _place(text)
+                    if place and place != entry_place:
+                        continue
+                if best is None or similarity > best[1]:
+                    best = (key, similarity)
+            if best:
+                self.matched += 1
+            return best
+
+    def add(self, text: str, key: str = "", now: Optional[float] = None) -> None:
+        """Index a processed text; key is returned by match() for its near-duplicates"""
+        now = time.time() if now is None else now
+        words = tokens(text)
+        text_shingles = shingles(words)
+        if not text_shingles:
+            return
+        band_keys = self._band_keys(minhash(text_shingles))
+        place = _place(text)
+
+        with self.lock:
+            self._expire(now)
+            entry_id = self.next_id
+            self.next_id += 1
+            self.entries[entry_id] = (text_shingles, frozenset(words), place, key, band_keys)
+            for band_key in band_keys:
+                self.bands[band_key].add(entry_id)
+            self.added.append((now, entry_id))
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                "checked": self.checked,
+                "matched": self.matched,
+                "match_rate": self.matched / self.checked if self.checked else 0.0,
+                "entries": len(self.entries),
+            }
@@ -5,20 +5,136 @@ Shared across all agents for consistent data processing
 
 import json
 import re
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, Optional, List, TypedDict
 import google.generativeai as genai
 from google.cloud import firestore
 
+try:
+    from gazetteer import extract_entities
+    from gemini_cache import cached_generate
+    from checkpoints import CheckpointManager
+    from fingerprint_index import build_fingerprint
+    from clients import shared_client, get_firestore_client
+except ImportError:
+    # Imported as backend.utils (the observer) rather than copied next to an agent
+    from backend.gazetteer import extract_entities
+    from backend.gemini_cache import cached_generate
+    from backend.checkpoints import CheckpointManager
+    from backend.fingerprint_index import build_fingerprint
+    from backend.clients import shared_client, get_firestore_client
+
+
+class FingerprintEntities(TypedDict):
+    """Structured output row for batched entity extraction"""
+    index: int
+    event_type: str
+    location_noun: str
+
+
+class ContentAnalysis(TypedDict):
+    """Structured output row for batched content analysis"""
+    index: int
+    category: str
+    content_summary: str
+    semantic_severity: int
+    address_string: str
+
+
+# Estimated prompt tokens per analyze_content_with_gemini call, and calls in flight
+ANALYSIS_TOKEN_BUDGET = 8000
+ANALYSIS_MAX_CONCURRENCY = 4
+# JSON wrapper around each item in the prompt ({"index": ..., "text": ...} and indentation)
+ANALYSIS_ITEM_OVERHEAD_TOKENS = 12
+
+def parse_entities(text: str) -> Dict[str, str]:
+    """JSON entities for one text; raises unless both fields are non-empty strings, so bad answers aren't cached"""
+    entities = json.loads(text)
+    if not (
+        isinstance(entities, dict)
+        and all(isinstance(entities.get(key), str) and entities[key].strip() for key in ('event_type', 'location_noun'))
+    ):
+        raise ValueError(f"Malformed entities: {text[:200]}")
+    return entities
+
+
+_JSON_FENCE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+def strip_json_fence(text: str) -> str:
+    """Drop the ```json fence models put around JSON when asked for it in the prompt only"""
+    return _JSON_FENCE.sub("", text)
+
+
+ANALYSIS_PROMPT = """
+        Analyze the following numbered content items and return a JSON array with one analysis per item.
+        For each item, provide:
+        - index: The item's index
+        - category: Primary category (e.g., "Traffic", "Civic Issue", "Weather", "Cultural Event")
+        - content_summary: One-sentence summary of the event
+        - semantic_severity: Severity score from 1-10 based on language nuance
+        - address_string: Most specific location mentioned in the text
+        
+        Content items:
+        {content_items}
+        """
+
 
 class NagarPravahUtils:
     """Core utility functions for the Nagar Pravah platform"""
     
     def __init__(self, gemini_api_key: str):
-        """Initialize with Gemini API key"""
-        genai.configure(api_key=gemini_api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
-        self.db = firestore.Client()
+        """
+        Initialize with Gemini API key
+        
+        Cheap: the Gemini model, Firestore client and checkpoint manager are
+        created on first use and shared by the whole process, see get_utils.
+        """
+        self.gemini_api_key = gemini_api_key
+        self.model_name = 'gemini-2.5-flash'
+    
+    @property
+    def model(self) -> genai.GenerativeModel:
+        return shared_client(('gemini-model', self.gemini_api_key, self.model_name), self._create_model)
+    
+    def _create_model(self) -> genai.GenerativeModel:
+        genai.configure(api_key=self.gemini_api_key)
+        return genai.GenerativeModel(self.model_name)
+    
+    def _generate_json(self, prompt: str, schema) -> str:
+        """
+        Response text for a prompt asking for JSON, using structured output
+        where the installed google-generativeai supports it
+        
+        The pinned 0.3.2 has no response_mime_type/response_schema in
+        GenerationConfig; there the prompt's own instructions are relied on
+        and the text is unfenced for json.loads.
+        """
+        try:
+            config = genai.GenerationConfig(response_mime_type="application/json", response_schema=schema)
+        except (TypeError, AttributeError):
+            return strip_json_fence(self.model.generate_content(prompt).text)
+        return self.model.generate_content(prompt, generation_config=config).text
+    
+    @property
+    def db(self) -> firestore.Client:
+        return get_firestore_client()
+    
+    @property
+    def checkpoints(self) -> CheckpointManager:
+        return shared_client('checkpoints', lambda: CheckpointManager(self.db))
+    
+    def warm_up(self) -> None:
+        """Create the shared clients and open the Firestore channel ahead of the first request"""
+        # The properties create the clients on first access
+        self.model
+        self.checkpoints
+        try:
+            self.db.collection('agent-state').limit(1).get()
+        except Exception as e:
+            print(f"Firestore warm-up failed: {e}")
     
     def calculate_fingerprint(self, scouted_data: Dict[str, Any]) -> str:
         """
@@ -30,45 +146,131 @@ class NagarPravahUtils:
         Returns:
             String fingerprint in format: EVENT_TYPE-LOCATION_NOUN-YYYYMMDD_HH00
         """
-        content = scouted_data.get('content', '')
-        fetched_at = scouted_data.get('fetched_at')
+        # Step 1: Extract entities, locally for known places/event types, else using Gemini
+        event_type, location_noun = self._extract_entities(scouted_data.get('content', ''))
+        
+        # Steps 2-4: Normalize, bucket and concatenate
+        return self._build_fingerprint(event_type, location_noun, scouted_data.get('fetched_at'))
+    
+    def calculate_fingerprints(self, items: List[Dict[str, Any]], batch_size: int = 50) -> List[str]:
+        """
+        Generate fingerprints for many scouted items with one Gemini call per batch
+        
+        Args:
+            items: List of dictionaries containing 'content' and 'fetched_at' fields
+            batch_size: Max items per structured-output call
+            
+        Returns:
+            List of fingerprints in the same order as items. Items whose entities
+            are missing or malformed in the batch response fall back to a single
+            extraction call each.
+        """
+        local = [extract_entities(item.get('content', '')) for item in items]
+        # Only items the gazetteer couldn't fully resolve go to Gemini
+        pending = [i for i, (event_type, location_noun) in enumerate(local) if not (event_type and location_noun)]
+        
+        llm_entities = {}
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            entities = self._extract_entities_batch([items[i].get('content', '') for i in batch])
+            
+            for index, i in enumerate(batch):
+                if index in entities:
+                    llm_entities[i] = entities[index]
+                else:
+                    llm_entities[i] = self._extract_entities_with_gemini(items[i].get('content', ''))
         
-        # Step 1: Extract entities using Gemini
+        fingerprints = []
+        for i, item in enumerate(items):
+            event_type, location_noun = local[i]
+            llm_event_type, llm_location_noun = llm_entities.get(i, (None, None))
+            fingerprints.append(self._build_fingerprint(
+                event_type or llm_event_type, location_noun or llm_location_noun, item.get('fetched_at')
+            ))
+        
+        return fingerprints
+    
+    def _extract_entities(self, content: str) -> tuple:
+        """Extract (event_type, location_noun), escalating to Gemini only for what the gazetteer misses"""
+        event_type, location_noun = extract_entities(content)
+        if event_type and location_noun:
+            return event_type, location_noun
+        llm_event_type, llm_location_noun = self._extract_entities_with_gemini(content)
+        return event_type or llm_event_type, location_noun or llm_location_noun
+    
+    def _extract_entities_with_gemini(self, content: str) -> tuple:
+        """Extract (event_type, location_noun) for one text, UNKNOWN on failure"""
         entity_prompt = """
         From the following text, extract the primary event type (e.g., 'Traffic', 'Fire', 'Protest') 
         and the most specific location noun (e.g., 'Marathahalli Bridge', 'Forum Mall'). 
-        Return as JSON: {"event_type": "...", "location_noun": "..."}
+        Return as JSON: {{"event_type": "...", "location_noun": "..."}}
         
         Text: {content}
         """.format(content=content)
         
         try:
-            response = self.model.generate_content(entity_prompt)
-            entities = json.loads(response.text)
-            event_type = entities.get('event_type', 'UNKNOWN')
-            location_noun = entities.get('location_noun', 'UNKNOWN')
+            entities = cached_generate(
+                self.model_name, 'fingerprint-entities', entity_prompt,
+                lambda: strip_json_fence(self.model.generate_content(entity_prompt).text),
+                parse=parse_entities
+            )
+            event_type = entities['event_type']
+            location_noun = entities['location_noun']
         except Exception as e:
             print(f"Error extracting entities: {e}")
             event_type = 'UNKNOWN'
             location_noun = 'UNKNOWN'
+        return event_type, location_noun
+    
+    def _extract_entities_batch(self, contents: List[str]) -> Dict[int, tuple]:
+        """
+        Extract entities for several texts in one structured-output call
         
-        # Step 2: Normalize text
-        normalized_event_type = event_type.upper().replace(' ', '_')
-        normalized_location_noun = location_noun.upper().replace(' ', '_')
+        Args:
+            contents: List of content strings
+            
+        Returns:
+            Dict of input index -> (event_type, location_noun), only for the
+            items that came back well-formed
+        """
+        batch_prompt = """
+        For each numbered text below, extract the primary event type (e.g., 'Traffic', 'Fire', 'Protest') 
+        and the most specific location noun (e.g., 'Marathahalli Bridge', 'Forum Mall').
+        Return a JSON array with one object per text: {{"index": ..., "event_type": "...", "location_noun": "..."}}.
         
-        # Step 3: Bucket timestamp to hour
-        if isinstance(fetched_at, datetime):
-            timestamp = fetched_at
-        else:
-            timestamp = datetime.now(timezone.utc)
+        Texts:
+        {texts}
+        """.format(texts=json.dumps([{"index": i, "text": text} for i, text in enumerate(contents)], indent=2))
         
-        # Truncate to hour and format
-        hourly_timestamp = timestamp.replace(minute=0, second=0, microsecond=0)
-        formatted_timestamp = hourly_timestamp.strftime('%Y%m%d_%H00')
+        try:
+            rows = cached_generate(
+                self.model_name, 'fingerprint-entities-batch', batch_prompt,
+                lambda: self._generate_json(batch_prompt, list[FingerprintEntities]),
+                parse=json.loads
+            )
+        except Exception as e:
+            print(f"Error extracting entities for batch of {len(contents)}: {e}")
+            return {}
         
-        # Step 4: Concatenate and return
-        fingerprint = f"{normalized_event_type}-{normalized_location_noun}-{formatted_timestamp}"
-        return fingerprint
+        entities = {}
+        for row in rows if isinstance(rows, list) else []:
+            if not isinstance(row, dict):
+                continue
+            index = row.get('index')
+            event_type = row.get('event_type')
+            location_noun = row.get('location_noun')
+            if (
+                isinstance(index, int) and 0 <= index < len(contents) and index not in entities
+                and isinstance(event_type, str) and event_type.strip()
+                and isinstance(location_noun, str) and location_noun.strip()
+            ):
+                entities[index] = (event_type, location_noun)
+        return entities
+    
+    def _build_fingerprint(self, event_type: str, location_noun: str, fetched_at) -> str:
+        """Normalize entities and bucket the timestamp to the hour"""
+        # Steps 2-4: see fingerprint_index.build_fingerprint
+        return build_fingerprint(event_type, location_noun, fetched_at)
     
     def calculate_priority_score(self, data: Dict[str, Any]) -> float:
         """
@@ -80,99 +282,147 @@ class NagarPravahUtils:
         Returns:
             Float between 1.0 and 10.0 representing priority
         """
-        # Define weights
-        semantic_weight = 0.5
-        source_authority_weight = 0.3
-        keyword_weight = 0.2
-        
-        # Get semantic score (1-10 from Gemini)
-        semantic_score = data.get('semantic_severity', 5)
-        
-        # Source authority mapping
-        source_authority_map = {
-            "@blrcitytraffic": 10,
-            "@BangaloreMirror": 8,
-            "user_report": 7,
-            "default": 4
-        }
-        source = data.get('source', 'default')
-        source_score = source_authority_map.get(source, source_authority_map['default'])
-        
-        # Keyword urgency mapping
-        keyword_urgency_map = {
-            "fire": 10,
-            "explosion": 10,
-            "accident": 9,
-            "gridlock": 8,
-            "traffic jam": 7,
-            "road closure": 6,
-            "protest": 8,
-            "flood": 9
-        }
-        
-        content = data.get('content', '').lower()
-        keyword_score = 0
-        for keyword, score in keyword_urgency_map.items():
-            if keyword in content:
-                keyword_score = max(keyword_score, score)
-        
-        # Calculate weighted average
-        priority_score = (
-            (semantic_score * semantic_weight) +
-            (source_score * source_authority_weight) +
-            (keyword_score * keyword_weight)
-        )
-        
-        # Ensure score is between 1.0 and 10.0
-        return max(1.0, min(10.0, priority_score))
+        return PRIORITY_SCORER.score(data)
     
-    def analyze_content_with_gemini(self, content_batch: list) -> list:
+    def analyze_content_with_gemini(self, content_batch: list, token_budget: int = ANALYSIS_TOKEN_BUDGET,
+                                    max_concurrency: int = ANALYSIS_MAX_CONCURRENCY,
+                                    max_retries: int = 1) -> list:
         """
         Batch analyze content using Gemini for category, summary, severity, and location
         
+        The batch is split into sub-batches of at most token_budget estimated
+        prompt tokens, which are sent concurrently. Items missing or malformed
+        in a response are re-queried on their own sub-batches, up to
+        max_retries times, before falling back to a default analysis.
+        
         Args:
             content_batch: List of content strings to analyze
+            token_budget: Max estimated prompt tokens per Gemini call
+            max_concurrency: Max Gemini calls in flight
+            max_retries: Re-query rounds for missing or malformed items
             
         Returns:
-            List of analysis results
+            List of analysis results, one per content string in input order
         """
-        batch_prompt = """
-        Analyze the following content items and return a JSON array with analysis for each item.
-        For each item, provide:
-        - category: Primary category (e.g., "Traffic", "Civic Issue", "Weather", "Cultural Event")
-        - content_summary: One-sentence summary of the event
-        - semantic_severity: Severity score from 1-10 based on language nuance
-        - address_string: Most specific location mentioned in the text
+        results = {}
+        pending = list(range(len(content_batch)))
         
-        Content items:
-        {content_items}
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            sub_batches = self._plan_analysis_batches([content_batch[i] for i in pending], token_budget)
+            sub_batches = [[pending[i] for i in sub_batch] for sub_batch in sub_batches]
+            
+            with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(sub_batches)))) as executor:
+                # A re-query must not be answered by the cached response that left the items out
+                analyses = executor.map(
+                    lambda sub_batch: self._analyze_batch([content_batch[i] for i in sub_batch], refresh=attempt > 0),
+                    sub_batches
+                )
+                for sub_batch, analysis in zip(sub_batches, analyses):
+                    for index, i in enumerate(sub_batch):
+                        if index in analysis:
+                            results[i] = analysis[index]
+            
+            pending = [i for i in pending if i not in results]
+            if pending:
+                print(f"Gemini analysis missing for {len(pending)}/{len(content_batch)} items (attempt {attempt + 1})")
         
-        Return format: [
-            {{
-                "category": "...",
-                "content_summary": "...",
-                "semantic_severity": ...,
-                "address_string": "..."
-            }},
-            ...
+        # Return default analysis for anything still missing
+        return [
+            results.get(i) or {
+                "category": "Unknown",
+                "content_summary": content[:100] + "...",
+                "semantic_severity": 5,
+                "address_string": "Bangalore"
+            }
+            for i, content in enumerate(content_batch)
         ]
-        """.format(content_items=json.dumps(content_batch, indent=2))
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Rough prompt token count, ~4 characters per token"""
+        return len(text) // 4 + 1
+    
+    def _plan_analysis_batches(self, contents: List[str], token_budget: int) -> List[List[int]]:
+        """
+        Split contents into sub-batches of at most token_budget estimated tokens
+        
+        Items are kept in order; an item over the budget on its own gets a
+        sub-batch to itself.
+        
+        Returns:
+            List of sub-batches, each a list of indices into contents
+        """
+        budget = max(1, token_budget - self._estimate_tokens(ANALYSIS_PROMPT))
+        sub_batches = []
+        current, current_tokens = [], 0
+        for i, content in enumerate(contents):
+            # The item's text plus its JSON wrapper in the prompt
+            tokens = self._estimate_tokens(content) + ANALYSIS_ITEM_OVERHEAD_TOKENS
+            if current and current_tokens + tokens > budget:
+                sub_batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            sub_batches.append(current)
+        return sub_batches
+    
+    def _analyze_batch(self, contents: List[str], refresh: bool = False) -> Dict[int, Dict[str, Any]]:
+        """
+        Analyze one sub-batch in a structured-output call
+        
+        Args:
+            contents: List of content strings
+            refresh: Bypass the Gemini cache, for re-queries
+            
+        Returns:
+            Dict of input index -> analysis, only for the items that came
+            back well-formed
+        """
+        batch_prompt = ANALYSIS_PROMPT.format(
+            content_items=json.dumps([{"index": i, "text": text} for i, text in enumerate(contents)], indent=2)
+        )
         
         try:
-            response = self.model.generate_content(batch_prompt)
-            return json.loads(response.text)
+            rows = cached_generate(
+                self.model_name, 'content-analysis', batch_prompt,
+                lambda: self._generate_json(batch_prompt, list[ContentAnalysis]),
+                parse=json.loads,
+                refresh=refresh
+            )
         except Exception as e:
-            print(f"Error analyzing content with Gemini: {e}")
-            # Return default analysis for each item
-            return [
-                {
-                    "category": "Unknown",
-                    "content_summary": content[:100] + "...",
-                    "semantic_severity": 5,
-                    "address_string": "Bangalore"
-                }
-                for content in content_batch
-            ]
+            print(f"Error analyzing content with Gemini for batch of {len(contents)}: {e}")
+            return {}
+        
+        if not isinstance(rows, list):
+            return {}
+        if len(rows) != len(contents):
+            print(f"Gemini returned {len(rows)} analyses for {len(contents)} items")
+        
+        analyses = {}
+        for row in rows:
+            if not isinstance(row, dict):
+                continue
+            index = row.get('index')
+            severity = row.get('semantic_severity')
+            if not (isinstance(index, int) and 0 <= index < len(contents) and index not in analyses):
+                continue
+            if not (isinstance(severity, (int, float)) and not isinstance(severity, bool)):
+                continue
+            if not all(
+                isinstance(row.get(key), str) and row[key].strip()
+                for key in ('category', 'content_summary', 'address_string')
+            ):
+                continue
+            analyses[index] = {
+                "category": row['category'],
+                "content_summary": row['content_summary'],
+                "semantic_severity": max(1, min(10, severity)),
+                "address_string": row['address_string']
+            }
+        return analyses
     
     def get_checkpoint_timestamp(self, agent_name: str) -> Optional[datetime]:
         """
@@ -182,38 +432,34 @@ class NagarPravahUtils:
             agent_name: Name of the agent (e.g., 'analyze-agent')
             
         Returns:
-            Last processed timestamp or None if not found
+            Last processed timestamp (including updates not flushed yet) or None if not found
         """
-        try:
-            doc_ref = self.db.collection('agent-state').document(f'{agent_name}-checkpoint')
-            doc = doc_ref.get()
-            if doc.exists:
-                return doc.to_dict().get('last_processed_timestamp')
-            return None
-        except Exception as e:
-            print(f"Error getting checkpoint: {e}")
-            return None
+        return self.checkpoints.get(agent_name)
     
     def update_checkpoint_timestamp(self, agent_name: str, timestamp: datetime) -> bool:
         """
         Update the checkpoint timestamp for an agent
         
+        The update is buffered and written with others on the next periodic
+        flush; see checkpoints.CheckpointManager.
+        
         Args:
             agent_name: Name of the agent
             timestamp: New timestamp to set
             
         Returns:
-            True if successful, False otherwise
+            True if accepted, False if it would move the checkpoint backwards
         """
-        try:
-            doc_ref = self.db.collection('agent-state').document(f'{agent_name}-checkpoint')
-            doc_ref.set({
-                'last_processed_timestamp': timestamp
-            }, merge=True)
-            return True
-        except Exception as e:
-            print(f"Error updating checkpoint: {e}")
-            return False
+        return self.checkpoints.update(agent_name, timestamp)
+    
+    def flush_checkpoints(self) -> Dict[str, bool]:
+        """Write buffered checkpoints now, e.g. at the end of an invocation"""
+        return self.checkpoints.flush()
+
+
+def get_utils(gemini_api_key: str) -> NagarPravahUtils:
+    """The process-wide NagarPravahUtils for this API key"""
+    return shared_client(('utils', gemini_api_key), lambda: NagarPravahUtils(gemini_api_key))
 
 
 # Configuration constants
@@ -245,4 +491,108 @@ CATEGORY_MAPPING = {
     "culture": "Cultural Event",
     "emergency": "Emergency",
     "infrastructure": "Infrastructure"
-}
\ No newline at end of file
+}
+
+
+class PriorityScorer:
+    """
+    Priority scoring compiled once from the source authority and keyword
+    urgency configs.
+    
+    Keywords match anywhere in the lowercased content, as they always have
+    ("Floods" and "accidents" count). They are kept most urgent first, so
+    an item stops at its first hit; with the configs built once this is
+    faster in CPython than a regex alternation, which tries every keyword
+    at every position.
+    """
+    
+    SEMANTIC_WEIGHT = 0.5
+    SOURCE_AUTHORITY_WEIGHT = 0.3
+    KEYWORD_WEIGHT = 0.2
+    
+    def __init__(self, source_authority: Dict[str, float], keyword_urgency: Dict[str, float]):
+        self.source_authority = dict(source_authority)
+        self.default_source_score = self.source_authority.get('default', 4)
+        # Most urgent first so the first hit is the highest score
+        self.keywords = sorted(
+            ((keyword.lower(), score) for keyword, score in keyword_urgency.items()),
+            key=lambda entry: -entry[1]
+        )
+    
+    def source_score(self, data: Dict[str, Any]) -> float:
+        """Authority of the item's source"""
+        return self.source_authority.get(data.get('source', 'default'), self.default_source_score)
+    
+    def keyword_score(self, content: str) -> float:
+        """Highest urgency among the keywords in the content, 0 without any"""
+        content = (content or '').lower()
+        for keyword, score in self.keywords:
+            if keyword in content:
+                return score
+        return 0
+    
+    def combine(self, semantic_score: float, source_score: float, keyword_score: float) -> float:
+        """Weighted average clamped to 1.0-10.0"""
+        priority_score = (
+            (semantic_score * self.SEMANTIC_WEIGHT) +
+            (source_score * self.SOURCE_AUTHORITY_WEIGHT) +
+            (keyword_score * self.KEYWORD_WEIGHT)
+        )
+        return max(1.0, min(10.0, priority_score))
+    
+    def score(self, data: Dict[str, Any]) -> float:
+        """Priority score for one item, see NagarPravahUtils.calculate_priority_score"""
+        return self.combine(
+            data.get('semantic_severity', 5),
+            self.source_score(data),
+            self.keyword_score(data.get('content'))
+        )
+    
+    def score_batch(self, items: List[Dict[str, Any]]) -> Dict[str, array]:
+        """
+        Score many items at once
+        
+        Args:
+            items: List of dictionaries containing 'semantic_severity', 'source', and 'content'
+            
+        Returns:
+            Dict of 'priority', 'keyword' and 'source' arrays (typecode 'd'),
+            one entry per item in input order
+        """
+        priority_scores = []
+        keyword_scores = []
+        source_scores = []
+        # score() inlined, the method calls cost more than the scoring itself
+        authority = self.source_authority
+        default_source_score = self.default_source_score
+        keywords = self.keywords
+        semantic_weight = self.SEMANTIC_WEIGHT
+        source_authority_weight = self.SOURCE_AUTHORITY_WEIGHT
+        keyword_weight = self.KEYWORD_WEIGHT
+        for item in items:
+            source_score = authority.get(item.get('source', 'default'), default_source_score)
+            content = (item.get('content') or '').lower()
+            keyword_score = 0
+            for keyword, score in keywords:
+                if keyword in content:
+                    keyword_score = score
+                    break
+            priority_score = (
+                (item.get('semantic_severity', 5) * semantic_weight) +
+                (source_score * source_authority_weight) +
+                (keyword_score * keyword_weight)
+            )
+            if priority_score < 1.0:
+                priority_score = 1.0
+            elif priority_score > 10.0:
+                priority_score = 10.0
+            priority_scores.append(priority_score)
+            keyword_scores.append(keyword_score)
+            source_scores.append(source_score)
+        priority_scores = array('d', priority_scores)
+        keyword_scores = array('d', keyword_scores)
+        source_scores = array('d', source_scores)
+        return {'priority': priority_scores, 'keyword': keyword_scores, 'source': source_scores}
+
+
+PRIORITY_SCORER = PriorityScorer(SOURCE_AUTHORITY_CONFIG, KEYWORD_URGENCY_CONFIG)
@@ -0,0 +1,84 @@
+"""
+Exact-duplicate fingerprint filter on the bundled mock datasets.
+
+Replays backend/*_mock_data.json in createdAt order as the analyze agent
+would see it, with a share of items delivered twice (Pub/Sub redeliveries,
+re-processed batches), and reports:
+
+  - drop rate, and how many drops were true repeats (same normalized text)
+  - time per check, for new items and for repeats
+  - Gemini calls avoided, counting the minimum the analyze path makes for
+    an item (one dedup comparison, one analysis, one embedding)
+
+Needs nothing beyond the standard library:
+
+    python benchmarks/fingerprint_filter.py [redelivery_rate]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+from fingerprint_index import FingerprintIndex, content_digest, exact_fingerprint  # noqa: E402
+
+DATASETS = ("traffic_mock_data.json", "weather_mock_data.json", "event_mock_data.json")
+REDELIVERY_RATE = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+MIN_LLM_CALLS_PER_ITEM = 3
+
+
+def load_items(name):
+    with open(os.path.join(BACKEND, name)) as f:
+        text = f.read().strip()
+    # Some mock files are still wrapped in a ```json fence
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.index("["):]
+    return json.loads(text)
+
+
+def main():
+    rng = random.Random(7)
+    items = [item for name in DATASETS for item in load_items(name)]
+    items.sort(key=lambda item: item.get("createdAt", ""))
+
+    stream = []
+    for item in items:
+        stream.append(item)
+        if rng.random() < REDELIVERY_RATE:
+            # Redelivered a little later in the same batch window
+            stream.insert(len(stream) + rng.randint(0, 5), item)
+
+    index = FingerprintIndex()
+    seen_texts = set()
+    dropped = true_repeats = 0
+    elapsed = {True: 0.0, False: 0.0}
+    for item in stream:
+        started = time.perf_counter()
+        fingerprint = exact_fingerprint(item["content"], item.get("createdAt"))
+        repeat = index.seen(fingerprint)
+        if not repeat:
+            index.add(fingerprint, MIN_LLM_CALLS_PER_ITEM)
+        elapsed[repeat] += time.perf_counter() - started
+
+        text_key = (content_digest(item["content"]), fingerprint.rsplit("-", 2)[-2])
+        if repeat:
+            dropped += 1
+            true_repeats += text_key in seen_texts
+        seen_texts.add(text_key)
+
+    stats = index.stats()
+    print(f"{len(items)} items, {len(stream)} deliveries ({REDELIVERY_RATE:.0%} redelivery rate)")
+    print(f"dropped         {dropped} ({stats['drop_rate']:.1%}), {true_repeats} of them identical text in the same hour")
+    print(f"per new item    {elapsed[False] / (len(stream) - dropped) * 1e6:.1f} us (gazetteer + fingerprint + lookup)")
+    if dropped:
+        print(f"per repeat      {elapsed[True] / dropped * 1e6:.1f} us (cached entities + fingerprint + lookup)")
+    print(f"LLM calls avoided >= {stats['llm_calls_avoided']} ({MIN_LLM_CALLS_PER_ITEM} per dropped item)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Gazetteer / event-type lexicon hit rate on the bundled mock datasets.
+
+For every item in backend/*_mock_data.json reports how often the offline
+matcher resolves the location and the event type from the content alone
+(i.e. how many fingerprint and geocode calls skip Gemini / Maps), and how
+often the matched place agrees with the item's own `location` field. The
+aliases were curated while reading these same datasets, so the hit rates
+are an upper bound. A held-out set of sentences that use ambiguous words
+in their everyday sense checks the other direction: none of them may
+resolve to a place or event type they don't mean.
+Needs nothing beyond the standard library:
+
+    python benchmarks/gazetteer_hit_rate.py
+"""
+
+import json
+import os
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+from gazetteer import extract_entities, match_location  # noqa: E402
+
+DATASETS = ("traffic_mock_data.json", "weather_mock_data.json", "event_mock_data.json")
+
+# Held-out text -> (event type, place) it must resolve to, None for no match
+HELD_OUT = {
+    "Kia unveils its new SUV at a dealer launch": (None, None),
+    "Traffic jam on the way home, stuck for an hour": ("Traffic", None),
+    "Lightning strike damages a transformer": ("Thunderstorm", None),
+    "Kids play cricket in the park every Sunday": ("Sports", None),
+    "Took a walk after dinner, the evening was cool": (None, None),
+    "Fair skies expected for the weekend": (None, None),
+    "A race against time to fix the leak": (None, None),
+    "The bic pen ran out of ink": (None, None),
+    "Members argued on the forum all night": (None, None),
+    "Auto drivers on strike near Silk Board": ("Protest", "Silk Board Junction"),
+    "Open jam session at Indiranagar tonight": ("Meetup", "Indiranagar"),
+    "Waterlogging at HSR Layout sector 2": ("Waterlogging", "HSR Layout"),
+}
+
+
+def load_items(name):
+    with open(os.path.join(BACKEND, name)) as f:
+        text = f.read().strip()
+    # Some mock files are still wrapped in a ```json fence
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.index("["):]
+    return json.loads(text)
+
+
+def main():
+    totals = {"items": 0, "location": 0, "event": 0, "both": 0}
+    for name in DATASETS:
+        items = load_items(name)
+        location_hits = event_hits = both_hits = agree = labelled = 0
+        misses = []
+
+        started = time.perf_counter()
+        for item in items:
+            event_type, location_noun = extract_entities(item.get("content", ""))
+            location_hits += bool(location_noun)
+            event_hits += bool(event_type)
+            both_hits += bool(location_noun and event_type)
+            if not location_noun:
+                misses.append(item.get("location"))
+
+            expected = match_location(item.get("location", ""))
+            if expected:
+                labelled += 1
+                # The content may name a more specific place inside the labelled area
+                agree += location_noun == expected["name"] or bool(
+                    location_noun and expected["name"] in item.get("content", "")
+                )
+        elapsed = time.perf_counter() - started
+
+        count = len(items)
+        print(f"{name}: {count} items in {elapsed * 1000:.1f} ms")
+        print(f"  location hit rate   {location_hits / count:6.1%}")
+        print(f"  event type hit rate {event_hits / count:6.1%}")
+        print(f"  fingerprint local   {both_hits / count:6.1%}  (no LLM call)")
+        if labelled:
+            print(f"  agrees with label   {agree / labelled:6.1%}  ({labelled} labels in the gazetteer)")
+        if misses:
+            print(f"  sample misses: {sorted(set(misses))[:5]}")
+
+        totals["items"] += count
+        totals["location"] += location_hits
+        totals["event"] += event_hits
+        totals["both"] += both_hits
+
+    count = totals["items"]
+    print(f"overall: {count} items, location {totals['location'] / count:.1%}, "
+          f"event type {totals['event'] / count:.1%}, fully local {totals['both'] / count:.1%}")
+
+    wrong = {text: found for text, expected in HELD_OUT.items()
+             if (found := extract_entities(text)) != expected}
+    print(f"held out: {len(HELD_OUT) - len(wrong)}/{len(HELD_OUT)} resolved as meant")
+    for text, found in wrong.items():
+        print(f"  {text!r}: got {found}, expected {HELD_OUT[text]}")
+    assert not wrong, "ambiguous gazetteer terms matched"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Precision / recall of the MinHash near-duplicate prefilter on a labelled
+sample built from the bundled mock datasets.
+
+Every mock item is added to a NearDuplicateIndex in createdAt order, after
+being checked against the items before it. Then, for every item, labelled
+variants are checked:
+
+  positive (should be "same"): retweet prefix, "via @handle" credit, a
+      link, hashtags, case/punctuation changes, an "Update:" lead-in,
+      the last sentence trimmed off a long text
+  negative (must not be "same"): a qualifier swapped (light -> heavy,
+      closed -> open, ...) or a number changed
+
+A prediction is a true positive when the matched item is the variant's
+source, or has the same normalized text. The mock items themselves are
+negatives unless an earlier item has the same normalized text.
+Needs nothing beyond the standard library:
+
+    python benchmarks/near_duplicates.py
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import time
+
+BACKEND = os.path.join(os.path.dirname(__file__), "..", "backend")
+sys.path.insert(0, BACKEND)
+
+from near_duplicates import NearDuplicateIndex, tokens  # noqa: E402
+
+DATASETS = ("traffic_mock_data.json", "weather_mock_data.json", "event_mock_data.json")
+SWAPS = {"light": "heavy", "heavy": "light", "moderate": "heavy", "closed": "open", "open": "closed",
+         "slow": "smooth", "smooth": "slow", "high": "low", "low": "high", "severe": "mild"}
+
+
+def load_items(name):
+    with open(os.path.join(BACKEND, name)) as f:
+        text = f.read().strip()
+    # Some mock files are still wrapped in a ```json fence
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.index("["):]
+    return json.loads(text)
+
+
+def positives(text, rng):
+    yield f"RT @{rng.choice(['blrcitytraffic', 'BangaloreMirror', 'someone'])}: {text}"
+    yield f"{text} via @BlrCityTraffic"
+    yield f"{text} https://t.co/{rng.randrange(16 ** 8):08x}"
+    yield f"{text} #Bengaluru #{rng.choice(['traffic', 'weather', 'events'])}"
+    yield re.sub(r"[.,!']", "", text).upper()
+    yield f"Update: {text}"
+    sentences = re.split(r"(?<=[.!?])\s+", text)
+    if len(sentences) >= 4:
+        yield " ".join(sentences[:-1])
+
+
+def negatives(text):
+    words = text.split()
+    for i, word in enumerate(words):
+        swap = SWAPS.get(word.lower())
+        if swap:
+            yield " ".join(words[:i] + [swap] + words[i + 1:])
+            break
+    number = re.search(r"\d+", text)
+    if number:
+        yield text[:number.start()] + str(int(number.group()) + 3) + text[number.end():]
+
+
+def main():
+    rng = random.Random(7)
+    items = [item for name in DATASETS for item in load_items(name)]
+    items.sort(key=lambda item: item.get("createdAt", ""))
+    normalized = [tuple(tokens(item["content"])) for item in items]
+
+    index = NearDuplicateIndex()
+    counts = {"tp": 0, "fp": 0, "fn": 0, "tn": 0}
+    elapsed, queries = 0.0, 0
+
+    def judge(text, expected_source):
+        nonlocal elapsed, queries
+        started = time.perf_counter()
+        match = index.match(text, now=0)
+        elapsed += time.perf_counter() - started
+        queries += 1
+        query_tokens = tuple(tokens(text))
+        if match:
+            source = int(match[0])
+            correct = source == expected_source or normalized[source] == query_tokens
+            counts["tp" if correct else "fp"] += 1
+        else:
+            has_duplicate = expected_source is not None or query_tokens in seen
+            counts["fn" if has_duplicate else "tn"] += 1
+
+    seen = set()
+    for i, item in enumerate(items):
+        judge(item["content"], None)
+        index.add(item["content"], key=str(i), now=0)
+        seen.add(normalized[i])
+
+    for i, item in enumerate(items):
+        for text in positives(item["content"], rng):
+            judge(text, i)
+        for text in negatives(item["content"]):
+            judge(text, None)
+
+    tp, fp, fn, tn = counts["tp"], counts["fp"], counts["fn"], counts["tn"]
+    print(f"{len(items)} mock items, {queries} labelled queries")
+    print(f"tp {tp}  fp {fp}  fn {fn}  tn {tn}")
+    print(f"precision {tp / (tp + fp):.1%}  recall {tp / (tp + fn):.1%}")
+    print(f"labelled same locally: {(tp + fp) / queries:.1%} of queries skip the semantic path")
+    print(f"{elapsed / queries * 1e6:.0f} us per check")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Micro-benchmark: /callback latency while the observer scans stage 1.
+
+Seeds 100 scouted_data docs, runs send_stage1 over them and keeps firing
+stage 1 callbacks at the observer app for the whole scan, then reports
+callback latency percentiles. Run it against the local emulators so no
+real data is touched:
+
+    gcloud beta emulators firestore start --host-port=localhost:8081
+    gcloud beta emulators pubsub start --host-port=localhost:8085
+    FIRESTORE_EMULATOR_HOST=localhost:8081 PUBSUB_EMULATOR_HOST=localhost:8085 \
+        GOOGLE_CLOUD_PROJECT=nagar-pravah-v1 python benchmarks/observer_callback_latency.py
+
+Needs httpx in addition to the observer's own dependencies.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+if not os.getenv("FIRESTORE_EMULATOR_HOST") or not os.getenv("PUBSUB_EMULATOR_HOST"):
+    sys.exit("Set FIRESTORE_EMULATOR_HOST and PUBSUB_EMULATOR_HOST, this benchmark writes test data")
+
+# Only the handlers are exercised, not the background loop, on the single unsharded shard
+os.environ["OBSERVER_RUN_ORCHESTRATOR"] = "false"
+os.environ["OBSERVER_SHARD_BY"] = "none"
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import observer  # noqa: E402
+
+SCAN_DOCS = 100
+CALLBACK_INTERVAL_SECONDS = 0.002
+
+
+def ensure_topics():
+    for topic in (observer.TOPIC1, observer.TOPIC2):
+        try:
+            observer.publisher.create_topic(name=topic)
+        except Exception:
+            pass  # already exists
+
+
+async def seed_scouted_data():
+    coll_ref = observer.db.collection("scouted_data")
+    start = datetime.now(timezone.utc)
+    batch = observer.db.batch()
+    for i in range(SCAN_DOCS):
+        batch.set(coll_ref.document(f"bench-{i:03d}"), {
+            "content": f"Benchmark traffic update {i} near Silk Board",
+            "source": "traffic",
+            "createdAt": start + timedelta(milliseconds=i)
+        })
+    await batch.commit()
+    # Rewind the cursor so the scan covers the seeded docs
+    await observer.db.collection("job_state_tracking").document("stage1_cursor").delete()
+
+
+async def fire_callbacks(client, job_id, scan_done, latencies):
+    i = 0
+    while not scan_done.is_set():
+        # Acks are only accepted for messages the ledger saw dispatched
+        correlation_id = f"{job_id}-{i}"
+        await observer.ledger.add_dispatched(job_id, "stage1", {correlation_id: []})
+        started = time.perf_counter()
+        response = await client.post("/callback", json={
+            "job_id": job_id,
+            "correlation_id": correlation_id,
+            "source": "stage1"
+        })
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - started)
+        i += 1
+        await asyncio.sleep(CALLBACK_INTERVAL_SECONDS)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def main():
+    ensure_topics()
+    await seed_scouted_data()
+
+    # Callbacks go to a job that never completes so every call does the
+    # full ack path without triggering stage 2
+    ack_job = "bench-ack-job"
+    await observer.ledger.create_job(ack_job)
+    scan_job = "bench-scan-job"
+
+    scan_done = asyncio.Event()
+    latencies = []
+    transport = httpx.ASGITransport(app=observer.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://observer") as client:
+        caller = asyncio.create_task(fire_callbacks(client, ack_job, scan_done, latencies))
+        scan_started = time.perf_counter()
+        await observer.send_stage1(scan_job, observer.SHARDS["default"])
+        scan_seconds = time.perf_counter() - scan_started
+        scan_done.set()
+        await caller
+
+    await observer.ledger.delete_job(ack_job)
+    await observer.ledger.delete_job(scan_job)
+
+    ms = [latency * 1000 for latency in latencies]
+    print(f"Stage 1 scan of {SCAN_DOCS} docs: {scan_seconds:.2f}s")
+    print(f"Callbacks during scan: {len(ms)}")
+    print(f"Callback latency p50={statistics.median(ms):.1f}ms "
+          f"p95={percentile(ms, 95):.1f}ms p99={percentile(ms, 99):.1f}ms max={max(ms):.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+"""
+Check and benchmark: conditional GET for the scout's RSS feeds.
+
+A local HTTP stand-in serves a feed that changes every CHANGE_EVERY
+polls and, like real feed servers, answers 304 Not Modified when the
+request's If-None-Match / If-Modified-Since still match. The scout polls
+it POLLS times:
+
+  - without validators (every poll downloads and parses the whole feed)
+  - with validators, as fetch_rss_feed now does
+  - after a restart: the in-process state is dropped, and the validators
+    persisted for the feed still make the first poll a 304
+
+and checks that a 304 is never parsed and that only changed feeds are.
+Persisted state goes to a small in-memory stand-in for the
+scout-source-state collection, so no Firestore or network is needed;
+needs the scout agent's own dependencies:
+
+    python benchmarks/rss_conditional_get.py [polls] [change_every]
+"""
+
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [os.path.join(ROOT, "backend", "agents", "scout-agent"), os.path.join(ROOT, "backend")]
+
+import main as scout  # noqa: E402
+
+POLLS = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+CHANGE_EVERY = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+ITEMS_PER_FEED = 50
+
+ITEM = """<item><title>Update {n}: slow traffic on Outer Ring Road</title><link>http://local/{version}/{n}</link>
+<guid>http://local/{version}/{n}</guid><description>{padding}</description><pubDate>{published}</pubDate></item>"""
+
+
+class Feed:
+    """The feed's current body and validators; a new version every CHANGE_EVERY polls"""
+
+    def __init__(self):
+        self.polls = 0
+        self.version = -1
+        self.lock = threading.Lock()
+
+    def current(self):
+        with self.lock:
+            self.polls += 1
+            if (self.polls - 1) % CHANGE_EVERY == 0:
+                self.version += 1
+                self.modified = formatdate(time.time() + self.version, usegmt=True)
+                items = "".join(ITEM.format(n=n, version=self.version, padding="Diverted via Bellandur. " * 20,
+                                            published=formatdate(usegmt=True)) for n in range(ITEMS_PER_FEED))
+                self.body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>Bench</title>{items}</channel></rss>'.encode()
+            return self.body, f'"v{self.version}"', self.modified
+
+
+FEED = Feed()
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body, etag, modified = FEED.current()
+        if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == modified):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MemoryCollection:
+    """Just enough of a Firestore collection for get_source_state / commit_source_state"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        docs = self.docs
+
+        class Snapshot:
+            exists = doc_id in docs
+
+            @staticmethod
+            def to_dict():
+                return dict(docs.get(doc_id, {}))
+
+        class Document:
+            @staticmethod
+            def get():
+                return Snapshot()
+
+            @staticmethod
+            def set(fields, merge=False):
+                docs[doc_id] = dict(docs.get(doc_id, {}), **fields) if merge else dict(fields)
+
+        return Document()
+
+
+def make_agent(db, feed_url):
+    agent = scout.ScoutAgent.__new__(scout.ScoutAgent)
+    agent.setup_data_sources()
+    agent.data_sources["rss_feeds"] = [feed_url]
+    agent.twitter_api = None
+    agent.pending_source_state = {}
+    agent.http = scout.create_http_session()
+    agent.db = db
+    return agent
+
+
+def poll(agent, feed_url, polls, conditional=True):
+    """(seconds, parses, items) over polls, committing state after each like run_scout_cycle"""
+    parses = 0
+    parse = scout.feedparser.parse
+
+    def counting_parse(*args, **kwargs):
+        nonlocal parses
+        parses += 1
+        return parse(*args, **kwargs)
+
+    scout.feedparser.parse = counting_parse
+    items = 0
+    started = time.perf_counter()
+    try:
+        for _ in range(polls):
+            if not conditional:
+                scout.source_state.clear()
+                agent.db.docs.clear()
+            items += len(agent.fetch_rss_feed(feed_url))
+            agent.commit_source_state([f"rss:{feed_url}"])
+    finally:
+        scout.feedparser.parse = parse
+    return time.perf_counter() - started, parses, items
+
+
+def report(label, source, seconds, parses, items, before):
+    stats = scout.source_stats[source]
+    print(f"{label:<26} {seconds * 1000:8.1f} ms  {parses:3d} parsed  {stats['not_modified'] - before[0]:3d} not modified  "
+          f"{(stats['bytes'] - before[1]) / 1024:8.1f} KiB  {items:4d} items")
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    feed_url = f"http://127.0.0.1:{server.server_port}/feed"
+    source = f"rss:{feed_url}"
+    changes = -(-POLLS // CHANGE_EVERY)
+    print(f"{POLLS} polls, feed changes every {CHANGE_EVERY} polls ({changes} versions)")
+
+    def counters():
+        stats = scout.source_stats.get(source, {})
+        return stats.get("not_modified", 0), stats.get("bytes", 0)
+
+    db = MemoryCollection()
+    agent = make_agent(db, feed_url)
+    before = counters()
+    seconds, parses, items = poll(agent, feed_url, POLLS, conditional=False)
+    report("unconditional", source, seconds, parses, items, before)
+    assert parses == POLLS
+
+    FEED.polls = 0
+    scout.source_state.clear()
+    db.docs.clear()
+    before = counters()
+    seconds, parses, items = poll(agent, feed_url, POLLS)
+    report("conditional", source, seconds, parses, items, before)
+    assert parses == changes, f"parsed {parses} times for {changes} versions"
+    assert counters()[0] - before[0] == POLLS - changes
+
+    # New instance: nothing in process, validators read back from the stored state
+    scout.source_state.clear()
+    FEED.polls = 1
+    agent = make_agent(db, feed_url)
+    before = counters()
+    seconds, parses, items = poll(agent, feed_url, 1)
+    report("after restart, unchanged", source, seconds, parses, items, before)
+    assert parses == 0 and items == 0
+
+    print("OK: 304s are never parsed, validators survive a restart")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: scout cycle fetch time, sources one after another vs concurrently.
+
+Serves RSS feeds from a local HTTP server, each answering after its own
+delay, and replaces the Twitter accounts with fetchers that sleep for a
+typical API round trip. One feed hangs well past SCOUT_SOURCE_TIMEOUT.
+Reports the wall time of the old sequential fetch (fetch_twitter_data,
+then fetch_rss_data, then user reports) and of fetch_all_sources, along
+with the per-source stats of the concurrent cycle. The concurrent cycle
+should take about as long as the slowest source that answers in time.
+
+No network or Firestore needed, but needs the scout agent's own
+dependencies:
+
+    SCOUT_SOURCE_TIMEOUT=3 python benchmarks/scout_fetch_concurrency.py
+"""
+
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [os.path.join(ROOT, "backend", "agents", "scout-agent"), os.path.join(ROOT, "backend")]
+
+import main as scout  # noqa: E402
+
+# path -> seconds before the feed answers
+FEED_DELAYS = {"/toi": 0.8, "/deccan": 1.5, "/mirror": 0.4, "/hangs": 30}
+# account -> seconds a user_timeline round trip takes
+TWITTER_DELAYS = {"@blrcitytraffic": 0.6, "@BangaloreMirror": 0.9, "@TOIBengaluru": 0.5, "@DeccanHerald": 1.1}
+
+FEED = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Bench</title>
+<item><title>Waterlogging at Silk Board</title><link>http://local{path}/1</link>
+<description>Heavy waterlogging reported near Silk Board junction.</description><pubDate>{now}</pubDate></item>
+</channel></rss>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(FEED_DELAYS.get(self.path, 0))
+        body = FEED.format(path=self.path, now=formatdate(usegmt=True)).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/rss+xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def make_agent(base_url):
+    # No Firestore or Twitter credentials needed: nothing is stored
+    agent = scout.ScoutAgent.__new__(scout.ScoutAgent)
+    agent.setup_data_sources()
+    agent.data_sources["rss_feeds"] = [base_url + path for path in FEED_DELAYS]
+    agent.twitter_api = object()
+    agent.pending_source_state = {}
+    agent.http = scout.create_http_session()
+    agent.get_source_state = lambda source: {}
+
+    def fetch_twitter_account(account):
+        time.sleep(TWITTER_DELAYS[account])
+        return [{"source": "twitter", "source_id": account, "content": f"Update from {account}"}]
+
+    agent.fetch_twitter_account = fetch_twitter_account
+    return agent
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    agent = make_agent(f"http://127.0.0.1:{server.server_port}")
+    timeout = scout.SCOUT_SOURCE_TIMEOUT
+
+    started = time.perf_counter()
+    items = agent.fetch_twitter_data() + agent.fetch_rss_data() + agent.fetch_user_reports()
+    sequential = time.perf_counter() - started
+    print(f"sequential   {sequential:6.2f} s  {len(items)} items")
+
+    started = time.perf_counter()
+    items, cycle_stats = agent.fetch_all_sources()
+    concurrent = time.perf_counter() - started
+    print(f"concurrent   {concurrent:6.2f} s  {len(items)} items  (timeout {timeout:g} s)")
+
+    answered = [stats["seconds"] for stats in cycle_stats.values() if not stats["error"]]
+    print(f"slowest source in time {max(answered):.2f} s, sum of all sources {sum(answered):.2f} s")
+    for source, stats in sorted(cycle_stats.items(), key=lambda item: -item[1]["seconds"]):
+        print(f"  {source:<40} {stats['seconds']:6.2f} s  {stats['items']} items  {stats['error'] or ''}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark: scout agent startup and per-request overhead, cold vs warm.
+
+Drives the scout agent's Flask app with its test client. Twitter and RSS
+fetching are replaced by one synthetic user report per request (so no
+network besides the emulator), which is stored in Firestore as usual.
+Reports:
+
+  - cold start in a fresh interpreter, like a new Cloud Run instance:
+    import time and first-request latency, without and with
+    WARM_UP_CLIENTS=true
+  - warm requests in one process with a per-request agent and clients
+    (everything shared dropped before every request, as every trigger
+    used to build its own) vs the long-lived agent, as trigger-to-stored
+    latency
+  - CONCURRENT_TRIGGERS triggers fired at once at the long-lived agent,
+    and how many scout cycles they actually ran
+
+Run it against the local Firestore emulator so no real data is touched:
+
+    gcloud beta emulators firestore start --host-port=localhost:8081
+    FIRESTORE_EMULATOR_HOST=localhost:8081 GOOGLE_CLOUD_PROJECT=nagar-pravah-v1 GEMINI_API_KEY=dummy \\
+        python benchmarks/scout_request_latency.py
+
+Needs the scout agent's own dependencies.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+SCOUT = os.path.join(ROOT, "backend", "agents", "scout-agent")
+BACKEND = os.path.join(ROOT, "backend")
+REQUESTS = 30
+CONCURRENT_TRIGGERS = 8
+# Fetch time of the synthetic source while measuring concurrent triggers
+CONCURRENT_FETCH_SECONDS = 0.3
+
+
+def load_scout():
+    # The scout agent imports utils and friends flat, as deployed
+    sys.path[:0] = [SCOUT, BACKEND]
+    import main as scout
+
+    def synthetic_report(self):
+        scout.cycles_run += 1
+        time.sleep(scout.fetch_seconds)
+        return [{"source": "user_report", "source_id": f"bench-{time.time_ns()}",
+                 "content": "Benchmark report: heavy traffic near Silk Board", "fetched_at": time.time()}]
+
+    scout.cycles_run = 0
+    scout.fetch_seconds = 0
+    scout.ScoutAgent.source_fetchers = lambda self: {"user_reports": lambda: synthetic_report(self)}
+    return scout
+
+
+def timed_request(client):
+    started = time.perf_counter()
+    response = client.get("/")
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return elapsed
+
+
+def cold_start():
+    """Runs in a fresh interpreter, prints a JSON line"""
+    started = time.perf_counter()
+    scout = load_scout()
+    imported = time.perf_counter() - started
+    client = scout.app.test_client()
+    first = timed_request(client)
+    print(json.dumps({"import": imported, "first_request": first}))
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        sys.exit("Set FIRESTORE_EMULATOR_HOST, this benchmark writes test data")
+
+    for warm_up in ("false", "true"):
+        env = dict(os.environ, WARM_UP_CLIENTS=warm_up)
+        output = subprocess.run([sys.executable, __file__, "--cold"], env=env, capture_output=True, text=True,
+                                check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"cold start, WARM_UP_CLIENTS={warm_up:<5}  import {result['import'] * 1000:7.1f} ms   "
+              f"first request {result['first_request'] * 1000:7.1f} ms")
+
+    scout = load_scout()
+    from clients import init_seconds, reset_clients
+
+    client = scout.app.test_client()
+    timed_request(client)
+
+    per_request = []
+    for _ in range(REQUESTS):
+        reset_clients()
+        per_request.append(timed_request(client))
+    created = dict(init_seconds)
+
+    shared = [timed_request(client) for _ in range(REQUESTS)]
+
+    for label, samples in (("per-request agent", per_request), ("long-lived agent", shared)):
+        p50, p95 = percentiles(samples)
+        print(f"{label:<20} p50 {p50 * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms   "
+              f"mean {statistics.mean(samples) * 1000:7.1f} ms")
+    print("client creation: " + ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in created.items()))
+
+    # Overlapping triggers join the cycle in progress instead of running their own
+    scout.fetch_seconds = CONCURRENT_FETCH_SECONDS
+    scout.cycles_run = 0
+    barrier = threading.Barrier(CONCURRENT_TRIGGERS)
+    latencies = []
+
+    def trigger():
+        trigger_client = scout.app.test_client()
+        barrier.wait()
+        latencies.append(timed_request(trigger_client))
+
+    threads = [threading.Thread(target=trigger) for _ in range(CONCURRENT_TRIGGERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"{CONCURRENT_TRIGGERS} concurrent triggers: {scout.cycles_run} scout cycle(s) run, "
+          f"slowest trigger {max(latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    if "--cold" in sys.argv:
+        cold_start()
+    else:
+        main()
@@ -0,0 +1,502 @@
+"""
+Job ledger backends for the observer.
+
+The ledger holds per-job callback accounting (expected/received messages
+per stage, stage 2 sent/ack) outside the orchestrator process, so several observer
+workers can share it behind a load balancer and in-flight jobs survive a
+restart. Pick a backend with OBSERVER_JOB_LEDGER=memory|sqlite|firestore.
+
+Every message is recorded with the source doc IDs it carries before it is
+published, and acks are kept as a set of correlation IDs per job and
+stage, so a redelivered callback is counted once, an ack for a message
+never dispatched on that stage is rejected, and unacked messages can be
+re-published.
+
+The ledger also holds the orchestrator leader lease: with an unsharded
+observer behind several workers (uvicorn --workers N, or replicas sharing
+a Firestore ledger) only the worker holding it runs the job loop, and the
+rest just serve /callback.
+"""
+
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    from google.api_core.exceptions import AlreadyExists
+    from google.cloud import firestore
+    from google.cloud.firestore_v1.base_query import FieldFilter
+except ImportError:
+    # Only the firestore backend needs them
+    firestore = None
+
+STAGES = ("stage1", "stage2")
+
+
+def _off_loop(method):
+    """Run a blocking ledger method on the ledger's executor"""
+    @functools.wraps(method)
+    async def wrapper(self, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(method, self, *args))
+    return wrapper
+
+
+def _new_job(job_id: str) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "created_at": time.time(),
+        "stage1_expected": None,
+        "stage1_received": 0,
+        "stage2_expected": None,
+        "stage2_received": 0,
+        "stage2_sent": False,
+        "stage2_ack": False
+    }
+
+
+def stage_complete(job: Dict[str, Any], stage: str) -> bool:
+    """True once every message the stage expects has been acked"""
+    return (
+        job[f"{stage}_expected"] is not None
+        and job[f"{stage}_received"] >= job[f"{stage}_expected"]
+    )
+
+
+class InMemoryJobLedger:
+    """Process-local ledger, only valid with a single observer worker"""
+
+    def __init__(self):
+        self.jobs = {}
+        # (job_id, stage) -> {correlation_id: [doc_id, ...]}
+        self.dispatched = {}
+        # (job_id, stage) -> {correlation_id, ...}
+        self.acked = {}
+
+    async def create_job(self, job_id: str) -> Dict[str, Any]:
+        job = _new_job(job_id)
+        self.jobs[job_id] = job
+        for stage in STAGES:
+            self.dispatched[(job_id, stage)] = {}
+            self.acked[(job_id, stage)] = set()
+        return dict(job)
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def set_expected(self, job_id: str, stage: str, expected: int) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        if not job:
+            return None
+        job[f"{stage}_expected"] = expected
+        return dict(job)
+
+    async def add_dispatched(self, job_id: str, stage: str, messages: Dict[str, List[str]]) -> None:
+        """Record published correlation IDs and the doc IDs each one carried"""
+        dispatched = self.dispatched.get((job_id, stage))
+        if dispatched is not None:
+            dispatched.update(messages)
+
+    async def discard_dispatched(self, job_id: str, stage: str, correlation_ids: List[str]) -> None:
+        """Forget messages whose publish failed, so acks for them are rejected"""
+        dispatched = self.dispatched.get((job_id, stage), {})
+        acked = self.acked.get((job_id, stage), set())
+        for cid in correlation_ids:
+            if cid not in acked:
+                dispatched.pop(cid, None)
+
+    async def record_ack(self, job_id: str, stage: str, correlation_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Add correlation_id to the job's ack set for this stage.
+
+        Returns (job, is_new); job is None for unknown jobs and for
+        correlation IDs never dispatched on this stage, and is_new is False
+        for a repeated ack, which leaves the counters untouched.
+        """
+        job = self.jobs.get(job_id)
+        if not job or correlation_id not in self.dispatched[(job_id, stage)]:
+            return None, False
+        acked = self.acked[(job_id, stage)]
+        if correlation_id in acked:
+            return dict(job), False
+        acked.add(correlation_id)
+        job[f"{stage}_received"] += 1
+        return dict(job), True
+
+    async def pending_acks(self, job_id: str, stage: str) -> Dict[str, List[str]]:
+        """Dispatched messages that have not been acked yet"""
+        dispatched = self.dispatched.get((job_id, stage), {})
+        acked = self.acked.get((job_id, stage), set())
+        return {cid: doc_ids for cid, doc_ids in dispatched.items() if cid not in acked}
+
+    async def claim_stage2(self, job_id: str) -> bool:
+        """Atomically flip stage2_sent once stage 1 is fully acked"""
+        job = self.jobs.get(job_id)
+        if not job or job["stage2_sent"] or not stage_complete(job, "stage1"):
+            return False
+        job["stage2_sent"] = True
+        return True
+
+    async def mark_stage2_ack(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        if job:
+            job["stage2_ack"] = True
+
+    async def delete_job(self, job_id: str) -> None:
+        self.jobs.pop(job_id, None)
+        for stage in STAGES:
+            self.dispatched.pop((job_id, stage), None)
+            self.acked.pop((job_id, stage), None)
+
+    async def list_jobs(self, older_than: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Jobs still in the ledger, oldest first"""
+        jobs = sorted(self.jobs.values(), key=lambda job: job["created_at"])
+        if older_than is not None:
+            jobs = [job for job in jobs if job["created_at"] < older_than]
+        return [dict(job) for job in jobs]
+
+    async def acquire_leader(self, owner: str, ttl_seconds: float) -> bool:
+        """Take or renew the leader lease; always ours, nothing else sees this ledger"""
+        return True
+
+    async def release_leader(self, owner: str) -> None:
+        pass
+
+
+class SQLiteJobLedger:
+    """
+    Ledger in a local SQLite file, shared by all workers on one host.
+
+    Queries run on a single worker thread, which keeps them off the event
+    loop and serializes use of the shared connection.
+    """
+
+    COLUMNS = (
+        "job_id", "created_at", "stage1_expected", "stage1_received",
+        "stage2_expected", "stage2_received", "stage2_sent", "stage2_ack"
+    )
+
+    def __init__(self, path: str):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-ledger")
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                created_at REAL NOT NULL,
+                stage1_expected INTEGER,
+                stage1_received INTEGER NOT NULL DEFAULT 0,
+                stage2_expected INTEGER,
+                stage2_received INTEGER NOT NULL DEFAULT 0,
+                stage2_sent INTEGER NOT NULL DEFAULT 0,
+                stage2_ack INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "stage2_expected" not in columns:
+            # Ledgers created before stage 2 was chunked
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN stage2_expected INTEGER")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_messages (
+                job_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                correlation_id TEXT NOT NULL,
+                doc_ids TEXT NOT NULL DEFAULT '[]',
+                acked INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, stage, correlation_id)
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    def _row_to_job(self, row) -> Optional[Dict[str, Any]]:
+        if not row:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job["stage2_sent"] = bool(job["stage2_sent"])
+        job["stage2_ack"] = bool(job["stage2_ack"])
+        return job
+
+    def _select(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._row_to_job(row)
+
+    @_off_loop
+    def create_job(self, job_id: str) -> Dict[str, Any]:
+        job = _new_job(job_id)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, created_at) VALUES (?, ?)",
+            (job_id, job["created_at"])
+        )
+        return job
+
+    @_off_loop
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._select(job_id)
+
+    @_off_loop
+    def set_expected(self, job_id: str, stage: str, expected: int) -> Optional[Dict[str, Any]]:
+        self.conn.execute(f"UPDATE jobs SET {stage}_expected = ? WHERE job_id = ?", (expected, job_id))
+        return self._select(job_id)
+
+    @_off_loop
+    def add_dispatched(self, job_id: str, stage: str, messages: Dict[str, List[str]]) -> None:
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO job_messages (job_id, stage, correlation_id, doc_ids) VALUES (?, ?, ?, ?)",
+            [(job_id, stage, cid, json.dumps(doc_ids)) for cid, doc_ids in messages.items()]
+        )
+
+    @_off_loop
+    def discard_dispatched(self, job_id: str, stage: str, correlation_ids: List[str]) -> None:
+        self.conn.executemany(
+            "DELETE FROM job_messages WHERE job_id = ? AND stage = ? AND correlation_id = ? AND acked = 0",
+            [(job_id, stage, cid) for cid in correlation_ids]
+        )
+
+    @_off_loop
+    def record_ack(self, job_id: str, stage: str, correlation_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        counter = f"{stage}_received"
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not self._select(job_id):
+                self.conn.execute("COMMIT")
+                return None, False
+            key = (job_id, stage, correlation_id)
+            is_new = self.conn.execute(
+                "UPDATE job_messages SET acked = 1 WHERE job_id = ? AND stage = ? AND correlation_id = ? AND acked = 0",
+                key
+            ).rowcount == 1
+            if not is_new and not self.conn.execute(
+                "SELECT 1 FROM job_messages WHERE job_id = ? AND stage = ? AND correlation_id = ?", key
+            ).fetchone():
+                # Never dispatched on this stage
+                self.conn.execute("COMMIT")
+                return None, False
+            if is_new:
+                self.conn.execute(f"UPDATE jobs SET {counter} = {counter} + 1 WHERE job_id = ?", (job_id,))
+            job = self._select(job_id)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return job, is_new
+
+    @_off_loop
+    def pending_acks(self, job_id: str, stage: str) -> Dict[str, List[str]]:
+        rows = self.conn.execute(
+            "SELECT correlation_id, doc_ids FROM job_messages WHERE job_id = ? AND stage = ? AND acked = 0",
+            (job_id, stage)
+        ).fetchall()
+        return {cid: json.loads(doc_ids) for cid, doc_ids in rows}
+
+    @_off_loop
+    def claim_stage2(self, job_id: str) -> bool:
+        cursor = self.conn.execute("""
+            UPDATE jobs SET stage2_sent = 1
+            WHERE job_id = ? AND stage2_sent = 0
+              AND stage1_expected IS NOT NULL AND stage1_received >= stage1_expected
+        """, (job_id,))
+        return cursor.rowcount == 1
+
+    @_off_loop
+    def mark_stage2_ack(self, job_id: str) -> None:
+        self.conn.execute("UPDATE jobs SET stage2_ack = 1 WHERE job_id = ?", (job_id,))
+
+    @_off_loop
+    def delete_job(self, job_id: str) -> None:
+        self.conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        self.conn.execute("DELETE FROM job_messages WHERE job_id = ?", (job_id,))
+
+    @_off_loop
+    def list_jobs(self, older_than: Optional[float] = None) -> List[Dict[str, Any]]:
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM jobs"
+        params = ()
+        if older_than is not None:
+            query += " WHERE created_at < ?"
+            params = (older_than,)
+        rows = self.conn.execute(query + " ORDER BY created_at", params).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    @_off_loop
+    def acquire_leader(self, owner: str, ttl_seconds: float) -> bool:
+        """Take or renew the leader lease, False while another worker holds a live one"""
+        now = time.time()
+        # The upsert only applies when the lease is ours or has expired
+        return self.conn.execute("""
+            INSERT INTO leases (name, owner, expires_at) VALUES ('leader', ?, ?)
+            ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+            WHERE leases.owner = excluded.owner OR leases.expires_at <= ?
+        """, (owner, now + ttl_seconds, now)).rowcount == 1
+
+    @_off_loop
+    def release_leader(self, owner: str) -> None:
+        self.conn.execute("DELETE FROM leases WHERE name = 'leader' AND owner = ?", (owner,))
+
+
+class FirestoreJobLedger:
+    """
+    Ledger in a Firestore collection, shared by observers on any host.
+
+    Dispatched messages live in a `messages` subcollection of the job doc;
+    an ack is a doc in `acks` created with create(), which fails on a
+    repeat, so only the first ack bumps the job counter. Acks without a
+    matching message doc are rejected.
+    """
+
+    def __init__(self, collection: str):
+        if firestore is None:
+            raise RuntimeError("OBSERVER_JOB_LEDGER=firestore needs google-cloud-firestore")
+        self.db = firestore.AsyncClient()
+        self.collection = self.db.collection(collection)
+        self.leader_ref = self.db.collection(f"{collection}_leases").document("leader")
+
+    @staticmethod
+    def _message_id(stage: str, correlation_id: str) -> str:
+        return f"{stage}:{correlation_id}"
+
+    async def create_job(self, job_id: str) -> Dict[str, Any]:
+        job = _new_job(job_id)
+        await self.collection.document(job_id).set(job)
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        doc = await self.collection.document(job_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    async def set_expected(self, job_id: str, stage: str, expected: int) -> Optional[Dict[str, Any]]:
+        await self.collection.document(job_id).update({f"{stage}_expected": expected})
+        return await self.get_job(job_id)
+
+    async def add_dispatched(self, job_id: str, stage: str, messages: Dict[str, List[str]]) -> None:
+        messages_ref = self.collection.document(job_id).collection("messages")
+        items = list(messages.items())
+        # Firestore caps a batch at 500 writes
+        for start in range(0, len(items), 500):
+            batch = self.db.batch()
+            for cid, doc_ids in items[start:start + 500]:
+                batch.set(messages_ref.document(self._message_id(stage, cid)), {
+                    "stage": stage,
+                    "correlation_id": cid,
+                    "doc_ids": doc_ids
+                })
+            await batch.commit()
+
+    async def discard_dispatched(self, job_id: str, stage: str, correlation_ids: List[str]) -> None:
+        messages_ref = self.collection.document(job_id).collection("messages")
+        for start in range(0, len(correlation_ids), 500):
+            batch = self.db.batch()
+            for cid in correlation_ids[start:start + 500]:
+                batch.delete(messages_ref.document(self._message_id(stage, cid)))
+            await batch.commit()
+
+    async def record_ack(self, job_id: str, stage: str, correlation_id: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        job_ref = self.collection.document(job_id)
+        message_id = self._message_id(stage, correlation_id)
+        if not (await job_ref.get()).exists:
+            return None, False
+        if not (await job_ref.collection("messages").document(message_id).get()).exists:
+            return None, False
+        ack_ref = job_ref.collection("acks").document(message_id)
+        # One commit, so a crash can't leave an ack recorded but not counted
+        batch = self.db.batch()
+        batch.create(ack_ref, {"stage": stage, "correlation_id": correlation_id, "acked_at": time.time()})
+        batch.update(job_ref, {f"{stage}_received": firestore.Increment(1)})
+        try:
+            await batch.commit()
+        except AlreadyExists:
+            # A redelivered or retried callback
+            return await self.get_job(job_id), False
+        return await self.get_job(job_id), True
+
+    async def pending_acks(self, job_id: str, stage: str) -> Dict[str, List[str]]:
+        job_ref = self.collection.document(job_id)
+        stage_filter = FieldFilter("stage", "==", stage)
+        acked = {
+            doc.get("correlation_id")
+            async for doc in job_ref.collection("acks").where(filter=stage_filter).stream()
+        }
+        pending = {}
+        async for doc in job_ref.collection("messages").where(filter=stage_filter).stream():
+            message = doc.to_dict()
+            if message["correlation_id"] not in acked:
+                pending[message["correlation_id"]] = message["doc_ids"]
+        return pending
+
+    async def claim_stage2(self, job_id: str) -> bool:
+        doc_ref = self.collection.document(job_id)
+
+        @firestore.async_transactional
+        async def claim(transaction):
+            doc = await doc_ref.get(transaction=transaction)
+            if not doc.exists:
+                return False
+            job = doc.to_dict()
+            if job["stage2_sent"] or not stage_complete(job, "stage1"):
+                return False
+            transaction.update(doc_ref, {"stage2_sent": True})
+            return True
+
+        return await claim(self.db.transaction())
+
+    async def mark_stage2_ack(self, job_id: str) -> None:
+        try:
+            await self.collection.document(job_id).update({"stage2_ack": True})
+        except Exception as e:
+            print(f"Error marking stage 2 ack for {job_id}: {e}")
+
+    async def delete_job(self, job_id: str) -> None:
+        job_ref = self.collection.document(job_id)
+        for name in ("messages", "acks"):
+            async for doc in job_ref.collection(name).stream():
+                await doc.reference.delete()
+        await job_ref.delete()
+
+    async def list_jobs(self, older_than: Optional[float] = None) -> List[Dict[str, Any]]:
+        query = self.collection.order_by("created_at")
+        if older_than is not None:
+            query = query.where(filter=FieldFilter("created_at", "<", older_than))
+        return [doc.to_dict() async for doc in query.stream()]
+
+    async def acquire_leader(self, owner: str, ttl_seconds: float) -> bool:
+        @firestore.async_transactional
+        async def take(transaction):
+            doc = await self.leader_ref.get(transaction=transaction)
+            lease = doc.to_dict() if doc.exists else None
+            now = time.time()
+            if lease and lease["owner"] != owner and lease["expires_at"] > now:
+                return False
+            transaction.set(self.leader_ref, {"owner": owner, "expires_at": now + ttl_seconds})
+            return True
+
+        return await take(self.db.transaction())
+
+    async def release_leader(self, owner: str) -> None:
+        doc = await self.leader_ref.get()
+        if doc.exists and doc.to_dict().get("owner") == owner:
+            await self.leader_ref.delete()
+
+
+def get_job_ledger(backend: Optional[str] = None):
+    """Build the ledger selected by OBSERVER_JOB_LEDGER (default: memory)"""
+    backend = (backend or os.getenv("OBSERVER_JOB_LEDGER", "memory")).lower()
+    if backend == "memory":
+        return InMemoryJobLedger()
+    if backend == "sqlite":
+        return SQLiteJobLedger(os.getenv("OBSERVER_JOB_LEDGER_PATH", "observer_jobs.db"))
+    if backend == "firestore":
+        return FirestoreJobLedger(os.getenv("OBSERVER_JOB_LEDGER_COLLECTION", "observer_jobs"))
+    raise ValueError(f"Unknown job ledger backend: {backend}")
@@ -1,6 +1,20 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from google.cloud import firestore, pubsub_v1
-import json, uuid, asyncio
+from google.cloud.firestore import GeoPoint, DocumentReference
+from google.cloud.firestore_v1.base_query import FieldFilter
+try:
+    from google.cloud.firestore_v1.vector import Vector
+except ImportError:
+    # google-cloud-firestore before 2.16 (the agents pin 2.11.1) has no vector type
+    Vector = None
+from google.oauth2 import service_account
+from datetime import datetime
+from collections import OrderedDict, defaultdict
+import json, uuid, asyncio, os, time, base64, socket
+from job_ledger import get_job_ledger, stage_complete
+from shard_coordinator import ShardCoordinator
+from backend.utils import PRIORITY_SCORER
 
 
 credentials = service_account.Credentials.from_service_account_file(
@@ -10,26 +24,196 @@ credentials = service_account.Credentials.from_service_account_file(
 firestore_client = firestore.Client(project="nagar-pravah-fb", credentials=credentials)
 
 app = FastAPI()
-db = firestore.Client()
-publisher = pubsub_v1.PublisherClient()
+# Async client so cursor reads and scans never block /callback handling
+db = firestore.AsyncClient()
+
+# Pub/Sub batching and flow control. Publishing blocks (in a worker thread)
+# instead of erroring once PUBLISH_FLOW_MAX_* messages/bytes are outstanding.
+PUBLISH_BATCH_MAX_MESSAGES = int(os.getenv("OBSERVER_PUBLISH_BATCH_MAX_MESSAGES", "100"))
+PUBLISH_BATCH_MAX_BYTES = int(os.getenv("OBSERVER_PUBLISH_BATCH_MAX_BYTES", str(1024 * 1024)))
+PUBLISH_BATCH_MAX_LATENCY = float(os.getenv("OBSERVER_PUBLISH_BATCH_MAX_LATENCY", "0.05"))
+PUBLISH_FLOW_MAX_MESSAGES = int(os.getenv("OBSERVER_PUBLISH_FLOW_MAX_MESSAGES", "1000"))
+PUBLISH_FLOW_MAX_BYTES = int(os.getenv("OBSERVER_PUBLISH_FLOW_MAX_BYTES", str(10 * 1024 * 1024)))
+PUBLISH_TIMEOUT_SECONDS = float(os.getenv("OBSERVER_PUBLISH_TIMEOUT_SECONDS", "60"))
+
+publisher = pubsub_v1.PublisherClient(
+    batch_settings=pubsub_v1.types.BatchSettings(
+        max_messages=PUBLISH_BATCH_MAX_MESSAGES,
+        max_bytes=PUBLISH_BATCH_MAX_BYTES,
+        max_latency=PUBLISH_BATCH_MAX_LATENCY,
+    ),
+    publisher_options=pubsub_v1.types.PublisherOptions(
+        flow_control=pubsub_v1.types.PublishFlowControl(
+            message_limit=PUBLISH_FLOW_MAX_MESSAGES,
+            byte_limit=PUBLISH_FLOW_MAX_BYTES,
+            limit_exceeded_behavior=pubsub_v1.types.LimitExceededBehavior.BLOCK,
+        )
+    ),
+)
 
 TOPIC1 = publisher.topic_path("nagar-pravah-v1", "analyzed-topic")
 TOPIC2 = publisher.topic_path("nagar-pravah-v1", "sythesized-topic")
 
-# In-memory state tracker
-job_state = {}
+# Priority lanes. New scouted_data docs scoring at least URGENT_SCORE on the
+# keyword/source urgency configs skip the batch cadence: in poll mode a fast
+# lane scans every URGENT_POLL_SECONDS, in stream mode they bypass the
+# micro-batch window. Urgent messages go to OBSERVER_URGENT_TOPIC (defaults
+# to the stage 1 topic, tagged with "priority": "urgent").
+URGENT_LANE = os.getenv("OBSERVER_URGENT_LANE", "true").lower() == "true"
+URGENT_SCORE = float(os.getenv("OBSERVER_URGENT_SCORE", "8"))
+URGENT_POLL_SECONDS = float(os.getenv("OBSERVER_URGENT_POLL_SECONDS", "5"))
+URGENT_MAX_JOBS_IN_FLIGHT = int(os.getenv("OBSERVER_URGENT_MAX_JOBS_IN_FLIGHT", "2"))
+TOPIC1_URGENT = publisher.topic_path("nagar-pravah-v1", os.getenv("OBSERVER_URGENT_TOPIC", "analyzed-topic"))
+LANE_TOPICS = {"routine": TOPIC1, "urgent": TOPIC1_URGENT}
+
+# Stage 1 reads scouted_data in pages of STAGE1_PAGE_SIZE, each published
+# and awaited as one batch, up to STAGE1_MAX_PER_JOB docs per job
+STAGE1_PAGE_SIZE = int(os.getenv("OBSERVER_STAGE1_PAGE_SIZE", "20"))
+STAGE1_MAX_PER_JOB = int(os.getenv("OBSERVER_STAGE1_MAX_PER_JOB", "100"))
+
+# "poll" scans scouted_data from the stage 1 cursor on an adaptive timer.
+# "stream" catches up from the cursor once, then dispatches new docs from a
+# snapshot listener in micro-batches of up to STREAM_BATCH_SIZE docs or
+# STREAM_BATCH_WINDOW_SECONDS, whichever fills first. A batch whose job
+# fails to start is queued again after STREAM_RETRY_SECONDS. The listener
+# is re-opened from the persisted cursor every STREAM_RESUBSCRIBE_SECONDS,
+# so a watch reset only re-sends docs recent enough to be recognized.
+TRIGGER_MODE = os.getenv("OBSERVER_TRIGGER_MODE", "poll").lower()
+STREAM_BATCH_SIZE = int(os.getenv("OBSERVER_STREAM_BATCH_SIZE", "20"))
+STREAM_BATCH_WINDOW_SECONDS = float(os.getenv("OBSERVER_STREAM_BATCH_WINDOW_SECONDS", "2"))
+STREAM_RETRY_SECONDS = float(os.getenv("OBSERVER_STREAM_RETRY_SECONDS", "5"))
+STREAM_RESUBSCRIBE_SECONDS = float(os.getenv("OBSERVER_STREAM_RESUBSCRIBE_SECONDS", "300"))
+
+# Stage 2 drains up to STAGE2_MAX_PER_JOB analyzed-event docs past its
+# watermark and publishes them as parallel chunks, each acked on its own.
+# The chunk size follows the observed synthesize latency per doc so that a
+# chunk takes about STAGE2_TARGET_LATENCY_SECONDS, within the min/max bounds.
+STAGE2_MAX_PER_JOB = int(os.getenv("OBSERVER_STAGE2_MAX_PER_JOB", "500"))
+STAGE2_CHUNK_MIN = int(os.getenv("OBSERVER_STAGE2_CHUNK_MIN", "5"))
+STAGE2_CHUNK_MAX = int(os.getenv("OBSERVER_STAGE2_CHUNK_MAX", "50"))
+STAGE2_CHUNK_MAX_BYTES = int(os.getenv("OBSERVER_STAGE2_CHUNK_MAX_BYTES", str(512 * 1024)))
+STAGE2_TARGET_LATENCY_SECONDS = float(os.getenv("OBSERVER_STAGE2_TARGET_LATENCY_SECONDS", "60"))
+
+# Max jobs allowed in flight at once. Stage 1 of the next job can start
+# while earlier jobs are still waiting on stage 2.
+MAX_JOBS_IN_FLIGHT = int(os.getenv("OBSERVER_MAX_JOBS_IN_FLIGHT", "3"))
+
+# Idle time between jobs adapts to the scouted_data backlog: none when at
+# least BUSY_BACKLOG docs are waiting, IDLE_MIN when a few are, and doubling
+# up to IDLE_MAX while there is nothing new.
+IDLE_MIN_SECONDS = float(os.getenv("OBSERVER_IDLE_MIN_SECONDS", "5"))
+IDLE_MAX_SECONDS = float(os.getenv("OBSERVER_IDLE_MAX_SECONDS", "120"))
+BUSY_BACKLOG = int(os.getenv("OBSERVER_BUSY_BACKLOG", "50"))
+
+# Messages still unacked this long after a stage started are re-published
+# (hedged) up to MAX_HEDGES times, after which the stage moves on without them
+STAGE1_TIMEOUT_SECONDS = float(os.getenv("OBSERVER_STAGE1_TIMEOUT_SECONDS", "180"))
+STAGE2_TIMEOUT_SECONDS = float(os.getenv("OBSERVER_STAGE2_TIMEOUT_SECONDS", "300"))
+MAX_HEDGES = int(os.getenv("OBSERVER_MAX_HEDGES", "2"))
+# How often a waiting job re-reads the ledger, for acks that landed on
+# another worker
+LEDGER_POLL_SECONDS = float(os.getenv("OBSERVER_LEDGER_POLL_SECONDS", "10"))
+# With several replicas behind a load balancer only one should run the loop,
+# the rest just serve /callback against the shared ledger
+RUN_ORCHESTRATOR = os.getenv("OBSERVER_RUN_ORCHESTRATOR", "true").lower() == "true"
+# Unsharded, every worker that starts the loop contends for the ledger's
+# leader lease and only its holder runs it (uvicorn --workers N on a
+# SQLite ledger, or replicas on a Firestore one)
+LEADER_LEASE_SECONDS = float(os.getenv("OBSERVER_LEADER_LEASE_SECONDS", "30"))
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Sharding. OBSERVER_SHARD_BY=city|source|hash splits scouted_data into
+# shards, each with its own cursor docs and job loop; "none" keeps a single
+# unfiltered scan. city/source shards are the OBSERVER_SHARDS values, hash
+# shards are the scout's `partition` field (0..OBSERVER_SHARD_PARTITIONS-1,
+# keep in step with SCOUT_PARTITIONS). Shards are spread over every replica
+# running the orchestrator (see shard_coordinator.py), which needs a shared
+# ledger (OBSERVER_JOB_LEDGER=firestore).
+SHARD_BY = os.getenv("OBSERVER_SHARD_BY", "none").lower()
+SHARD_VALUES = [value.strip() for value in os.getenv("OBSERVER_SHARDS", "").split(",") if value.strip()]
+SHARD_PARTITIONS = int(os.getenv("OBSERVER_SHARD_PARTITIONS", "16"))
+SHARD_HEARTBEAT_SECONDS = float(os.getenv("OBSERVER_SHARD_HEARTBEAT_SECONDS", "10"))
+SHARD_LEASE_SECONDS = float(os.getenv("OBSERVER_SHARD_LEASE_SECONDS", "30"))
+
+def build_shards():
+    if SHARD_BY == "none":
+        return [{"key": "default", "field": None, "value": None}]
+    if SHARD_BY == "hash":
+        return [{"key": f"partition-{i}", "field": "partition", "value": i} for i in range(SHARD_PARTITIONS)]
+    if SHARD_BY in ("city", "source"):
+        if not SHARD_VALUES:
+            raise ValueError(f"OBSERVER_SHARDS must list the {SHARD_BY} values to shard by")
+        return [{"key": f"{SHARD_BY}-{value}", "field": SHARD_BY, "value": value} for value in SHARD_VALUES]
+    raise ValueError(f"Unknown OBSERVER_SHARD_BY: {SHARD_BY}")
+
+SHARDS = {shard["key"]: shard for shard in build_shards()}
+SHARDED = SHARD_BY != "none"
+# Stage 2 drains the one analyzed-event collection
+UNSHARDED = {"key": "default", "field": None, "value": None}
+
+# Shared job state tracker (memory, sqlite or firestore)
+ledger = get_job_ledger()
+# Local wake-up hints for the jobs this process is orchestrating
+job_done = {}
+job_slots = asyncio.Semaphore(MAX_JOBS_IN_FLIGHT)
+# Urgent jobs get their own slots so they never queue behind routine ones
+lane_slots = {"routine": job_slots, "urgent": asyncio.Semaphore(URGENT_MAX_JOBS_IN_FLIGHT)}
+job_lanes = {}
+job_tasks = set()
+# Shards this replica is running: key -> stop event / task
+shard_stops = {}
+shard_tasks = {}
+# shard key -> task adopting the jobs a dead owner left in flight
+recovery_tasks = {}
+coordinator = ShardCoordinator(db, SHARD_LEASE_SECONDS) if SHARDED else None
+
+# Cursor read -> scan -> advance is serialized per cursor so that concurrent
+# jobs never pick up overlapping docs.
+cursor_locks = defaultdict(asyncio.Lock)
 
 # ---------- CURSOR UTILS ----------
+def shard_cursor(stage, shard):
+    # The unsharded scan keeps its original cursor docs
+    return stage if shard["key"] == "default" else f"{stage}_{shard['key']}"
+
+def scouted_data_query(shard, client=None):
+    query = (client or db).collection("scouted_data")
+    if shard["field"]:
+        query = query.where(filter=FieldFilter(shard["field"], "==", shard["value"]))
+    return query
+
+# A cursor is the (createdAt, document ID) of the last doc a scan got past.
+# Scans order by createdAt then document ID, so docs sharing the boundary
+# timestamp are neither skipped nor sent twice.
 async def get_last_cursor(stage: str):
     doc_ref = db.collection("job_state_tracking").document(f"{stage}_cursor")
-    doc = doc_ref.get()
+    doc = await doc_ref.get()
     if doc.exists:
-        return doc.to_dict().get("last_createdAt")
+        data = doc.to_dict()
+        if data.get("last_createdAt"):
+            return data["last_createdAt"], data.get("last_doc_id")
     return None
 
-async def update_last_cursor(stage: str, last_createdAt):
+async def update_last_cursor(stage: str, last_cursor):
     doc_ref = db.collection("job_state_tracking").document(f"{stage}_cursor")
-    doc_ref.set({"last_createdAt": last_createdAt})
+    await doc_ref.set({"last_createdAt": last_cursor[0], "last_doc_id": last_cursor[1]})
+
+def doc_cursor(doc, data=None):
+    return (data or doc.to_dict()).get("createdAt"), doc.id
+
+def cursor_key(cursor):
+    # Cursors saved before they carried a doc ID sort before their timestamp's docs
+    return cursor[0], cursor[1] or ""
+
+def after_cursor(query, collection, cursor, client=None):
+    """Order query by createdAt then document ID, starting after cursor"""
+    if cursor and not cursor[1]:
+        return query.order_by("createdAt").start_after({"createdAt": cursor[0]})
+    query = query.order_by("createdAt").order_by("__name__")
+    if cursor:
+        doc_ref = (client or db).collection(collection).document(cursor[1])
+        query = query.start_after({"createdAt": cursor[0], "__name__": doc_ref})
+    return query
 
 # ---------- CALLBACK HANDLER ----------
 @app.post("/callback")
@@ -38,111 +222,837 @@ async def callback(data: dict):
     correlation_id = data["correlation_id"]
     source = data["source"]
 
-    state = job_state.get(job_id)
+    if source not in ("stage1", "stage2"):
+        return {"error": "unknown source"}
+
+    # Pub/Sub redeliveries and retried callbacks are only counted once
+    state, is_new = await ledger.record_ack(job_id, source, correlation_id)
     if not state:
-        return {"error": "unknown job"}
+        REJECTED_ACKS.labels(source).inc()
+        print(f"⚠️ Rejected {source} ack {correlation_id}: unknown job or not dispatched on {source}")
+        return {"error": "unknown job or message"}
+    if not is_new:
+        DUPLICATE_ACKS.labels(source).inc()
+        print(f"🔁 Duplicate {source} ack {correlation_id} ignored")
+        return {"status": "duplicate"}
+    observe_ack(source, correlation_id)
 
     if source == "stage1":
-        state["stage1_received"] += 1
         print(f"✅ Stage 1 ack {correlation_id}: {state['stage1_received']}/{state['stage1_expected']}")
 
-        if state["stage1_received"] == state["stage1_expected"] and not state["stage2_sent"]:
-            await send_stage2(job_id)
-            state["stage2_sent"] = True
+        await maybe_send_stage2(job_id)
 
     elif source == "stage2":
-        print(f"✅ Stage 2 ack received for job {job_id}")
-        state["stage2_ack"] = True
+        print(f"✅ Stage 2 ack {correlation_id}: {state['stage2_received']}/{state['stage2_expected']}")
+        if stage_complete(state, "stage2"):
+            await mark_job_done(job_id)
 
     return {"status": "ok"}
 
+async def maybe_send_stage2(job_id):
+    # Only one caller across all workers wins the claim
+    if not await ledger.claim_stage2(job_id):
+        return
+    release_urgent_slot(job_id)
+    try:
+        chunks_sent = await send_stage2(job_id)
+    except Exception as e:
+        # The stage 2 cursor didn't move, the next job picks these docs up
+        print(f"❌ Stage 2 failed for job {job_id}: {e}")
+        chunks_sent = 0
+
+    state = await ledger.set_expected(job_id, "stage2", chunks_sent)
+    # Nothing sent, or every chunk acked before the expected count was set
+    if not chunks_sent or (state and stage_complete(state, "stage2")):
+        await mark_job_done(job_id)
+
+async def mark_job_done(job_id):
+    await ledger.mark_stage2_ack(job_id)
+    done = job_done.get(job_id)
+    if done:
+        done.set()
+
+async def count_backlog(shard):
+    """New scouted_data docs past the shard's stage 1 cursor, capped at BUSY_BACKLOG."""
+    last_cursor = await get_last_cursor(shard_cursor("stage1", shard))
+    query = after_cursor(scouted_data_query(shard), "scouted_data", last_cursor)
+    result = await query.limit(BUSY_BACKLOG).count(alias="backlog").get()
+    return result[0][0].value
+
+# ---------- METRICS ----------
+STAGE_COLLECTIONS = {"stage1": "scouted_data", "stage2": "analyzed-event"}
+# Backlog counts at scrape time stop here to keep /metrics cheap
+METRICS_BACKLOG_CAP = int(os.getenv("OBSERVER_METRICS_BACKLOG_CAP", "10000"))
+
+DISPATCHED = Counter("observer_dispatched_messages_total", "Messages dispatched per stage", ["stage"])
+HEDGED = Counter("observer_hedged_messages_total", "Straggler messages re-published per stage", ["stage"])
+DUPLICATE_ACKS = Counter("observer_duplicate_acks_total", "Repeated callbacks ignored per stage", ["stage"])
+REJECTED_ACKS = Counter("observer_rejected_acks_total", "Callbacks for unknown jobs or messages per stage", ["stage"])
+ACK_LATENCY = Histogram(
+    "observer_ack_latency_seconds", "Time from publish to callback per stage", ["stage"],
+    buckets=(1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+)
+PUBLISHED = Counter("observer_published_messages_total", "Messages published per topic", ["topic"])
+PUBLISHED_BYTES = Counter("observer_published_bytes_total", "Bytes published per topic", ["topic"])
+PUBLISH_ERRORS = Counter("observer_publish_errors_total", "Failed publishes per topic", ["topic"])
+PUBLISH_SECONDS = Histogram("observer_publish_batch_seconds", "Time to publish and confirm one batch", ["topic"])
+JOBS_IN_FLIGHT = Gauge("observer_jobs_in_flight", "Jobs this process is orchestrating")
+JOBS_IN_FLIGHT.set_function(lambda: len(job_done))
+BACKLOG = Gauge(
+    "observer_backlog_docs", f"Docs past the stage cursor (capped at {METRICS_BACKLOG_CAP})", ["collection", "shard"]
+)
+CURSOR_LAG = Gauge("observer_cursor_lag_seconds", "Newest createdAt minus the stage cursor", ["stage", "shard"])
+SHARDS_OWNED = Gauge("observer_shards_owned", "Shards this replica is running")
+SHARDS_OWNED.set_function(lambda: len(shard_stops))
+ALERT_BUCKETS = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+TIME_TO_DISPATCH = Histogram(
+    "observer_time_to_dispatch_seconds", "scouted_data createdAt to stage 1 publish per lane", ["lane"],
+    buckets=ALERT_BUCKETS
+)
+TIME_TO_ALERT = Histogram(
+    "observer_time_to_alert_seconds", "scouted_data createdAt to stage 1 ack (analysis done) per lane", ["lane"],
+    buckets=ALERT_BUCKETS
+)
+
+# correlation_id -> (dispatch time, docs in message, lane, doc createdAt
+# epoch or None), for ack latency. Only acks served by the worker that
+# dispatched the message are timed.
+dispatched_at = {}
+
+def observe_ack(stage, correlation_id):
+    dispatched = dispatched_at.pop(correlation_id, None)
+    if not dispatched:
+        return
+    sent_at, doc_count, lane, created_ts = dispatched
+    now = time.time()
+    latency = now - sent_at
+    ACK_LATENCY.labels(stage).observe(latency)
+    if stage == "stage1" and created_ts:
+        TIME_TO_ALERT.labels(lane).observe(now - created_ts)
+    if stage == "stage2":
+        tune_stage2_chunk_size(latency, doc_count)
+
+async def refresh_backlog_metrics(stage, shard):
+    base = scouted_data_query(shard) if stage == "stage1" else db.collection(STAGE_COLLECTIONS[stage])
+    last_cursor = await get_last_cursor(shard_cursor(stage, shard))
+
+    query = after_cursor(base, STAGE_COLLECTIONS[stage], last_cursor)
+    result = await query.limit(METRICS_BACKLOG_CAP).count(alias="backlog").get()
+    BACKLOG.labels(STAGE_COLLECTIONS[stage], shard["key"]).set(result[0][0].value)
+
+    newest = await base.order_by("createdAt", direction=firestore.Query.DESCENDING).limit(1).get()
+    newest_created = newest[0].to_dict().get("createdAt") if newest else None
+    if newest_created and last_cursor:
+        CURSOR_LAG.labels(stage, shard["key"]).set(max(0.0, (newest_created - last_cursor[0]).total_seconds()))
+    else:
+        CURSOR_LAG.labels(stage, shard["key"]).set(0)
+
+@app.get("/metrics")
+async def metrics():
+    # Stage 1 backlog only for the shards this replica runs
+    results = await asyncio.gather(
+        refresh_backlog_metrics("stage2", UNSHARDED),
+        *(refresh_backlog_metrics("stage1", SHARDS[key]) for key in list(shard_stops)),
+        return_exceptions=True
+    )
+    for error in results:
+        if error:
+            print(f"❌ Backlog metrics refresh failed: {error}")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+# ---------- PUBLISHING ----------
+
+def firestore_json_default(value):
+    """json.dumps fallback for the Firestore types found in doc.to_dict()"""
+    if isinstance(value, datetime):
+        # Also covers DatetimeWithNanoseconds
+        return value.isoformat()
+    if isinstance(value, GeoPoint):
+        return {"latitude": value.latitude, "longitude": value.longitude}
+    if isinstance(value, DocumentReference):
+        return value.path
+    if Vector is not None and isinstance(value, Vector):
+        return list(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def encode_message(message: dict) -> bytes:
+    return json.dumps(message, default=firestore_json_default).encode()
+
+def _publish_and_wait(topic, messages):
+    # publisher.publish blocks here when flow control limits are hit
+    futures = [publisher.publish(topic, data) for data in messages]
+    ok = []
+    for data, future in zip(messages, futures):
+        try:
+            future.result(timeout=PUBLISH_TIMEOUT_SECONDS)
+            ok.append(True)
+        except Exception as e:
+            print(f"❌ Publish to {topic} failed: {e}")
+            ok.append(False)
+    return ok
+
+async def publish_batch(topic, messages):
+    """
+    Publish encoded messages from a worker thread and wait for all of them.
+    Returns one success flag per message.
+    """
+    if not messages:
+        return []
+    started = time.perf_counter()
+    ok = await asyncio.to_thread(_publish_and_wait, topic, messages)
+    elapsed = max(time.perf_counter() - started, 1e-6)
+
+    sent = sum(ok)
+    topic_name = topic.split('/')[-1]
+    PUBLISHED.labels(topic_name).inc(sent)
+    PUBLISHED_BYTES.labels(topic_name).inc(sum(len(data) for data, success in zip(messages, ok) if success))
+    PUBLISH_ERRORS.labels(topic_name).inc(len(ok) - sent)
+    PUBLISH_SECONDS.labels(topic_name).observe(elapsed)
+    print(f"📤 Published {sent}/{len(messages)} to {topic_name} in {elapsed:.2f}s ({sent / elapsed:.0f} msg/s)")
+    return ok
+
+# ---------- PRIORITY LANES ----------
+def urgency_score(data):
+    """Cheap local urgency estimate from keywords and source authority"""
+    return 0.8 * PRIORITY_SCORER.keyword_score(data.get("content")) + 0.2 * PRIORITY_SCORER.source_score(data)
+
+def classify_lane(data):
+    if URGENT_LANE and urgency_score(data) >= URGENT_SCORE:
+        return "urgent"
+    return "routine"
+
+def covered_by_urgent_lane(doc, data, urgent_cursor):
+    """Urgent docs at or before the fast lane's cursor have been dispatched by it"""
+    created = data.get("createdAt")
+    return bool(
+        created and cursor_key((created, doc.id)) <= cursor_key(urgent_cursor) and classify_lane(data) == "urgent"
+    )
+
 # ---------- STAGE 1 ----------
-async def send_stage1(job_id):
-    coll_ref = db.collection("scouted_data")
-    batch_size = 20
+async def dispatch_stage1(job_id, docs):
+    """Publish docs on their lane's topic, returns one success flag per doc"""
+    datas = [doc.to_dict() for doc in docs]
+    lanes = [classify_lane(data) for data in datas]
+
+    # Recorded before publishing so a fast ack always finds its message
+    await ledger.add_dispatched(job_id, "stage1", {f"{job_id}-{doc.id}": [doc.id] for doc in docs})
+    by_topic = {}
+    for i, lane in enumerate(lanes):
+        by_topic.setdefault(LANE_TOPICS[lane], []).append(i)
+    results = await asyncio.gather(*(
+        publish_batch(topic, [
+            encode_message({
+                "job_id": job_id,
+                "correlation_id": f"{job_id}-{docs[i].id}",
+                "priority": lanes[i],
+                "payload": datas[i]
+            })
+            for i in indexes
+        ])
+        for topic, indexes in by_topic.items()
+    ))
+    ok = [False] * len(docs)
+    for indexes, flags in zip(by_topic.values(), results):
+        for i, success in zip(indexes, flags):
+            ok[i] = success
+
+    sent = {f"{job_id}-{doc.id}": [doc.id] for doc, success in zip(docs, ok) if success}
+    await ledger.discard_dispatched(job_id, "stage1", [f"{job_id}-{doc.id}" for doc, success in zip(docs, ok) if not success])
+    DISPATCHED.labels("stage1").inc(len(sent))
+    sent_at = time.time()
+    for doc, data, lane, success in zip(docs, datas, lanes, ok):
+        if not success:
+            continue
+        created = data.get("createdAt")
+        created_ts = created.timestamp() if isinstance(created, datetime) else None
+        if created_ts:
+            TIME_TO_DISPATCH.labels(lane).observe(sent_at - created_ts)
+        dispatched_at[f"{job_id}-{doc.id}"] = (sent_at, 1, lane, created_ts)
+    return ok
+
+async def send_stage1(job_id, shard):
+    await ledger.create_job(job_id)
+    job_done[job_id] = asyncio.Event()
+
+    cursor = shard_cursor("stage1", shard)
     total_sent = 0
-    last_cursor = await get_last_cursor("stage1")
-    last_doc = None
+    cursor_moved = False
 
-    while total_sent < 100:
-        query = coll_ref.order_by("createdAt").limit(batch_size)
-        if last_cursor:
-            query = query.start_after({"createdAt": last_cursor})
-        elif last_doc:
-            query = query.start_after(last_doc)
+    async with cursor_locks[cursor]:
+        last_cursor = await get_last_cursor(cursor)
+        # Urgent docs the fast lane has already scanned past; anything newer
+        # (a new shard, the lane just enabled) is still this scan's to send
+        urgent_cursor = None
+        if TRIGGER_MODE == "poll" and URGENT_LANE:
+            urgent_cursor = await get_last_cursor(shard_cursor("stage1_urgent", shard))
 
-        docs = list(query.stream())
-        if not docs:
-            break
+        while total_sent < STAGE1_MAX_PER_JOB:
+            page_size = min(STAGE1_PAGE_SIZE, STAGE1_MAX_PER_JOB - total_sent)
+            query = after_cursor(scouted_data_query(shard), "scouted_data", last_cursor).limit(page_size)
+            docs = await query.get()
+            if not docs:
+                break
 
-        for doc in docs:
-            cid = f"{job_id}-{doc.id}"
-            publisher.publish(TOPIC1, json.dumps({
-                "job_id": job_id,
-                "correlation_id": cid,
-                "payload": doc.to_dict()
-            }).encode())
-            print(f"📤 Stage 1 sent: {cid}")
+            page = docs
+            if urgent_cursor:
+                # Already covered by the fast lane
+                docs = [doc for doc in page if not covered_by_urgent_lane(doc, doc.to_dict(), urgent_cursor)]
+            ok = await dispatch_stage1(job_id, docs)
+            total_sent += sum(ok)
+            if not all(ok):
+                # Leave the cursor before this page so it is picked up again
+                print(f"⚠️ Stage 1 page partially failed for job {job_id}, stopping scan")
+                break
+
+            last_cursor = doc_cursor(page[-1])
+            cursor_moved = True
+
+        if cursor_moved:
+            await update_last_cursor(cursor, last_cursor)
+
+    await ledger.set_expected(job_id, "stage1", total_sent)
+    # Acks may have raced ahead of us, or there was nothing to send
+    await maybe_send_stage2(job_id)
 
-        last_doc = docs[-1]
-        total_sent += len(docs)
+async def send_stage1_docs(job_id, shard, docs):
+    """Stage 1 for docs handed over by the listener or the fast lane"""
+    await ledger.create_job(job_id)
+    job_done[job_id] = asyncio.Event()
+    lane = job_lanes.get(job_id, "routine")
 
-    if last_doc:
-        await update_last_cursor("stage1", last_doc.to_dict().get("createdAt"))
+    ok = await dispatch_stage1(job_id, docs)
+    for doc, success in zip(docs, ok):
+        if not success and shard["key"] in lane_queues:
+            # Retry with the lane's next batch
+            lane_queues[shard["key"]][lane].put_nowait(doc)
 
-    job_state[job_id] = {
-        "stage1_expected": total_sent,
-        "stage1_received": 0,
-        "stage2_sent": False,
-        "stage2_ack": False
-    }
+    # In stream mode the cursor is only a catch-up point for restarts, keep
+    # it in step with the routine lane (urgent docs may overtake queued
+    # routine ones, a restart just re-sends them). In poll mode it belongs to
+    # the routine scan.
+    newest = max((doc_cursor(doc) for doc in docs if doc.to_dict().get("createdAt")), key=cursor_key, default=None)
+    if newest and TRIGGER_MODE == "stream" and lane == "routine":
+        cursor = shard_cursor("stage1", shard)
+        async with cursor_locks[cursor]:
+            last_cursor = await get_last_cursor(cursor)
+            if not last_cursor or cursor_key(newest) > cursor_key(last_cursor):
+                await update_last_cursor(cursor, newest)
+
+    await ledger.set_expected(job_id, "stage1", sum(ok))
+    await maybe_send_stage2(job_id)
 
 # ---------- STAGE 2 ----------
+stage2_chunk_size = STAGE2_CHUNK_MIN
+# Moving average of synthesize seconds per doc, None until the first ack
+stage2_seconds_per_doc = None
+
+def tune_stage2_chunk_size(latency, doc_count):
+    global stage2_chunk_size, stage2_seconds_per_doc
+    per_doc = latency / max(doc_count, 1)
+    if stage2_seconds_per_doc is None:
+        stage2_seconds_per_doc = per_doc
+    else:
+        stage2_seconds_per_doc = 0.8 * stage2_seconds_per_doc + 0.2 * per_doc
+    target = int(STAGE2_TARGET_LATENCY_SECONDS / max(stage2_seconds_per_doc, 1e-3))
+    stage2_chunk_size = max(STAGE2_CHUNK_MIN, min(STAGE2_CHUNK_MAX, target))
+
+def chunk_stage2_docs(docs, max_docs):
+    """Split docs into chunks bounded by doc count and encoded size"""
+    chunks, current, current_bytes = [], [], 0
+    for doc in docs:
+        data = doc.to_dict()
+        size = len(json.dumps(data, default=firestore_json_default))
+        if current and (len(current) >= max_docs or current_bytes + size > STAGE2_CHUNK_MAX_BYTES):
+            chunks.append(current)
+            current, current_bytes = [], 0
+        current.append((doc, data))
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
 async def send_stage2(job_id):
+    """Drain analyzed-event past the stage 2 watermark, returns chunks sent"""
+    if not SHARDED:
+        return await drain_stage2(job_id)
+    # Replicas share the one stage 2 watermark, only the lease holder drains;
+    # anything left is picked up by the next job on whichever replica
+    if not await coordinator.acquire("stage2"):
+        print(f"⚠️ Stage 2 drain busy on another replica, skipping for job {job_id}")
+        return 0
+    try:
+        return await drain_stage2(job_id)
+    finally:
+        await coordinator.release("stage2")
+
+async def drain_stage2(job_id):
     coll_ref = db.collection("analyzed-event")
-    last_cursor = await get_last_cursor("stage2")
 
-    query = coll_ref.order_by("createdAt").limit(5)
-    if last_cursor:
-        query = query.start_after({"createdAt": last_cursor})
+    async with cursor_locks["stage2"]:
+        last_cursor = await get_last_cursor("stage2")
 
-    docs = list(query.stream())
-    if not docs:
-        print(f"⚠️ No new docs for Stage 2")
-        return
+        docs = []
+        while len(docs) < STAGE2_MAX_PER_JOB:
+            query = after_cursor(coll_ref, "analyzed-event", last_cursor).limit(min(100, STAGE2_MAX_PER_JOB - len(docs)))
+            page = await query.get()
+            if not page:
+                break
+            docs.extend(page)
+            last_cursor = doc_cursor(page[-1])
 
-    publisher.publish(TOPIC2, json.dumps({
-        "job_id": job_id,
-        "correlation_id": job_id,
-        "batch": [doc.to_dict() for doc in docs]
-    }).encode())
+        if not docs:
+            print(f"⚠️ No new docs for Stage 2")
+            return 0
 
-    print(f"📤 Stage 2 triggered with {len(docs)} docs")
+        chunks = chunk_stage2_docs(docs, stage2_chunk_size)
+        cids = [f"{job_id}-s2-{i}" for i in range(len(chunks))]
+        await ledger.add_dispatched(job_id, "stage2", {
+            cid: [doc.id for doc, _ in chunk] for cid, chunk in zip(cids, chunks)
+        })
+        sent_at = time.time()
+        # All chunks go out together, publish_batch only waits once
+        ok = await publish_batch(TOPIC2, [
+            encode_message({
+                "job_id": job_id,
+                "correlation_id": cid,
+                "batch": [data for _, data in chunk]
+            })
+            for cid, chunk in zip(cids, chunks)
+        ])
+
+        sent = {}
+        watermark = None
+        contiguous = True
+        for cid, chunk, success in zip(cids, chunks, ok):
+            contiguous = contiguous and success
+            if not success:
+                continue
+            sent[cid] = [doc.id for doc, _ in chunk]
+            dispatched_at[cid] = (sent_at, len(chunk), "routine", None)
+            if contiguous:
+                # Stops at the first failed chunk so the next job retries it
+                watermark = doc_cursor(*chunk[-1])
+        await ledger.discard_dispatched(job_id, "stage2", [cid for cid in cids if cid not in sent])
+        DISPATCHED.labels("stage2").inc(len(sent))
 
-    await update_last_cursor("stage2", docs[-1].to_dict().get("createdAt"))
+        print(f"📤 Stage 2 triggered with {len(docs)} docs in {len(sent)}/{len(chunks)} chunks of up to {stage2_chunk_size}")
+
+        if watermark:
+            await update_last_cursor("stage2", watermark)
+    return len(sent)
 
 # ---------- ORCHESTRATION LOOP ----------
-async def orchestrator_loop():
-    while True:
-        job_id = f"job-{uuid.uuid4()}"
-        print(f"\n🚀 Starting new job: {job_id}")
-        await send_stage1(job_id)
+def release_lane_slot(job_id):
+    # Each job holds one slot of its lane, released exactly once
+    lane = job_lanes.pop(job_id, None)
+    if lane:
+        lane_slots[lane].release()
+
+def release_urgent_slot(job_id):
+    # Urgent slots bound time-to-alert, which ends with stage 1; synthesis
+    # for an urgent job carries on without holding up the next alert
+    if job_lanes.get(job_id) == "urgent":
+        release_lane_slot(job_id)
+
+async def finish_job(job_id):
+    job_done.pop(job_id, None)
+    for cid in [cid for cid in dispatched_at if cid.startswith(f"{job_id}-")]:
+        dispatched_at.pop(cid, None)
+    release_lane_slot(job_id)
+    try:
+        await ledger.delete_job(job_id)
+    except Exception as e:
+        print(f"❌ Failed to remove job {job_id} from ledger: {e}")
+
+async def redispatch_stragglers(job_id, stage, attempt):
+    """Re-publish only the messages of a stage that have not been acked"""
+    pending = await ledger.pending_acks(job_id, stage)
+    if not pending:
+        return
+    print(f"🐢 Re-dispatching {len(pending)} {stage} stragglers for job {job_id} (hedge {attempt})")
+
+    source = STAGE_COLLECTIONS[stage]
+    refs = [db.collection(source).document(doc_id) for doc_ids in pending.values() for doc_id in doc_ids]
+    docs = {doc.id: doc.to_dict() async for doc in db.get_all(refs) if doc.exists}
+
+    messages = {}
+    for cid, doc_ids in pending.items():
+        found = [docs[doc_id] for doc_id in doc_ids if doc_id in docs]
+        if not found:
+            continue
+        message = {"job_id": job_id, "correlation_id": cid, "hedge": attempt}
+        if stage == "stage1":
+            message["priority"] = classify_lane(found[0])
+            message["payload"] = found[0]
+            topic = LANE_TOPICS[message["priority"]]
+        else:
+            message["batch"] = found
+            topic = TOPIC2
+        messages.setdefault(topic, []).append(encode_message(message))
+
+    # Whichever copy acks first wins, the rest are dropped as duplicates
+    for topic, topic_messages in messages.items():
+        ok = await publish_batch(topic, topic_messages)
+        HEDGED.labels(stage).inc(sum(ok))
 
-        # Wait until stage 2 is acknowledged
+async def give_up_stragglers(job_id, stage, state):
+    if stage == "stage1":
+        missing = (state["stage1_expected"] or 0) - state["stage1_received"]
+        print(f"⚠️ Job {job_id} moving on without {missing} stage 1 acks")
+        await ledger.set_expected(job_id, "stage1", state["stage1_received"])
+        await maybe_send_stage2(job_id)
+    else:
+        print(f"⚠️ Job {job_id} gave up waiting for its stage 2 ack")
+        await mark_job_done(job_id)
+
+async def wait_for_job(job_id, created_at):
+    stage_started = {"stage1": created_at}
+    hedges = {"stage1": 0, "stage2": 0}
+    try:
         while True:
-            state = job_state.get(job_id)
-            if state and state.get("stage2_ack"):
-                print(f"✅ Job {job_id} fully processed.")
+            # Set by /callback on this worker once stage 2 is acknowledged
+            try:
+                await asyncio.wait_for(job_done[job_id].wait(), timeout=LEDGER_POLL_SECONDS)
+                break
+            except asyncio.TimeoutError:
+                pass
+
+            # The ack may have landed on another worker
+            state = await ledger.get_job(job_id)
+            if not state or state["stage2_ack"]:
                 break
-            await asyncio.sleep(2)
 
-        print(f"⏳ Sleeping 2 minutes before next job...")
-        await asyncio.sleep(120)
+            stage = "stage2" if state["stage2_sent"] else "stage1"
+            if state["stage2_sent"]:
+                # Stage 1 finished, possibly with the acks on another worker
+                release_urgent_slot(job_id)
+            started = stage_started.setdefault(stage, time.time())
+            timeout = STAGE1_TIMEOUT_SECONDS if stage == "stage1" else STAGE2_TIMEOUT_SECONDS
+            if time.time() - started < timeout:
+                continue
+
+            try:
+                if hedges[stage] < MAX_HEDGES:
+                    hedges[stage] += 1
+                    await redispatch_stragglers(job_id, stage, hedges[stage])
+                else:
+                    await give_up_stragglers(job_id, stage, state)
+            except Exception as e:
+                print(f"❌ Straggler handling failed for job {job_id}: {e}")
+            stage_started[stage] = time.time()
+        print(f"✅ Job {job_id} fully processed.")
+    finally:
+        await finish_job(job_id)
+
+def track_job(job_id, created_at):
+    task = asyncio.create_task(wait_for_job(job_id, created_at))
+    job_tasks.add(task)
+    task.add_done_callback(job_tasks.discard)
+
+def job_shard_key(job_id):
+    # job-{shard key}-{uuid4}, older IDs without a shard are "default"
+    return job_id[len("job-"):-37] or "default"
+
+async def recover_jobs(shard_key=None):
+    """Adopt jobs a previous observer process left in the ledger"""
+    for state in await ledger.list_jobs():
+        job_id = state["job_id"]
+        if job_id in job_done or (shard_key and job_shard_key(job_id) != shard_key):
+            continue
+        await job_slots.acquire()
+        if shard_key and shard_key not in shard_stops:
+            # Handed off while waiting for a slot, the next owner adopts the rest
+            job_slots.release()
+            return
+        job_lanes[job_id] = "routine"
+        job_done[job_id] = asyncio.Event()
+        print(f"♻️ Recovered in-flight job {job_id}")
+        track_job(job_id, state["created_at"])
+        if state["stage2_ack"]:
+            job_done[job_id].set()
+        else:
+            # All acks may have arrived while nobody was around to send stage 2
+            await maybe_send_stage2(job_id)
+
+def next_idle(idle, backlog):
+    if backlog >= BUSY_BACKLOG:
+        return 0
+    if backlog > 0:
+        return IDLE_MIN_SECONDS
+    return min(max(idle, IDLE_MIN_SECONDS / 2) * 2, IDLE_MAX_SECONDS)
+
+async def launch_job(shard, send_stage1_fn, *args, lane="routine"):
+    # Blocks while the lane's jobs are all still waiting on stage 2
+    await lane_slots[lane].acquire()
+    job_id = f"job-{shard['key']}-{uuid.uuid4()}"
+    job_lanes[job_id] = lane
+    print(f"\n🚀 Starting new {lane} job: {job_id} ({len(job_done) + 1} in flight)")
+
+    try:
+        await send_stage1_fn(job_id, shard, *args)
+    except asyncio.CancelledError:
+        # Shard handed off mid-dispatch, its new owner rescans from the cursor
+        await finish_job(job_id)
+        raise
+    except Exception as e:
+        print(f"❌ Stage 1 failed for job {job_id}: {e}")
+        await finish_job(job_id)
+        return False
+    track_job(job_id, time.time())
+    return True
+
+async def poll_loop(shard):
+    idle = 0
+    while True:
+        await launch_job(shard, send_stage1)
+
+        try:
+            backlog = await count_backlog(shard)
+        except Exception as e:
+            print(f"❌ Backlog check failed: {e}")
+            backlog = 0
+        idle = next_idle(idle, backlog)
+        if idle:
+            print(f"⏳ Backlog {backlog} in {shard['key']}, sleeping {idle:.0f}s before next job...")
+            await asyncio.sleep(idle)
+
+async def scan_urgent(shard):
+    """Poll-mode fast lane: dispatch urgent docs ahead of the routine scan"""
+    if lane_slots["urgent"].locked():
+        # Try again next poll rather than hold up the routine scan waiting for a slot
+        return
+    cursor = shard_cursor("stage1_urgent", shard)
+    routine_cursor = shard_cursor("stage1", shard)
+    # Also the routine scan's lock: it reads the urgent cursor once up front,
+    # so the two scans of a shard must not overlap
+    async with cursor_locks[routine_cursor], cursor_locks[cursor]:
+        # Docs up to the routine cursor have been dispatched by the routine
+        # scan unless this lane already covered them
+        candidates = [await get_last_cursor(cursor), await get_last_cursor(routine_cursor)]
+        last_cursor = max((value for value in candidates if value), key=cursor_key, default=None)
+        urgent = []
+        cursor_moved = False
+        while len(urgent) < STAGE1_MAX_PER_JOB:
+            query = after_cursor(scouted_data_query(shard), "scouted_data", last_cursor).limit(STAGE1_PAGE_SIZE)
+            page = await query.get()
+            if not page:
+                break
+            urgent.extend(doc for doc in page if classify_lane(doc.to_dict()) == "urgent")
+            last_cursor = doc_cursor(page[-1])
+            cursor_moved = True
+
+        # The routine scan skips urgent docs, so only move on once they're out
+        if urgent and not await launch_job(shard, send_stage1_docs, urgent, lane="urgent"):
+            return
+        if cursor_moved:
+            await update_last_cursor(cursor, last_cursor)
+
+async def urgent_poll_loop(shard):
+    while True:
+        try:
+            await scan_urgent(shard)
+        except Exception as e:
+            print(f"❌ Urgent lane scan failed: {e}")
+        await asyncio.sleep(URGENT_POLL_SECONDS)
+
+# ---------- STREAM MODE ----------
+# Docs waiting for dispatch per shard and lane: fed by the listener in
+# stream mode and by failed publishes in both modes
+lane_queues = {}
+# Watch streams re-send ADDED changes after a reset, remember recent IDs
+recent_stream_ids = OrderedDict()
+RECENT_STREAM_IDS_MAX = 10000
+
+def enqueue_stream_docs(shard_key, docs):
+    queues = lane_queues.get(shard_key)
+    if not queues:
+        # Shard released since the snapshot, its new owner catches up
+        return
+    for doc in docs:
+        if doc.id in recent_stream_ids:
+            continue
+        recent_stream_ids[doc.id] = True
+        if len(recent_stream_ids) > RECENT_STREAM_IDS_MAX:
+            recent_stream_ids.popitem(last=False)
+        queues[classify_lane(doc.to_dict())].put_nowait(doc)
+
+def start_scouted_data_listener(loop, shard, cursor):
+    # Snapshot listeners are only available on the sync client; callbacks
+    # arrive on a background thread and are handed to the event loop
+    client = firestore.Client()
+    query = after_cursor(scouted_data_query(shard, client), "scouted_data", cursor, client)
+
+    def on_snapshot(col_snapshot, changes, read_time):
+        added = [change.document for change in changes if change.type.name == "ADDED"]
+        if added:
+            loop.call_soon_threadsafe(enqueue_stream_docs, shard["key"], added)
+
+    return query.on_snapshot(on_snapshot)
+
+async def next_lane_batch(shard, lane):
+    # Urgent docs go out with whatever else is already queued, no window
+    queue = lane_queues[shard["key"]][lane]
+    window = STREAM_BATCH_WINDOW_SECONDS if lane == "routine" else 0
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + window
+    while len(batch) < STREAM_BATCH_SIZE:
+        if not queue.empty():
+            batch.append(queue.get_nowait())
+            continue
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def lane_dispatcher(shard, lane):
+    while True:
+        docs = await next_lane_batch(shard, lane)
+        if await launch_job(shard, send_stage1_docs, docs, lane=lane):
+            continue
+        # The job never started, so none of these went out
+        print(f"⚠️ Re-queueing {len(docs)} {lane} docs in {shard['key']}")
+        await asyncio.sleep(STREAM_RETRY_SECONDS)
+        for doc in docs:
+            lane_queues[shard["key"]][lane].put_nowait(doc)
+
+async def stream_loop(shard):
+    # Catch up on whatever arrived while no listener was running
+    while await count_backlog(shard) > 0:
+        if not await launch_job(shard, send_stage1):
+            break
+
+    print(f"👂 Listening for new scouted_data docs in {shard['key']}")
+    while True:
+        # A watch reset re-sends every doc the query has matched since it
+        # was opened, more than recent_stream_ids remembers on a long-lived
+        # listener; re-opening from the cursor keeps that set recent. Docs
+        # queued but not yet past the cursor come again and are recognized.
+        cursor = await get_last_cursor(shard_cursor("stage1", shard))
+        watch = start_scouted_data_listener(asyncio.get_running_loop(), shard, cursor)
+        try:
+            # Batches are dispatched by the lane dispatchers
+            await asyncio.sleep(STREAM_RESUBSCRIBE_SECONDS)
+        finally:
+            watch.unsubscribe()
+
+# ---------- SHARDS ----------
+async def run_shard(shard, stop):
+    """Run the job loops of one shard until stop is set"""
+    lane_queues[shard["key"]] = {lane: asyncio.Queue() for lane in LANE_TOPICS}
+    loops = [lane_dispatcher(shard, lane) for lane in LANE_TOPICS]
+    if TRIGGER_MODE == "poll" and URGENT_LANE:
+        loops.append(urgent_poll_loop(shard))
+    loops.append(stream_loop(shard) if TRIGGER_MODE == "stream" else poll_loop(shard))
+
+    tasks = [asyncio.create_task(loop) for loop in loops]
+    try:
+        await stop.wait()
+    finally:
+        # In-flight jobs keep running until their stage 2 is acked
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        lane_queues.pop(shard["key"], None)
+
+async def recover_shard_jobs(key):
+    try:
+        await recover_jobs(key)
+    except Exception as e:
+        print(f"❌ Recovering jobs of shard {key} failed: {e}")
+    finally:
+        if recovery_tasks.get(key) is asyncio.current_task():
+            del recovery_tasks[key]
+
+def start_shard(key, recover=False):
+    print(f"🧩 Running shard {key}")
+    shard_stops[key] = asyncio.Event()
+    shard_tasks[key] = asyncio.create_task(run_shard(SHARDS[key], shard_stops[key]))
+    if recover:
+        # Adopting jobs waits for job slots, so it runs beside the shard
+        # rather than holding up the heartbeat that keeps its lease
+        recovery_tasks[key] = asyncio.create_task(recover_shard_jobs(key))
+
+async def stop_shard(key, orphaned=False):
+    print(f"🧩 Handing off shard {key}")
+    shard_stops.pop(key).set()
+    await shard_tasks.pop(key)
+    if coordinator:
+        await coordinator.release(key, orphaned=orphaned)
+
+async def rebalance_shards():
+    await coordinator.heartbeat()
+    for key in SHARDS:
+        running = key in shard_stops
+        if running and not coordinator.prefers(key):
+            # A replica joined that ranks higher for this shard
+            await stop_shard(key)
+        elif running or coordinator.prefers(key):
+            lease = await coordinator.acquire(key)
+            if lease is None and running:
+                print(f"⚠️ Lost the lease on shard {key}")
+                await stop_shard(key)
+            elif lease and not running:
+                # A lease taken over means the previous owner died with jobs in flight
+                start_shard(key, recover=lease == "taken_over")
+
+async def shard_rebalance_loop():
+    print(f"🧩 Replica {coordinator.replica_id} sharding {len(SHARDS)} shards by {SHARD_BY}")
+    while True:
+        try:
+            await rebalance_shards()
+        except Exception as e:
+            print(f"❌ Shard rebalance failed: {e}")
+        await asyncio.sleep(SHARD_HEARTBEAT_SECONDS)
+
+async def leader_loop():
+    print(f"👑 Worker {WORKER_ID} contending for the orchestrator lease")
+    while True:
+        try:
+            leading = await ledger.acquire_leader(WORKER_ID, LEADER_LEASE_SECONDS)
+        except Exception as e:
+            print(f"❌ Leader lease renewal failed: {e}")
+            leading = False
+        running = "default" in shard_stops
+        if leading and not running:
+            print(f"👑 Worker {WORKER_ID} is the orchestrator")
+            # Jobs the previous leader left in flight are adopted
+            start_shard("default", recover=True)
+        elif running and not leading:
+            print(f"⚠️ Worker {WORKER_ID} lost the orchestrator lease")
+            await stop_shard("default")
+        await asyncio.sleep(LEADER_LEASE_SECONDS / 3)
+
+async def orchestrator_loop():
+    if SHARDED:
+        await shard_rebalance_loop()
+    else:
+        await leader_loop()
 
 # ---------- FASTAPI STARTUP ----------
 @app.on_event("startup")
 async def start():
-    asyncio.create_task(orchestrator_loop())
+    if RUN_ORCHESTRATOR:
+        asyncio.create_task(orchestrator_loop())
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Hand shards over right away instead of waiting for the leases to expire.
+    # Jobs still in flight die with this process, so a shard that has some
+    # is left to its next owner as taken over, which adopts them.
+    in_flight = {job_shard_key(job_id) for job_id in job_done}
+    for key in list(shard_stops):
+        await stop_shard(key, orphaned=key in in_flight)
+    if coordinator:
+        await coordinator.leave()
+    elif RUN_ORCHESTRATOR:
+        await ledger.release_leader(WORKER_ID)
 
 @app.get("/")
 async def root():
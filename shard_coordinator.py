@@ -0,0 +1,106 @@
+"""
+Shard ownership for observer replicas.
+
+Every replica running the orchestrator heartbeats a doc in the replica
+collection. The replicas seen within the lease TTL decide, by rendezvous
+(highest random weight) hashing, which replica should run each shard, so a
+replica joining or leaving only moves its own share of the shards.
+
+Running a shard additionally needs its lease, a `{key}_lease` doc in
+job_state_tracking taken and renewed in a transaction. Two replicas that
+briefly disagree on the live set therefore never run the same shard at
+once; a crashed holder's lease simply expires.
+"""
+
+import hashlib
+import socket
+import time
+import uuid
+from typing import List, Optional
+
+from google.cloud import firestore
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+
+def rendezvous_owner(key: str, replicas: List[str]) -> Optional[str]:
+    """The replica with the highest hash for key, None without replicas"""
+    if not replicas:
+        return None
+    return max(replicas, key=lambda replica: hashlib.sha1(f"{replica}:{key}".encode()).digest())
+
+
+class ShardCoordinator:
+    """Replica heartbeats plus per-shard leases in Firestore"""
+
+    def __init__(self, db, ttl_seconds: float, replica_collection: str = "observer_replicas",
+                 lease_collection: str = "job_state_tracking", replica_id: Optional[str] = None):
+        self.db = db
+        self.ttl = ttl_seconds
+        self.replica_id = replica_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.replicas_ref = db.collection(replica_collection)
+        self.leases_ref = db.collection(lease_collection)
+        self.replicas = [self.replica_id]
+
+    async def heartbeat(self) -> List[str]:
+        """Refresh our heartbeat and the live replica set"""
+        now = time.time()
+        await self.replicas_ref.document(self.replica_id).set({"heartbeat_at": now})
+        query = self.replicas_ref.where(filter=FieldFilter("heartbeat_at", ">=", now - self.ttl))
+        live = {doc.id async for doc in query.stream()}
+        live.add(self.replica_id)
+        self.replicas = sorted(live)
+        return self.replicas
+
+    def preferred_owner(self, key: str) -> Optional[str]:
+        return rendezvous_owner(key, self.replicas)
+
+    def prefers(self, key: str) -> bool:
+        return self.preferred_owner(key) == self.replica_id
+
+    async def acquire(self, key: str) -> Optional[str]:
+        """
+        Take or renew the lease on key.
+
+        Returns None while another replica holds a live lease, otherwise
+        "renewed", "new" (nobody held it) or "taken_over" (the previous
+        holder let it expire, so its in-flight work is orphaned).
+        """
+        lease_ref = self.leases_ref.document(f"{key}_lease")
+
+        @firestore.async_transactional
+        async def take(transaction):
+            doc = await lease_ref.get(transaction=transaction)
+            lease = doc.to_dict() if doc.exists else None
+            now = time.time()
+            if lease and lease["owner"] != self.replica_id and lease["expires_at"] > now:
+                return None
+            transaction.set(lease_ref, {"owner": self.replica_id, "expires_at": now + self.ttl})
+            if not lease:
+                return "new"
+            return "renewed" if lease["owner"] == self.replica_id else "taken_over"
+
+        return await take(self.db.transaction())
+
+    async def release(self, key: str, orphaned: bool = False) -> None:
+        """
+        Drop our lease on key so the preferred owner can take it right away.
+
+        With orphaned (we're leaving with jobs still in flight) the lease is
+        expired instead of deleted, so the next owner gets "taken_over" and
+        adopts them.
+        """
+        lease_ref = self.leases_ref.document(f"{key}_lease")
+
+        @firestore.async_transactional
+        async def drop(transaction):
+            doc = await lease_ref.get(transaction=transaction)
+            if doc.exists and doc.to_dict()["owner"] == self.replica_id:
+                if orphaned:
+                    transaction.update(lease_ref, {"expires_at": 0})
+                else:
+                    transaction.delete(lease_ref)
+
+        await drop(self.db.transaction())
+
+    async def leave(self) -> None:
+        await self.replicas_ref.document(self.replica_id).delete()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Agents import the shared backend modules flat, as they do when deployed;
+# the observer's modules (job_ledger, shard_coordinator) live at the root
+sys.path[:0] = [os.path.join(ROOT, "backend", "agents", "scout-agent"), os.path.join(ROOT, "backend"), ROOT]
+
+from job_ledger import InMemoryJobLedger, SQLiteJobLedger  # noqa: E402
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def ledger(request, tmp_path):
+    """The job ledger backends that run without any cloud service"""
+    if request.param == "memory":
+        return InMemoryJobLedger()
+    return SQLiteJobLedger(str(tmp_path / "jobs.db"))
@@ -0,0 +1,83 @@
+"""
+Observer / agent callback contract: each agent reads the fields the
+observer publishes for its stage and acks on that same stage, so the
+ledger accepts its acks.
+
+The agents' handlers and the observer's dispatchers are read with ast, so
+none of their cloud dependencies are needed.
+"""
+
+import ast
+import asyncio
+import os
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# agent -> the observer function that publishes its messages
+AGENTS = {"analyze-agent": "dispatch_stage1", "synthesize-agent": "drain_stage2"}
+
+
+def parse(*path):
+    with open(os.path.join(ROOT, *path)) as f:
+        return ast.parse(f.read())
+
+
+def function(tree, name):
+    return next(node for node in ast.walk(tree)
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == name)
+
+
+def calls(tree, name):
+    return [node for node in ast.walk(tree) if isinstance(node, ast.Call)
+            and isinstance(node.func, (ast.Name, ast.Attribute))
+            and getattr(node.func, "id", getattr(node.func, "attr", None)) == name]
+
+
+def dispatch(name):
+    """(stage recorded in the ledger, keys of the published message)"""
+    dispatcher = function(parse("observer.py"), name)
+    stage = calls(dispatcher, "add_dispatched")[0].args[1].value
+    message = calls(dispatcher, "encode_message")[0].args[0]
+    return stage, {key.value for key in message.keys}
+
+
+def handler(agent):
+    """(stage the agent acks on, keys it reads from the message)"""
+    tree = parse("backend", "agents", agent, "main.py")
+    payload = next(node.value for node in ast.walk(tree) if isinstance(node, ast.Assign)
+                   and getattr(node.targets[0], "id", None) == "callback_payload")
+    source = next(value.value for key, value in zip(payload.keys, payload.values) if key.value == "source")
+    reads = {call.args[0].value for call in calls(tree, "get")
+             if isinstance(call.func.value, ast.Name) and call.func.value.id == "msg"}
+    return source, reads
+
+
+@pytest.mark.parametrize("agent", AGENTS)
+def test_agent_acks_on_its_dispatch_stage(agent):
+    stage, _ = dispatch(AGENTS[agent])
+    source, _ = handler(agent)
+    assert source == stage
+
+
+@pytest.mark.parametrize("agent", AGENTS)
+def test_agent_reads_published_fields(agent):
+    _, published = dispatch(AGENTS[agent])
+    _, reads = handler(agent)
+    assert reads <= published
+
+
+@pytest.mark.parametrize("agent", AGENTS)
+def test_ledger_accepts_agent_ack(agent, ledger):
+    stage, _ = dispatch(AGENTS[agent])
+    source, _ = handler(agent)
+
+    async def run():
+        await ledger.create_job("job")
+        await ledger.add_dispatched("job", stage, {"job-doc": ["doc"]})
+        return await ledger.record_ack("job", source, "job-doc")
+
+    job, is_new = asyncio.run(run())
+    assert job is not None and is_new
+    assert job[f"{stage}_received"] == 1
@@ -0,0 +1,138 @@
+"""
+Job ledger callback accounting, for the memory and SQLite backends: acks
+are deduped, acks for undispatched messages are rejected, stage 2 is
+claimed once, and only one worker holds the leader lease.
+"""
+
+import asyncio
+import time
+
+from job_ledger import InMemoryJobLedger, SQLiteJobLedger, stage_complete
+
+MESSAGES = {"job-a": ["a"], "job-b": ["b"]}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def dispatched_job(ledger, stage="stage1"):
+    await ledger.create_job("job")
+    await ledger.add_dispatched("job", stage, MESSAGES)
+    await ledger.set_expected("job", stage, len(MESSAGES))
+
+
+def test_repeated_ack_counts_once(ledger):
+    async def scenario():
+        await dispatched_job(ledger)
+        first = await ledger.record_ack("job", "stage1", "job-a")
+        repeat = await ledger.record_ack("job", "stage1", "job-a")
+        return first, repeat
+
+    (job, is_new), (again, repeat_is_new) = run(scenario())
+    assert is_new and job["stage1_received"] == 1
+    assert not repeat_is_new and again["stage1_received"] == 1
+
+
+def test_ack_for_undispatched_message_is_rejected(ledger):
+    async def scenario():
+        await dispatched_job(ledger)
+        return (
+            await ledger.record_ack("job", "stage1", "job-unknown"),
+            await ledger.record_ack("job", "stage2", "job-a"),
+            await ledger.record_ack("other-job", "stage1", "job-a"),
+            await ledger.get_job("job"),
+        )
+
+    unknown, wrong_stage, unknown_job, job = run(scenario())
+    assert unknown == (None, False)
+    assert wrong_stage == (None, False)
+    assert unknown_job == (None, False)
+    assert job["stage1_received"] == 0 and job["stage2_received"] == 0
+
+
+def test_discarded_message_is_rejected_but_acked_one_kept(ledger):
+    async def scenario():
+        await dispatched_job(ledger)
+        await ledger.record_ack("job", "stage1", "job-a")
+        await ledger.discard_dispatched("job", "stage1", ["job-a", "job-b"])
+        return await ledger.record_ack("job", "stage1", "job-b"), await ledger.record_ack("job", "stage1", "job-a")
+
+    discarded, kept = run(scenario())
+    assert discarded == (None, False)
+    assert kept[0] is not None and not kept[1]
+
+
+def test_pending_acks_lists_unacked_messages(ledger):
+    async def scenario():
+        await dispatched_job(ledger)
+        await ledger.record_ack("job", "stage1", "job-a")
+        return await ledger.pending_acks("job", "stage1")
+
+    assert run(scenario()) == {"job-b": ["b"]}
+
+
+def test_stage2_claimed_once_after_stage1_completes(ledger):
+    async def scenario():
+        await dispatched_job(ledger)
+        await ledger.record_ack("job", "stage1", "job-a")
+        early = await ledger.claim_stage2("job")
+        job, _ = await ledger.record_ack("job", "stage1", "job-b")
+        claims = await asyncio.gather(*(ledger.claim_stage2("job") for _ in range(10)))
+        return early, job, claims
+
+    early, job, claims = run(scenario())
+    assert not early
+    assert stage_complete(job, "stage1")
+    assert claims.count(True) == 1
+
+
+def test_stage2_claimed_once_across_sqlite_workers(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    workers = [SQLiteJobLedger(path) for _ in range(3)]
+
+    async def scenario():
+        await dispatched_job(workers[0])
+        for cid in MESSAGES:
+            await workers[1].record_ack("job", "stage1", cid)
+        return await asyncio.gather(*(worker.claim_stage2("job") for worker in workers for _ in range(5)))
+
+    assert run(scenario()).count(True) == 1
+
+
+def test_deleted_job_rejects_acks(ledger):
+    async def scenario():
+        await dispatched_job(ledger)
+        await ledger.delete_job("job")
+        return await ledger.record_ack("job", "stage1", "job-a"), await ledger.list_jobs()
+
+    ack, jobs = run(scenario())
+    assert ack == (None, False)
+    assert jobs == []
+
+
+def test_memory_ledger_is_always_leader():
+    ledger = InMemoryJobLedger()
+    assert run(ledger.acquire_leader("a", 30))
+    assert run(ledger.acquire_leader("b", 30))
+
+
+def test_sqlite_leader_lease(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = SQLiteJobLedger(path), SQLiteJobLedger(path)
+
+    async def scenario():
+        results = [
+            await first.acquire_leader("a", 30),
+            await second.acquire_leader("b", 30),
+            await first.acquire_leader("a", 30),
+        ]
+        await first.release_leader("a")
+        results.append(await second.acquire_leader("b", 0.05))
+        results.append(await first.acquire_leader("a", 30))
+        time.sleep(0.1)
+        # b's lease expired without being renewed
+        results.append(await first.acquire_leader("a", 30))
+        return results
+
+    assert run(scenario()) == [True, False, True, True, False, True]
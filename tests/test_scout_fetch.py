@@ -0,0 +1,137 @@
+"""
+Scout concurrent fetch: each source gets SCOUT_SOURCE_TIMEOUT from when its
+fetch starts, and one that outlives it is left out of the cycle, along with
+any state it stages once it does finish.
+"""
+
+import threading
+import time
+import types
+from datetime import datetime, timezone
+
+import pytest
+
+for module in ("requests", "feedparser", "tweepy", "flask", "google.cloud.firestore", "google.generativeai"):
+    pytest.importorskip(module)
+
+import main as scout  # noqa: E402
+
+
+def make_agent(fetchers):
+    agent = scout.ScoutAgent.__new__(scout.ScoutAgent)
+    agent.pending_source_state = {}
+    agent.source_fetchers = lambda: fetchers
+    return agent
+
+
+def test_late_fetch_does_not_stage_into_later_cycles():
+    release = threading.Event()
+    finished = threading.Event()
+    agent = None
+
+    def fast():
+        agent.stage_source_state("rss:fast", etag='"v1"')
+        return [{"source": "news_rss", "source_id": "fast/1"}]
+
+    def slow():
+        release.wait(5)
+        agent.stage_source_state("rss:slow", etag='"v9"')
+        finished.set()
+        return [{"source": "news_rss", "source_id": "slow/1"}]
+
+    agent = make_agent({"rss:fast": fast, "rss:slow": slow})
+    items, cycle_stats = agent.fetch_all_sources(timeout=0.5)
+
+    assert [item["source_id"] for item in items] == ["fast/1"]
+    assert cycle_stats["rss:slow"]["error"] == "timed out"
+    assert agent.pending_source_state == {"rss:fast": {"etag": '"v1"'}}
+
+    # The straggler finishes once the next cycle has started; nothing it staged survives
+    agent.pending_source_state = {}
+    release.set()
+    assert finished.wait(5)
+    assert agent.pending_source_state == {}
+
+
+def test_direct_fetch_stages_on_agent():
+    agent = make_agent({})
+    agent.stage_source_state("rss:feed", etag='"v1"')
+    assert agent.pending_source_state == {"rss:feed": {"etag": '"v1"'}}
+
+
+def sleeper(seconds, source_id):
+    def fetch():
+        time.sleep(seconds)
+        return [{"source": "news_rss", "source_id": source_id}]
+    return fetch
+
+
+def test_queued_source_gets_its_own_timeout():
+    # One worker: the second fetch starts after the first, and each is timed from its start
+    agent = make_agent({"rss:a": sleeper(0.3, "a"), "rss:b": sleeper(0.3, "b")})
+    items, cycle_stats = agent.fetch_all_sources(timeout=0.5, max_workers=1)
+
+    assert sorted(item["source_id"] for item in items) == ["a", "b"]
+    assert not any(stats["error"] for stats in cycle_stats.values())
+
+
+def test_cycle_ends_while_a_timed_out_fetch_holds_the_worker():
+    release = threading.Event()
+
+    def hangs():
+        release.wait(5)
+        return []
+
+    agent = make_agent({"rss:hangs": hangs, "rss:queued": sleeper(0, "queued")})
+    started = time.monotonic()
+    try:
+        items, cycle_stats = agent.fetch_all_sources(timeout=0.3, max_workers=1)
+    finally:
+        release.set()
+
+    # Two sources on one worker: at most two timeouts
+    assert time.monotonic() - started < 1.5
+    assert items == []
+    assert cycle_stats["rss:hangs"]["error"] == "timed out"
+    assert cycle_stats["rss:queued"]["error"] == "timed out"
+
+
+class Tweet:
+    def __init__(self, tweet_id):
+        self.id = tweet_id
+        self.full_text = f"Tweet {tweet_id}"
+        self.created_at = datetime.now(timezone.utc)
+        self.retweet_count = self.favorite_count = 0
+        self.user = types.SimpleNamespace(screen_name="account", name="Account")
+
+
+def slow_timeline(ids, seconds):
+    """A Cursor stand-in whose tweets take seconds each to page in"""
+    class Cursor:
+        def __init__(self, method, **kwargs):
+            self.max_id = kwargs.get("max_id")
+
+        def items(self, limit):
+            for tweet_id in [i for i in ids if self.max_id is None or i <= self.max_id][:limit]:
+                time.sleep(seconds)
+                yield Tweet(tweet_id)
+    return Cursor
+
+
+def test_paged_twitter_read_stops_at_half_the_timeout(monkeypatch):
+    monkeypatch.setattr(scout, "SCOUT_SOURCE_TIMEOUT", 0.4)
+    monkeypatch.setattr(scout.tweepy, "Cursor", slow_timeline(list(range(30, 1, -1)), 0.03))
+    agent = make_agent({})
+    agent.twitter_api = types.SimpleNamespace(user_timeline=None)
+    agent.get_source_state = lambda source: {"since_id": 1}
+
+    started = time.monotonic()
+    tweets = agent.fetch_twitter_account("@account")
+
+    assert time.monotonic() - started < 0.4
+    assert 0 < len(tweets) < 29
+    staged = agent.pending_source_state["twitter:@account"]
+    # Continued below the oldest tweet read, since_id left where it was
+    assert staged["max_id"] == int(tweets[-1]["source_id"])
+    assert staged["range_newest_id"] == 30
+    assert "since_id" not in staged
@@ -0,0 +1,227 @@
+"""
+Scout RSS polling: conditional GET, validators persisted across restarts,
+and the feed high-water mark in new_feed_entries.
+
+Feeds come from a local HTTP server and persisted state goes to an
+in-memory stand-in for the scout-source-state collection, so no network or
+Firestore is needed; the scout agent's own dependencies are.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+for module in ("requests", "feedparser", "tweepy", "flask", "google.cloud.firestore", "google.generativeai"):
+    pytest.importorskip(module)
+
+import main as scout  # noqa: E402
+
+ETAG = '"v1"'
+MODIFIED = "Wed, 14 Oct 2026 06:00:00 GMT"
+FEED = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>Waterlogging at Silk Board</title><link>http://local/1</link><guid>http://local/1</guid>
+<description>Heavy waterlogging near Silk Board junction.</description><pubDate>{now}</pubDate></item>
+</channel></rss>"""
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        FeedHandler.requests.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        body = FEED.format(now=formatdate(usegmt=True)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", ETAG)
+        self.send_header("Last-Modified", MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class MemoryCollection:
+    """Just enough of a Firestore collection for get_source_state / commit_source_state"""
+
+    def __init__(self):
+        self.docs = {}
+
+    def collection(self, name):
+        return self
+
+    def document(self, doc_id):
+        docs = self.docs
+
+        class Snapshot:
+            exists = doc_id in docs
+
+            @staticmethod
+            def to_dict():
+                return dict(docs.get(doc_id, {}))
+
+        class Document:
+            @staticmethod
+            def get():
+                return Snapshot()
+
+            @staticmethod
+            def set(fields, merge=False):
+                docs[doc_id] = dict(docs.get(doc_id, {}), **fields) if merge else dict(fields)
+
+        return Document()
+
+
+def make_agent(db):
+    agent = scout.ScoutAgent.__new__(scout.ScoutAgent)
+    agent.setup_data_sources()
+    agent.twitter_api = None
+    agent.pending_source_state = {}
+    agent.http = scout.create_http_session()
+    agent.db = db
+    return agent
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    scout.source_state.clear()
+    FeedHandler.requests = []
+    yield
+    scout.source_state.clear()
+
+
+@pytest.fixture
+def feed_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/feed"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Bodies handed to feedparser.parse"""
+    parsed = []
+    parse = scout.feedparser.parse
+
+    def counting_parse(content, *args, **kwargs):
+        parsed.append(content)
+        return parse(content, *args, **kwargs)
+
+    monkeypatch.setattr(scout.feedparser, "parse", counting_parse)
+    return parsed
+
+
+def poll(agent, feed_url):
+    # Commit after each poll, like run_scout_cycle once the items are stored
+    items = agent.fetch_rss_feed(feed_url)
+    agent.commit_source_state([f"rss:{feed_url}"])
+    return items
+
+
+def test_not_modified_feed_is_not_parsed(feed_url, parses):
+    agent = make_agent(MemoryCollection())
+
+    assert len(poll(agent, feed_url)) == 1
+    assert len(parses) == 1
+
+    assert poll(agent, feed_url) == []
+    assert len(parses) == 1
+    assert FeedHandler.requests[-1]["If-None-Match"] == ETAG
+    assert FeedHandler.requests[-1]["If-Modified-Since"] == MODIFIED
+    assert scout.source_stats[f"rss:{feed_url}"]["not_modified"] >= 1
+
+
+def test_validators_survive_restart(feed_url, parses):
+    db = MemoryCollection()
+    assert len(poll(make_agent(db), feed_url)) == 1
+
+    # New process: nothing in memory, validators read back from the stored state
+    scout.source_state.clear()
+    assert poll(make_agent(db), feed_url) == []
+    assert len(parses) == 1
+    assert FeedHandler.requests[-1]["If-None-Match"] == ETAG
+
+
+def test_first_poll_sends_no_validators(feed_url, parses):
+    poll(make_agent(MemoryCollection()), feed_url)
+    assert "If-None-Match" not in FeedHandler.requests[0]
+    assert "If-Modified-Since" not in FeedHandler.requests[0]
+
+
+# new_feed_entries
+
+SOURCE = "rss:http://local/feed"
+LATE = timedelta(seconds=scout.SCOUT_FEED_LATE_SECONDS)
+
+
+def entry(guid, published=None):
+    return {"id": guid, "link": guid, "published_parsed": published.timetuple() if published else None}
+
+
+def new_guids(agent, state, entries):
+    return [item["id"] for item in agent.new_feed_entries(SOURCE, state, entries)]
+
+
+@pytest.fixture
+def agent():
+    return make_agent(MemoryCollection())
+
+
+@pytest.fixture
+def mark():
+    return datetime.now(timezone.utc).replace(microsecond=0) - timedelta(hours=1)
+
+
+def test_first_poll_takes_last_two_hours(agent):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    entries = [entry("a", now - timedelta(minutes=5)), entry("b", now - timedelta(hours=3)), entry("c")]
+    assert new_guids(agent, {}, entries) == ["a"]
+
+
+def test_entries_before_cutoff_are_old(agent, mark):
+    state = {"last_published": mark.isoformat(), "recent_guids": [], "last_guid": "top"}
+    entries = [
+        entry("newer", mark + timedelta(minutes=1)),
+        entry("late", mark - LATE + timedelta(minutes=1)),
+        entry("stale", mark - LATE - timedelta(minutes=1)),
+    ]
+    assert new_guids(agent, state, entries) == ["newer", "late"]
+
+
+def test_recent_guids_are_not_repeated(agent, mark):
+    state = {"last_published": mark.isoformat(), "recent_guids": ["seen"], "last_guid": "seen"}
+    entries = [entry("seen", mark), entry("missed", mark - timedelta(minutes=10))]
+    assert new_guids(agent, state, entries) == ["missed"]
+
+
+def test_undated_entries_above_last_guid_are_new(agent, mark):
+    state = {"last_published": mark.isoformat(), "recent_guids": [], "last_guid": "b"}
+    entries = [entry("a"), entry("b"), entry("c")]
+    assert new_guids(agent, state, entries) == ["a"]
+
+
+def test_mark_moves_to_newest_entry(agent, mark):
+    state = {"last_published": mark.isoformat(), "recent_guids": ["seen"], "last_guid": "seen"}
+    newest = mark + timedelta(minutes=30)
+    entries = [entry("new", newest), entry("seen", mark), entry("stale", newest - LATE - timedelta(minutes=1))]
+    agent.new_feed_entries(SOURCE, state, entries)
+
+    staged = agent.pending_source_state[SOURCE]
+    assert staged["last_published"] == newest.isoformat()
+    assert staged["last_guid"] == "new"
+    # GUIDs inside the new late window, so a second poll returns nothing
+    assert staged["recent_guids"] == ["new", "seen"]
+    assert new_guids(agent, staged, entries) == []